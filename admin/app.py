@@ -1,20 +1,46 @@
 #!/usr/bin/env python3
 import sys
 import os
+import json
+import time
+import urllib.request
 from pathlib import Path
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify, stream_with_context
 
 # Add project root to path to import db.config
 sys.path.append(str(Path(__file__).parent.parent))
 from db.config import (
     initialize_database, get_account, get_connection_config, 
     set_account, set_connection_config, list_accounts, delete_account,
-    list_connection_configs
+    list_connection_configs, close_connection
 )
+from admin.kiwibot.core.metrics import parse_exposition, DEFAULT_METRICS_PORT
+from admin.kiwibot.core.status import StatusListener, DEFAULT_STATUS_PORT
+from admin.kiwibot.core import control
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'kiwi-bot-development-key')
 
+# Where a bot or fleet started with --metrics-port serves its metrics
+METRICS_URL = os.environ.get('KIWIBOT_METRICS_URL', f'http://127.0.0.1:{DEFAULT_METRICS_PORT}/metrics')
+
+# Previous scrape, so counters can be shown as rates between page loads
+_last_scrape = {'time': None, 'values': {}}
+
+# Bots publish their status here (main.py --status-port); bound on first use
+status_listener = StatusListener(port=int(os.environ.get('KIWIBOT_STATUS_PORT', DEFAULT_STATUS_PORT)))
+FLEET_PUSH_INTERVAL = 1.0  # seconds; at most one update per open page per interval
+FLEET_KEEPALIVE = 15.0
+
+@app.teardown_appcontext
+def close_db_connection(exception):
+    """Close the request thread's database connection
+    
+    The threaded server runs every request on a new thread, so the
+    per-thread connection would otherwise stay open until garbage collected.
+    """
+    close_connection()
+
 @app.route('/')
 def index():
     """Display the account list page"""
@@ -93,6 +119,19 @@ def new_account():
     return render_template('account_form.html', title="New Account", 
                          account={}, connection={})
 
+def reload_running_bot(name):
+    """Tell a running bot to pick up edited settings and flash what happened"""
+    response = control.request(name, {'cmd': 'reload-config'})
+    if response is None:
+        return  # not running; it reads the new settings when it starts
+    if not response.get('ok'):
+        flash(f"Bot '{name}' is running but could not reload its settings: {response.get('error')}", "error")
+    elif response.get('relogin_required'):
+        flash(f"Running bot '{name}' reloaded its settings; {', '.join(response['relogin_required'])} "
+              f"take effect the next time it logs in", "success")
+    else:
+        flash(f"Running bot '{name}' updated without a restart", "success")
+
 @app.route('/accounts/<int:account_id>/edit', methods=['GET', 'POST'])
 def edit_account(account_id):
     """Edit an existing account"""
@@ -142,6 +181,8 @@ def edit_account(account_id):
                                  account=request.form, connection={})
         
         flash(f"Account '{name}' updated successfully", "success")
+        # A running bot's control socket is named after the profile it started as
+        reload_running_bot(account['name'])
         return redirect(url_for('view_account', account_id=account_id))
     
     # GET request - show the form with current values
@@ -198,11 +239,133 @@ def edit_connection():
     
     if success:
         flash(f"Connection settings for '{account['name']}' updated successfully", "success")
+        reload_running_bot(account['name'])
     else:
         flash(f"Failed to update connection settings for '{account['name']}'", "error")
     
     return redirect(url_for('connections'))
 
+def summarize_metrics(samples, previous, elapsed):
+    """Fold raw samples into per-bot, per-dream and per-command rows
+    
+    Counters are turned into per-second rates against the previous scrape
+    when there is one.
+    """
+    def rate(key, value):
+        if elapsed and key in previous:
+            return max(0.0, value - previous[key]) / elapsed
+        return None
+    
+    bots, dreams, commands = {}, {}, {}
+    for name, labels, value in samples:
+        bot = labels.get('bot')
+        if bot is None:
+            continue
+        row = bots.setdefault(bot, {
+            'bot': bot, 'connected': False, 'lines': 0, 'lines_rate': None, 'busy_rate': None,
+            'parse_sum': 0.0, 'parse_count': 0, 'queue': 0, 'bytes_in': 0, 'bytes_out': 0,
+            'reconnects': 0, 'rejections': 0
+        })
+        key = (name, tuple(sorted(labels.items())))
+        if name == 'kiwibot_inbound_lines_total':
+            row['lines'] += value
+            line_rate = rate(key, value)
+            if line_rate is not None:
+                row['lines_rate'] = (row['lines_rate'] or 0) + line_rate
+        elif name == 'kiwibot_busy_seconds_total':
+            busy = rate(key, value)
+            dreams[(bot, labels.get('dream', ''))] = {'bot': bot, 'dream': labels.get('dream', '') or '(none)',
+                                                      'busy': value, 'busy_rate': busy}
+            if busy is not None:
+                row['busy_rate'] = (row['busy_rate'] or 0) + busy
+        elif name == 'kiwibot_parse_seconds_sum':
+            row['parse_sum'] = value
+        elif name == 'kiwibot_parse_seconds_count':
+            row['parse_count'] = value
+        elif name == 'kiwibot_connected':
+            row['connected'] = bool(value)
+        elif name == 'kiwibot_send_queue_depth':
+            row['queue'] = value
+        elif name == 'kiwibot_bytes_in_total':
+            row['bytes_in'] = value
+        elif name == 'kiwibot_bytes_out_total':
+            row['bytes_out'] = value
+        elif name == 'kiwibot_reconnects_total':
+            row['reconnects'] = value
+        elif name == 'kiwibot_cooldown_rejections_total':
+            row['rejections'] += value
+        elif name in ('kiwibot_command_seconds_sum', 'kiwibot_command_seconds_count'):
+            command = commands.setdefault((bot, labels.get('command')), {
+                'bot': bot, 'command': labels.get('command'), 'sum': 0.0, 'count': 0
+            })
+            command['sum' if name.endswith('_sum') else 'count'] = value
+    
+    for row in bots.values():
+        row['parse_us'] = row['parse_sum'] / row['parse_count'] * 1e6 if row['parse_count'] else None
+    for command in commands.values():
+        command['mean_ms'] = command['sum'] / command['count'] * 1e3 if command['count'] else None
+    
+    return (
+        sorted(bots.values(), key=lambda row: -(row['busy_rate'] or 0)),
+        sorted(dreams.values(), key=lambda row: (row['busy_rate'] or 0, row['busy']), reverse=True),
+        sorted(commands.values(), key=lambda row: -(row['mean_ms'] or 0)),
+    )
+
+@app.route('/metrics')
+def metrics_page():
+    """Show throughput, latency and queue metrics scraped from the running bots"""
+    try:
+        with urllib.request.urlopen(METRICS_URL, timeout=5) as response:
+            text = response.read().decode('utf-8')
+    except OSError as e:
+        return render_template('metrics.html', error=f"Could not read {METRICS_URL}: {e}",
+                               metrics_url=METRICS_URL, bots=[], dreams=[], commands=[], cpu=None)
+    
+    samples = parse_exposition(text)
+    now = time.monotonic()
+    elapsed = now - _last_scrape['time'] if _last_scrape['time'] is not None else None
+    bots, dreams, commands = summarize_metrics(samples, _last_scrape['values'], elapsed)
+    
+    values = {(name, tuple(sorted(labels.items()))): value for name, labels, value in samples}
+    cpu = values.get(('process_cpu_seconds_total', ()))
+    cpu_rate = None
+    previous_cpu = _last_scrape['values'].get(('process_cpu_seconds_total', ()))
+    if elapsed and cpu is not None and previous_cpu is not None:
+        cpu_rate = (cpu - previous_cpu) / elapsed
+    _last_scrape['time'] = now
+    _last_scrape['values'] = values
+    
+    return render_template('metrics.html', error=None, metrics_url=METRICS_URL,
+                           bots=bots, dreams=dreams, commands=commands, cpu=cpu, cpu_rate=cpu_rate)
+
+@app.route('/fleet')
+def fleet():
+    """Live status of every running bot"""
+    status_listener.start()
+    return render_template('fleet.html', error=status_listener.error, port=status_listener.port)
+
+@app.route('/fleet/stream')
+def fleet_stream():
+    """Server-sent events carrying the fleet status whenever it changes"""
+    status_listener.start()
+    
+    def events():
+        version = -1
+        while True:
+            version, changed = status_listener.wait(version, FLEET_KEEPALIVE)
+            # Send on timeout too, so bots that went quiet turn stale on the page
+            yield f"data: {json.dumps(status_listener.snapshot())}\n\n"
+            time.sleep(FLEET_PUSH_INTERVAL)
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/fleet')
+def api_fleet():
+    """API endpoint with the latest status of every bot as JSON"""
+    status_listener.start()
+    return jsonify(status_listener.snapshot())
+
 @app.route('/api/accounts')
 def api_list_accounts():
     """API endpoint to get all accounts as JSON"""
@@ -219,6 +382,22 @@ def api_get_account(account_id):
     connection = get_connection_config(account_id=account_id)
     return jsonify({"account": account, "connection": connection})
 
+@app.route('/api/accounts/<int:account_id>/control', methods=['POST'])
+def api_control_account(account_id):
+    """API endpoint to send a control request (send, say, reload-config, status, quit) to a running bot"""
+    account = get_account(account_id=account_id)
+    if not account:
+        return jsonify({"error": f"Account with ID {account_id} not found"}), 404
+    
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or 'cmd' not in payload:
+        return jsonify({"error": 'Expected a JSON object with a "cmd" field'}), 400
+    
+    response = control.request(account['name'], payload)
+    if response is None:
+        return jsonify({"error": f"Bot '{account['name']}' is not running"}), 409
+    return jsonify(response), 200 if response.get('ok') else 400
+
 @app.template_filter('nl2br')
 def nl2br(value):
     """Convert newlines to <br> tags"""
@@ -238,8 +417,8 @@ def main():
     """Run the Flask application"""
     # Initialize the database
     initialize_database()
-    # Run the Flask app
-    app.run(debug=True, host='127.0.0.1', port=5000)
+    # Run the Flask app (threaded, so open fleet streams don't block other pages)
+    app.run(debug=True, host='127.0.0.1', port=5000, threaded=True)
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
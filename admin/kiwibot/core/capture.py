@@ -0,0 +1,59 @@
+"""Raw traffic capture files
+
+A capture holds one inbound server line per row, prefixed with the seconds
+elapsed since the capture started and a tab:
+
+    0.001532\tDragonroar
+
+Lines are stored as the raw bytes the server sent (Furcadia text is
+iso-8859-1 and never contains a newline), so a replay sees exactly what
+the bot saw.
+"""
+import time
+from pathlib import Path
+from typing import Iterator, List, Tuple, Union
+
+
+class TrafficCapture:
+    """Append raw inbound lines with timestamps to a capture file"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'ab', buffering=1024 * 1024)
+        self._start = time.monotonic()
+        self.lines = 0
+
+    def write_lines(self, lines: List[bytes]) -> None:
+        """Record a batch of lines received together"""
+        stamp = b'%.6f\t' % (time.monotonic() - self._start)
+        self._file.writelines(stamp + line + b'\n' for line in lines)
+        self.lines += len(lines)
+
+    def close(self) -> None:
+        """Flush and close the capture file"""
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_capture(path: Union[str, Path]) -> Iterator[Tuple[float, bytes]]:
+    """Yield (seconds since start, raw line) pairs from a capture file"""
+    with open(path, 'rb') as f:
+        for row in f:
+            stamp, _, line = row.rstrip(b'\n').partition(b'\t')
+            yield float(stamp), line
+
+
+def capture_path_for(template: str, account_name: str, fleet: bool) -> Path:
+    """Return the capture file for one bot
+
+    `{name}` in the template is replaced by the profile name; in fleet mode
+    without a placeholder the name is appended to the file stem so bots
+    never share a file.
+    """
+    if '{name}' in template:
+        return Path(template.replace('{name}', account_name))
+    path = Path(template)
+    if fleet:
+        return path.with_name(f'{path.stem}-{account_name}{path.suffix}')
+    return path
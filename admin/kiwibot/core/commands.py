@@ -0,0 +1,437 @@
+"""Command registry with autodiscovery and lazy loading
+
+Commands are Command subclasses living in kiwibot/commands/ or in
+installed plugin packages that advertise a module under the
+'kiwibot.commands' entry point group:
+
+    [project.entry-points."kiwibot.commands"]
+    weather = "kiwibot_weather.commands"
+
+Discovery reads each module's source with the ast module and pulls the
+command name and aliases out of the `self.name = ...` / `self.aliases = [...]`
+assignments, so building the name/alias index imports nothing. A command's
+module is imported the first time somebody invokes that command. The parsed
+metadata can be persisted to a small JSON index keyed by file mtime and
+size, so a restart only re-parses files that changed.
+
+One registry is shared by every bot in the process; each bot gets a
+CommandTable that instantiates commands for itself on first use.
+
+reload() swaps edited command modules in without restarting: changed
+modules are compiled from source into fresh module objects, and only if
+every one of them imports cleanly are they swapped in together, under the
+registry lock, with a new generation number. Otherwise the old versions
+stay in place. Each CommandTable notices the new generation on its next
+lookup and replaces its stale instances. Calls already running finish on
+the old code, and cooldowns live in the shared engine keyed by command
+name, so nothing is lost across a reload. base.py is never reloaded:
+every loaded command subclasses its Command class.
+"""
+import ast
+import importlib
+import importlib.metadata
+import importlib.util
+import json
+import logging
+import sys
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+COMMAND_PACKAGE = 'kiwibot.commands'
+ENTRY_POINT_GROUP = 'kiwibot.commands'
+BASE_CLASS = 'Command'
+INDEX_PATH = Path(__file__).resolve().parents[3] / 'data' / 'command_index.json'
+
+
+class CommandSpec:
+    """Lightweight metadata for one command, known before its module is imported"""
+    __slots__ = ('module', 'class_name', 'name', 'aliases', 'path')
+
+    def __init__(self, module: str, class_name: str, name: str, aliases: List[str], path: Optional[str] = None):
+        self.module = module
+        self.class_name = class_name
+        self.name = name
+        self.aliases = aliases
+        self.path = path
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.module, self.class_name)
+
+    def __repr__(self) -> str:
+        return f'CommandSpec({self.module}.{self.class_name}, name={self.name!r}, aliases={self.aliases!r})'
+
+
+def _literal_strings(node: ast.AST) -> Optional[List[str]]:
+    """Return the strings in a list/tuple literal, or None if it isn't one"""
+    if isinstance(node, (ast.List, ast.Tuple)):
+        values = [elt.value for elt in node.elts if isinstance(elt, ast.Constant) and isinstance(elt.value, str)]
+        if len(values) == len(node.elts):
+            return values
+    return None
+
+
+def _is_command_base(base: ast.expr, local_commands: set) -> bool:
+    if isinstance(base, ast.Name):
+        return base.id == BASE_CLASS or base.id in local_commands
+    if isinstance(base, ast.Attribute):
+        return base.attr == BASE_CLASS
+    return False
+
+
+def parse_command_metadata(source: str) -> List[Dict[str, Any]]:
+    """Find Command subclasses in module source without executing it
+
+    Returns:
+        list: One {'class': ..., 'name': ..., 'aliases': [...]} dict per concrete command class
+    """
+    tree = ast.parse(source)
+    found = []
+    local_commands: set = set()
+
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        if not any(_is_command_base(base, local_commands) for base in node.bases):
+            continue
+        local_commands.add(node.name)
+
+        name = node.name.lower()  # same default as Command.__init__
+        aliases: List[str] = []
+
+        # Class attributes first, then assignments on self in __init__
+        statements = list(node.body)
+        for item in node.body:
+            if isinstance(item, ast.FunctionDef) and item.name == '__init__':
+                statements.extend(item.body)
+
+        for statement in statements:
+            if not isinstance(statement, (ast.Assign, ast.AnnAssign)):
+                continue
+            targets = statement.targets if isinstance(statement, ast.Assign) else [statement.target]
+            for target in targets:
+                attr = None
+                if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) and target.value.id == 'self':
+                    attr = target.attr
+                elif isinstance(target, ast.Name):
+                    attr = target.id
+                if attr == 'name' and isinstance(statement.value, ast.Constant) and isinstance(statement.value.value, str):
+                    name = statement.value.value
+                elif attr == 'aliases' and statement.value is not None:
+                    literal = _literal_strings(statement.value)
+                    if literal is not None:
+                        aliases = literal
+
+        found.append({'class': node.name, 'name': name, 'aliases': aliases})
+    return found
+
+
+class CommandRegistry:
+    """Process-wide index of available commands"""
+
+    def __init__(self, package: str = COMMAND_PACKAGE, entry_point_group: Optional[str] = ENTRY_POINT_GROUP,
+                 index_path: Optional[Path] = None):
+        self.package = package
+        self.entry_point_group = entry_point_group
+        self.index_path = index_path
+        self._lock = threading.RLock()
+        self._index: Optional[Dict[str, CommandSpec]] = None  # name or alias -> spec
+        self._specs: List[CommandSpec] = []
+        self._classes: Dict[Tuple[str, str], type] = {}
+        self._sources: Dict[str, Tuple[str, int, int]] = {}  # module -> (path, mtime_ns, size) when imported
+        self.generation = 0  # bumped by every reload that swaps modules
+
+    # Discovery
+
+    def _module_files(self) -> Iterator[Tuple[str, Path]]:
+        """Yield (module name, source path) for every candidate command module"""
+        spec = importlib.util.find_spec(self.package)
+        if spec is not None and spec.submodule_search_locations:
+            # A namespace package lists a directory once per sys.path entry that reaches it
+            for location in dict.fromkeys(str(Path(location).resolve()) for location in spec.submodule_search_locations):
+                for path in sorted(Path(location).glob('*.py')):
+                    if path.stem.startswith('_') or path.stem == 'base':
+                        continue
+                    yield f'{self.package}.{path.stem}', path
+
+        if not self.entry_point_group:
+            return
+        for entry_point in importlib.metadata.entry_points(group=self.entry_point_group):
+            module = entry_point.value.split(':', 1)[0].strip()
+            try:
+                module_spec = importlib.util.find_spec(module)
+            except (ImportError, ValueError) as e:
+                logging.warning('Command plugin %s could not be located: %s', entry_point.name, e)
+                continue
+            if module_spec is None or not module_spec.origin or not module_spec.origin.endswith('.py'):
+                logging.warning('Command plugin %s has no Python source to index', entry_point.name)
+                continue
+            yield module, Path(module_spec.origin)
+
+    def _load_index_cache(self) -> Dict[str, Any]:
+        if not self.index_path:
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index_cache(self, cache: Dict[str, Any]) -> None:
+        if not self.index_path:
+            return
+        try:
+            Path(self.index_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+        except OSError as e:
+            logging.warning('Could not write command index %s: %s', self.index_path, e)
+
+    def discover(self) -> None:
+        """(Re)build the name/alias index from module sources"""
+        cached = self._load_index_cache()
+        fresh: Dict[str, Any] = {}
+        specs: List[CommandSpec] = []
+
+        for module, path in self._module_files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            key = str(path)
+            entry = cached.get(key)
+            if not entry or entry.get('mtime_ns') != stat.st_mtime_ns or entry.get('size') != stat.st_size \
+                    or entry.get('module') != module:
+                try:
+                    commands = parse_command_metadata(path.read_text(encoding='utf-8'))
+                except (OSError, SyntaxError, UnicodeDecodeError) as e:
+                    logging.error('Could not index command module %s: %s', path, e)
+                    continue
+                entry = {'module': module, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'commands': commands}
+            fresh[key] = entry
+            for command in entry['commands']:
+                specs.append(CommandSpec(module, command['class'], command['name'], list(command['aliases']), key))
+
+        index: Dict[str, CommandSpec] = {}
+        for spec in specs:
+            for label in [spec.name, *spec.aliases]:
+                label = label.lower()
+                if label in index:
+                    logging.warning('Command name %r from %s.%s is already taken by %s.%s',
+                                    label, spec.module, spec.class_name,
+                                    index[label].module, index[label].class_name)
+                    continue
+                index[label] = spec
+
+        with self._lock:
+            self._specs = specs
+            self._index = index
+
+        if fresh != cached:
+            self._save_index_cache(fresh)
+
+    def _ensure_index(self) -> Dict[str, CommandSpec]:
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self.discover()
+                index = self._index
+        return index
+
+    # Lookup
+
+    def get_spec(self, name: str) -> Optional[CommandSpec]:
+        """Return the spec registered under a command name or alias"""
+        return self._ensure_index().get(name.lower())
+
+    def labels(self) -> List[str]:
+        """Every command name and alias"""
+        return list(self._ensure_index())
+
+    def specs(self) -> List[CommandSpec]:
+        """One spec per command"""
+        self._ensure_index()
+        return list(self._specs)
+
+    def load(self, spec: CommandSpec) -> type:
+        """Import the command's module (first use only) and return its class"""
+        cls = self._classes.get(spec.key)
+        if cls is not None:
+            return cls
+        with self._lock:
+            cls = self._classes.get(spec.key)
+            if cls is None:
+                module = importlib.import_module(spec.module)
+                cls = getattr(module, spec.class_name)
+                self._classes[spec.key] = cls
+                if spec.module not in self._sources:
+                    self._record_source(spec.module, getattr(module, '__file__', None))
+        return cls
+
+    def current_class(self, key: Tuple[str, str]) -> Optional[type]:
+        """The class currently loaded for a (module, class name) key"""
+        return self._classes.get(key)
+
+    def loaded_modules(self) -> List[str]:
+        """Modules imported so far (for diagnostics)"""
+        return sorted({module for module, _ in self._classes})
+
+    # Hot reload
+
+    def _record_source(self, module: str, path: Optional[str]) -> None:
+        if not path:
+            return
+        try:
+            stat = Path(path).stat()
+        except OSError:
+            return
+        self._sources[module] = (path, stat.st_mtime_ns, stat.st_size)
+
+    def changed_modules(self) -> List[str]:
+        """Imported command modules whose source changed since they were imported"""
+        changed = []
+        for module, (path, mtime_ns, size) in list(self._sources.items()):
+            try:
+                stat = Path(path).stat()
+            except OSError:
+                continue  # deleted; keep running the version we have
+            if stat.st_mtime_ns != mtime_ns or stat.st_size != size:
+                changed.append(module)
+        return sorted(changed)
+
+    @staticmethod
+    def _import_fresh(name: str, path: str) -> ModuleType:
+        """Execute a module's current source as a new module object
+
+        Compiles the source directly: bytecode caches go by whole-second
+        mtimes and could hand back the old code after a quick edit.
+        """
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        source = Path(path).read_bytes()
+        # Registered while it runs, as a normal import does; dataclasses and
+        # pickling look classes up through sys.modules
+        sys.modules[name] = module
+        exec(compile(source, path, 'exec'), module.__dict__)
+        return module
+
+    def reload(self, modules: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Re-import changed command modules and swap them in atomically
+
+        Args:
+            modules: Modules to reload; by default every imported module whose source changed
+
+        Returns:
+            dict: {'reloaded': [modules], 'failed': {module: error}, 'generation': n}.
+            If anything failed, nothing was swapped.
+        """
+        with self._lock:
+            targets = self.changed_modules() if modules is None else [m for m in modules if m in self._sources]
+            loaded_classes = {module: [cls for mod, cls in self._classes if mod == module] for module in targets}
+            previous = {module: sys.modules.get(module) for module in targets}
+            fresh: Dict[str, ModuleType] = {}
+            failed: Dict[str, str] = {}
+
+            for module in targets:
+                path = self._sources[module][0]
+                try:
+                    new_module = self._import_fresh(module, path)
+                    missing = [cls for cls in loaded_classes[module] if not isinstance(getattr(new_module, cls, None), type)]
+                    if missing:
+                        raise ImportError(f"no longer defines {', '.join(missing)}")
+                except Exception as e:
+                    failed[module] = f'{type(e).__name__}: {e}'
+                    continue
+                fresh[module] = new_module
+
+            if failed:
+                # Roll back: the old modules stay registered and in use
+                for module, old_module in previous.items():
+                    if old_module is not None:
+                        sys.modules[module] = old_module
+                    else:
+                        sys.modules.pop(module, None)
+                for module, error in failed.items():
+                    logging.error('Reload of %s failed, keeping the running version: %s', module, error)
+                return {'reloaded': [], 'failed': failed, 'generation': self.generation}
+
+            # Names and aliases may have changed, and new command files may exist
+            self.discover()
+            for module, new_module in fresh.items():
+                parent, _, child = module.rpartition('.')
+                if parent in sys.modules:
+                    setattr(sys.modules[parent], child, new_module)
+                for class_name in loaded_classes[module]:
+                    self._classes[(module, class_name)] = getattr(new_module, class_name)
+                self._record_source(module, self._sources[module][0])
+            if fresh:
+                self.generation += 1
+                logging.info('Reloaded command modules: %s', ', '.join(fresh))
+            return {'reloaded': list(fresh), 'failed': {}, 'generation': self.generation}
+
+
+class CommandTable(Mapping):
+    """Per-bot view of the registry that instantiates commands on first use
+
+    Behaves like the old {name/alias: Command} dict, so handle_command keeps
+    calling self.commands.get(name).
+    """
+
+    def __init__(self, bot: Any, registry: Optional[CommandRegistry] = None):
+        self.bot = bot
+        self.registry = registry or default_registry
+        self._instances: Dict[Tuple[str, str], Any] = {}
+        self._generation = self.registry.generation
+        self.on_load: Optional[Callable[[Any], None]] = None  # called with each new instance
+
+    def _drop_stale(self) -> None:
+        """Forget instances of classes a reload replaced; they are rebuilt on next use"""
+        self._generation = self.registry.generation
+        current = self.registry.current_class
+        self._instances = {key: command for key, command in self._instances.items()
+                           if current(key) is type(command)}
+
+    def __getitem__(self, name: str):
+        if self._generation != self.registry.generation:
+            self._drop_stale()
+        spec = self.registry.get_spec(name)
+        if spec is None:
+            raise KeyError(name)
+        command = self._instances.get(spec.key)
+        if command is None:
+            command = self.registry.load(spec)(self.bot)
+            if self.on_load is not None:
+                self.on_load(command)
+            self._instances[spec.key] = command
+        return command
+
+    def get(self, name: str, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+        except Exception as e:
+            logging.error('Failed to load command %s: %s', name, e)
+            return default
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self.registry.get_spec(name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.registry.labels())
+
+    def __len__(self) -> int:
+        return len(self.registry.labels())
+
+    def loaded(self) -> Dict[str, Any]:
+        """Commands this bot has instantiated so far, by primary name"""
+        if self._generation != self.registry.generation:
+            self._drop_stale()
+        return {command.name: command for command in self._instances.values()}
+
+
+default_registry = CommandRegistry(index_path=INDEX_PATH)
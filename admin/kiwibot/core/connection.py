@@ -0,0 +1,144 @@
+"""Protocol-based connection layer for the Furcadia server
+
+FurcadiaConnection is an asyncio.Protocol that frames lines straight out of
+the receive buffer. Each data_received call splits every complete line in
+one go and hands the reader a whole batch, so a burst of traffic costs one
+wake-up instead of one await per line. Lines stay as raw bytes; the bot
+decides from the first bytes whether a line is worth decoding at all.
+"""
+import asyncio
+from typing import List, Optional
+
+
+class FurcadiaConnection(asyncio.Protocol):
+    """Line-framing protocol with batched reads and write flow control"""
+
+    def __init__(self):
+        self.transport: Optional[asyncio.Transport] = None
+        self._buffer = bytearray()
+        self._lines: List[bytes] = []
+        self._waiter: Optional[asyncio.Future] = None
+        self._drain_waiter: Optional[asyncio.Future] = None
+        self._paused = False
+        self._closed = False
+        self._exception: Optional[Exception] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    # asyncio.Protocol callbacks
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+
+    def data_received(self, data: bytes) -> None:
+        self.bytes_in += len(data)
+        buffer = self._buffer
+        buffer += data
+        end = buffer.rfind(b'\n')
+        if end < 0:
+            return
+
+        # Split every complete line at once and keep the partial tail buffered
+        self._lines.extend(bytes(buffer[:end]).split(b'\n'))
+        del buffer[:end + 1]
+        self._wake()
+
+    def eof_received(self) -> bool:
+        self._closed = True
+        self._wake()
+        return False
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self._closed = True
+        self._exception = exc
+        self._wake()
+
+        waiter = self._drain_waiter
+        if waiter is not None and not waiter.done():
+            if exc is None:
+                waiter.set_result(None)
+            else:
+                waiter.set_exception(exc)
+
+    def pause_writing(self) -> None:
+        self._paused = True
+
+    def resume_writing(self) -> None:
+        self._paused = False
+        waiter = self._drain_waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def _wake(self) -> None:
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    # Public API
+
+    @property
+    def closed(self) -> bool:
+        """True once the server closed the connection or it was lost"""
+        return self._closed
+
+    async def read_lines(self) -> List[bytes]:
+        """Wait for and return every complete line received so far
+
+        Lines are raw bytes without the trailing newline. An empty list means
+        the connection is closed and no more lines will arrive.
+        """
+        while not self._lines:
+            if self._closed:
+                if self._exception is not None:
+                    raise self._exception
+                return []
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+        lines, self._lines = self._lines, []
+        return lines
+
+    def write(self, data: bytes) -> None:
+        """Queue raw bytes on the transport"""
+        if self._closed or self.transport is None:
+            raise ConnectionError('Connection is closed')
+        self.bytes_out += len(data)
+        self.transport.write(data)
+
+    async def drain(self) -> None:
+        """Wait until the transport's write buffer is below its high-water mark"""
+        if self._closed:
+            if self._exception is not None:
+                raise self._exception
+            return
+        if not self._paused:
+            return
+        self._drain_waiter = asyncio.get_running_loop().create_future()
+        try:
+            await self._drain_waiter
+        finally:
+            self._drain_waiter = None
+
+    def close(self) -> None:
+        """Close the underlying transport"""
+        if self.transport is not None:
+            self.transport.close()
+        self._closed = True
+        self._wake()
+
+
+async def open_connection(host: str, port: int, timeout: float = 10.0) -> FurcadiaConnection:
+    """Connect to host:port and return the framing protocol
+
+    Raises:
+        asyncio.TimeoutError: If the connection is not established within timeout seconds
+    """
+    loop = asyncio.get_running_loop()
+    _, protocol = await asyncio.wait_for(
+        loop.create_connection(FurcadiaConnection, host, port),
+        timeout=timeout
+    )
+    return protocol
@@ -0,0 +1,204 @@
+"""Local control socket for running bots
+
+Each bot listens on a Unix domain socket at data/control/<profile>.sock.
+The protocol is JSON lines: one request object per line, answered by one
+response object per line on the same connection.
+
+    {"cmd": "say", "text": "hello"}   -> {"ok": true, "queued": true}
+    {"cmd": "send", "text": "sit"}    -> {"ok": true, "queued": true}
+    {"cmd": "reload-config"}          -> {"ok": true, "changed": ["desc"], "relogin_required": []}
+    {"cmd": "reload-commands"}        -> {"ok": true, "reloaded": ["kiwibot.commands.say"], ...}
+    {"cmd": "status"}                 -> {"ok": true, "status": {...}}
+    {"cmd": "quit"}                   -> {"ok": true}
+
+Errors come back as {"ok": false, "error": "..."}. Only the user who runs
+the bot can open its socket. Platforms without AF_UNIX simply run without
+control sockets, and request() reports the bot as unreachable.
+
+request() is the blocking client used by the admin app and
+scripts/account_manager.py.
+"""
+import asyncio
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+CONTROL_DIR = Path(__file__).resolve().parents[3] / 'data' / 'control'
+MAX_REQUEST = 64 * 1024
+CLIENT_TIMEOUT = 5.0
+
+
+def available() -> bool:
+    """True if this platform supports Unix domain sockets"""
+    return hasattr(socket, 'AF_UNIX')
+
+
+def socket_path(name: str, directory: Path = CONTROL_DIR) -> Path:
+    """Control socket for a profile name"""
+    safe = ''.join(ch if ch.isalnum() or ch in '-_.' else '_' for ch in name)
+    return directory / f'{safe}.sock'
+
+
+class ControlServer:
+    """Serves one bot's control socket"""
+
+    def __init__(self, bot: Any, directory: Path = CONTROL_DIR):
+        self.bot = bot
+        self.path = socket_path(bot.account['name'] if bot.account else 'default', directory)
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers = {
+            'send': self._send,
+            'say': self._say,
+            'reload-config': self._reload_config,
+            'reload-commands': self._reload_commands,
+            'status': self._status,
+            'quit': self._quit,
+        }
+
+    async def start(self) -> bool:
+        """Start listening; False if the platform or another process prevents it"""
+        if not available():
+            self.bot.log.info('Control sockets are not supported on this platform')
+            return False
+        # Other users can't reach anything inside an owner-only directory, so
+        # the socket is never exposed, even before its own chmod. (Changing
+        # the umask instead would affect every file the process creates
+        # meanwhile, such as log rotations and SQLite's WAL files.)
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        os.chmod(self.path.parent, 0o700)
+        if self.path.exists():
+            if await self._in_use():
+                self.bot.log.warning('Control socket %s is in use by another process', self.path)
+                return False
+            self.path.unlink()  # left behind by a bot that didn't exit cleanly
+        self._server = await asyncio.start_unix_server(self._serve, path=str(self.path), limit=MAX_REQUEST)
+        os.chmod(self.path, 0o600)
+        self.bot.log.info('Control socket listening on %s', self.path)
+        return True
+
+    async def _in_use(self) -> bool:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_unix_connection(str(self.path)), 1.0)
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        return True
+
+    async def close(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await self._respond(writer, {'ok': False, 'error': 'request too long'})
+                    break
+                if not line:
+                    break
+                await self._respond(writer, await self.handle(line))
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, response: Dict[str, Any]) -> None:
+        writer.write(json.dumps(response, default=str).encode('utf-8') + b'\n')
+        await writer.drain()
+
+    async def handle(self, line: bytes) -> Dict[str, Any]:
+        """Run one JSON request line and return the response object"""
+        self.requests += 1
+        try:
+            request = json.loads(line)
+            command = request['cmd']
+            if not isinstance(command, str):
+                raise TypeError('cmd must be a string')
+        except (ValueError, KeyError, TypeError):
+            return {'ok': False, 'error': 'expected a JSON object with a string "cmd" field'}
+        handler = self._handlers.get(command)
+        if handler is None:
+            return {'ok': False, 'error': f'unknown command {command!r}, expected one of {sorted(self._handlers)}'}
+        try:
+            response = await handler(request)
+        except Exception as e:
+            self.bot.log.error('Control command %s failed: %s', command, e)
+            return {'ok': False, 'error': str(e)}
+        self.bot.log.info('Control command %s', command)
+        return dict(response, ok=True)
+
+    @staticmethod
+    def _text(request: Dict[str, Any]) -> str:
+        text = request.get('text')
+        if not isinstance(text, str) or not text or '\n' in text or '\r' in text:
+            raise ValueError('"text" must be a single non-empty line')
+        return text
+
+    async def _send(self, request):
+        return {'queued': await self.bot.send_message(self._text(request))}
+
+    async def _say(self, request):
+        return {'queued': await self.bot.send_message(f'"{self._text(request)}')}
+
+    async def _reload_config(self, request):
+        return await self.bot.reload_config()
+
+    async def _reload_commands(self, request):
+        result = self.bot.reload_commands()
+        if result['failed']:
+            raise RuntimeError('; '.join(f'{module}: {error}' for module, error in result['failed'].items()))
+        return result
+
+    async def _status(self, request):
+        return {'status': self.bot.status()}
+
+    async def _quit(self, request):
+        # Answer first; the session closes once the read loop notices
+        asyncio.get_running_loop().call_soon(setattr, self.bot, 'running', False)
+        return {}
+
+
+def request(name: str, payload: Dict[str, Any], timeout: float = CLIENT_TIMEOUT,
+            directory: Path = CONTROL_DIR) -> Optional[Dict[str, Any]]:
+    """Send one request to a running bot and wait for its response
+
+    Returns:
+        dict: The bot's response, or None if no bot with that profile name
+        is running (or the platform has no Unix sockets)
+    """
+    if not available():
+        return None
+    path = socket_path(name, directory)
+    if not path.exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+            data = b''
+            while not data.endswith(b'\n'):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+    except (ConnectionRefusedError, FileNotFoundError):
+        return None  # stale socket file, the bot isn't running
+    except OSError as e:
+        return {'ok': False, 'error': f'control socket error: {e}'}
+    try:
+        return json.loads(data)
+    except ValueError:
+        return {'ok': False, 'error': 'bot closed the connection without answering'}
@@ -0,0 +1,141 @@
+"""Shared cooldown and rate-limit engine for commands
+
+Every cooldown is a token bucket on the monotonic clock. A command with a
+cooldown of C seconds and a burst of B lets one user run it B times back to
+back and then once every C seconds; an optional global bucket caps how often
+the command runs for everyone together.
+
+Buckets live in one OrderedDict kept in least-recently-used order, so the
+engine holds one small object per active key. Idle buckets are evicted from
+the front once they have refilled completely (forgetting them changes
+nothing) and after `idle_ttl` seconds, and the oldest keys go first when
+`max_keys` is exceeded. Each check touches at most the keys it needs plus a
+few expired ones at the front; nothing scans per-command state.
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+from ..utils.ratelimit import TokenBucket
+
+DEFAULT_MAX_KEYS = 50000
+DEFAULT_IDLE_TTL = 600.0  # seconds
+GLOBAL_KEY = '*'
+
+
+class CooldownEngine:
+    """Keyed token buckets with burst allowances and LRU/TTL eviction"""
+
+    def __init__(self, max_keys: int = DEFAULT_MAX_KEYS, idle_ttl: float = DEFAULT_IDLE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.idle_ttl = idle_ttl
+        self.clock = clock
+        self._buckets: 'OrderedDict[Tuple[str, Hashable], TokenBucket]' = OrderedDict()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _bucket(self, key: Tuple[str, Hashable], cooldown: float, burst: int, now: float,
+                create: bool = True) -> Optional[TokenBucket]:
+        """Return the bucket for `key`, marking it most recently used"""
+        buckets = self._buckets
+        bucket = buckets.get(key)
+        rate = 1.0 / cooldown
+        if bucket is None:
+            if not create:
+                return None
+            bucket = buckets[key] = TokenBucket(rate, burst, now)
+        else:
+            buckets.move_to_end(key)
+            if bucket.rate != rate or bucket.capacity != burst:
+                # The command's limits changed (e.g. after a reload)
+                bucket.available(now)
+                bucket.rate = rate
+                bucket.capacity = burst
+                bucket.tokens = min(bucket.tokens, burst)
+        return bucket
+
+    def _evict(self, now: float) -> None:
+        """Drop idle buckets from the LRU end, then enforce max_keys"""
+        buckets = self._buckets
+        while buckets:
+            key, bucket = next(iter(buckets.items()))
+            idle = now - bucket.stamp
+            # A full bucket carries no state; past the TTL it goes regardless
+            full = bucket.tokens + idle * bucket.rate >= bucket.capacity
+            if not (full or idle >= self.idle_ttl):
+                break
+            del buckets[key]
+            self.evicted += 1
+        while len(buckets) > self.max_keys:
+            buckets.popitem(last=False)
+            self.evicted += 1
+
+    def check(self, command: str, user: Hashable, cooldown: float, burst: int = 1,
+              global_cooldown: float = 0.0, global_burst: int = 1) -> float:
+        """Take one use of `command` for `user` if both buckets allow it
+
+        Args:
+            command: Command name
+            user: Whoever is issuing the command
+            cooldown: Seconds for one use to refill for this user (0 disables)
+            burst: Uses this user may make back to back
+            global_cooldown: Seconds for one use to refill across all users (0 disables)
+            global_burst: Uses everyone together may make back to back
+
+        Returns:
+            float: 0.0 if the use was allowed, otherwise seconds until it would be
+        """
+        if cooldown <= 0 and global_cooldown <= 0:
+            return 0.0
+        now = self.clock()
+        user_bucket = self._bucket((command, user), cooldown, burst, now) if cooldown > 0 else None
+        global_bucket = self._bucket((command, GLOBAL_KEY), global_cooldown, global_burst, now) \
+            if global_cooldown > 0 else None
+
+        wait = 0.0
+        if user_bucket is not None:
+            wait = user_bucket.delay(1, now)
+        if global_bucket is not None:
+            wait = max(wait, global_bucket.delay(1, now))
+
+        if wait <= 0:
+            # Take from both only once both have a token
+            if user_bucket is not None:
+                user_bucket.tokens -= 1
+            if global_bucket is not None:
+                global_bucket.tokens -= 1
+
+        self._evict(now)
+        return wait
+
+    def remaining(self, command: str, user: Hashable, cooldown: float, burst: int = 1,
+                  global_cooldown: float = 0.0, global_burst: int = 1) -> float:
+        """Return the seconds until `user` may run `command`, without using it"""
+        now = self.clock()
+        wait = 0.0
+        if cooldown > 0:
+            bucket = self._bucket((command, user), cooldown, burst, now, create=False)
+            if bucket is not None:
+                wait = bucket.delay(1, now)
+        if global_cooldown > 0:
+            bucket = self._bucket((command, GLOBAL_KEY), global_cooldown, global_burst, now, create=False)
+            if bucket is not None:
+                wait = max(wait, bucket.delay(1, now))
+        return wait
+
+    def reset(self, command: Optional[str] = None, user: Optional[Hashable] = None) -> None:
+        """Forget one key, every key for a command, or everything"""
+        if command is None:
+            self._buckets.clear()
+        elif user is not None:
+            self._buckets.pop((command, user), None)
+        else:
+            for key in [key for key in self._buckets if key[0] == command]:
+                del self._buckets[key]
+
+
+# Shared by every command in the process
+cooldowns = CooldownEngine()
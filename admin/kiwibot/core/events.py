@@ -0,0 +1,194 @@
+"""Typed event bus for reacting to what happens around the bot
+
+Plugins subscribe to an event class instead of patching the receive loop:
+
+    def greet(event: Arrival):
+        ...
+    bot.events.subscribe(Arrival, greet)
+
+Subscriptions are compiled into a table from event class to a tuple of
+handlers, so emit() is one dict lookup plus the calls, and wants() lets the
+bot skip decoding and regex-parsing lines that nobody listens for. Plain
+functions run inline; coroutine functions are started as tasks, so a slow
+plugin never holds up the read loop. A handler that raises is logged and
+counted without affecting the others.
+
+Plugins installed as packages are found through the 'kiwibot.plugins'
+entry point group; each entry point is a setup(bot) function.
+"""
+import asyncio
+import importlib.metadata
+import logging
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple, Type
+
+PLUGIN_GROUP = 'kiwibot.plugins'
+
+
+class Whisper(NamedTuple):
+    """Someone whispered to the bot"""
+    bot: Any
+    name: str
+    text: str
+
+
+class Chat(NamedTuple):
+    """Someone said something in the dream"""
+    bot: Any
+    name: str
+    text: str
+
+
+class Emote(NamedTuple):
+    """Someone emoted in the dream"""
+    bot: Any
+    name: str
+    text: str
+
+
+class Arrival(NamedTuple):
+    """A character appeared in the dream"""
+    bot: Any
+    character: Any
+
+
+class Departure(NamedTuple):
+    """A character left the dream"""
+    bot: Any
+    character: Any
+
+
+class LoginComplete(NamedTuple):
+    """The server accepted our login (after every reconnect too)"""
+    bot: Any
+
+
+class Disconnect(NamedTuple):
+    """The connection closed or failed"""
+    bot: Any
+    reason: str
+
+
+EVENT_TYPES = (Whisper, Chat, Emote, Arrival, Departure, LoginComplete, Disconnect)
+
+Handler = Callable[[Any], Any]
+
+
+class EventBus:
+    """Per-bot publish/subscribe with a precomputed dispatch table
+
+    Counters:
+        emitted: Events delivered to at least one handler
+        errors: Handler calls that raised
+    """
+
+    def __init__(self, log: Optional[logging.Logger] = None):
+        self.log = log or logging.getLogger(__name__)
+        self._subscribers: Dict[Type, List[Handler]] = {}
+        # event class -> (sync handlers, async handlers); only classes with subscribers
+        self._table: Dict[Type, Tuple[Tuple[Handler, ...], Tuple[Handler, ...]]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._listeners: List[Callable[[], None]] = []
+
+        self.emitted = 0
+        self.errors = 0
+
+    def subscribe(self, event_type: Type, handler: Handler) -> Handler:
+        """Call `handler(event)` for every event of this class; returns the handler"""
+        self._subscribers.setdefault(event_type, []).append(handler)
+        self._rebuild()
+        return handler
+
+    def on(self, event_type: Type) -> Callable[[Handler], Handler]:
+        """Decorator form of subscribe()"""
+        return lambda handler: self.subscribe(event_type, handler)
+
+    def unsubscribe(self, event_type: Type, handler: Handler) -> bool:
+        handlers = self._subscribers.get(event_type)
+        if not handlers or handler not in handlers:
+            return False
+        handlers.remove(handler)
+        self._rebuild()
+        return True
+
+    def on_change(self, listener: Callable[[], None]) -> None:
+        """Call `listener()` whenever the set of subscribed event classes may have changed"""
+        self._listeners.append(listener)
+
+    def _rebuild(self) -> None:
+        table = {}
+        for event_type, handlers in self._subscribers.items():
+            if handlers:
+                table[event_type] = (
+                    tuple(h for h in handlers if not asyncio.iscoroutinefunction(h)),
+                    tuple(h for h in handlers if asyncio.iscoroutinefunction(h)),
+                )
+        self._table = table
+        for listener in self._listeners:
+            listener()
+
+    def wants(self, event_type: Type) -> bool:
+        """True if anything subscribes to this event class"""
+        return event_type in self._table
+
+    def emit(self, event) -> int:
+        """Deliver an event; returns the number of handlers it went to"""
+        entry = self._table.get(type(event))
+        if entry is None:
+            return 0
+        sync_handlers, async_handlers = entry
+        self.emitted += 1
+        for handler in sync_handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                self.errors += 1
+                self.log.exception('Event handler %s failed on %s: %s',
+                                   getattr(handler, '__qualname__', handler), type(event).__name__, e)
+        for handler in async_handlers:
+            task = asyncio.get_running_loop().create_task(handler(event))
+            self._tasks.add(task)
+            task.add_done_callback(self._task_done)
+        return len(sync_handlers) + len(async_handlers)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        e = task.exception()
+        if e is not None:
+            self.errors += 1
+            self.log.error('Async event handler failed: %s', e, exc_info=e)
+
+    @property
+    def pending(self) -> int:
+        """Async handlers still running"""
+        return len(self._tasks)
+
+    async def close(self) -> None:
+        """Cancel async handlers that are still running"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'subscribed': sum(len(sync) + len(asynchronous) for sync, asynchronous in self._table.values()),
+            'emitted': self.emitted,
+            'errors': self.errors,
+            'pending': self.pending,
+        }
+
+
+def load_plugins(bot: Any, group: str = PLUGIN_GROUP) -> List[str]:
+    """Call setup(bot) for every installed plugin; returns the names that loaded"""
+    loaded = []
+    for entry_point in importlib.metadata.entry_points(group=group):
+        try:
+            setup = entry_point.load()
+            setup(bot)
+        except Exception as e:
+            bot.log.error('Plugin %s failed to load: %s', entry_point.name, e)
+            continue
+        loaded.append(entry_point.name)
+    return loaded
@@ -0,0 +1,177 @@
+"""Non-blocking logging for the bot process
+
+setup_logging() puts a QueueHandler on the root logger and moves record
+formatting and file writes to a QueueListener thread, so a log call on the
+event loop costs a queue put instead of a disk write. Files rotate by size
+(or on a time schedule), and every bot logs through its own child logger,
+optionally into its own file, so fleet logs stay attributable.
+
+Console echo of sent/received messages goes through ConsoleEcho, which can
+print everything, every Nth message, a periodic per-kind summary, or nothing.
+"""
+import logging
+import queue
+import time
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from pathlib import Path
+from typing import Dict, Optional
+
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+DATE_FORMAT = '%m-%d-%Y %H:%M:%S%z'
+BOT_LOGGER = 'kiwibot'
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+ECHO_MODES = ('all', 'sample', 'summary', 'off')
+
+_listener: Optional[QueueListener] = None
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # Tracebacks reference live frames, render them before handing off
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _BotFileRouter(logging.Handler):
+    """Listener-side handler that sends each bot's records to its own file"""
+
+    def __init__(self, log_dir: Path, make_handler):
+        super().__init__()
+        self.log_dir = log_dir
+        self.make_handler = make_handler
+        self.handlers: Dict[str, logging.Handler] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not record.name.startswith(BOT_LOGGER + '.'):
+            return
+        bot = record.name[len(BOT_LOGGER) + 1:]
+        handler = self.handlers.get(bot)
+        if handler is None:
+            handler = self.handlers[bot] = self.make_handler(self.log_dir / f'kiwibot-{bot}.log')
+        handler.handle(record)
+
+    def close(self) -> None:
+        for handler in self.handlers.values():
+            handler.close()
+        super().close()
+
+
+def setup_logging(log_dir: str = 'logs', level: int = logging.DEBUG,
+                  max_bytes: int = DEFAULT_MAX_BYTES, backup_count: int = DEFAULT_BACKUP_COUNT,
+                  rotate_when: Optional[str] = None, per_bot_files: bool = False,
+                  echo: str = 'all', echo_sample: int = 10, echo_interval: float = 10.0) -> None:
+    """Install the queue-based logging pipeline
+
+    Only the first call in a process takes effect; later calls (such as the
+    one every KiwiBot makes) keep the existing configuration.
+
+    Args:
+        log_dir: Directory for log files
+        level: Root log level
+        max_bytes: Rotate kiwibot.log after this size (ignored when rotate_when is set)
+        backup_count: Rotated files to keep
+        rotate_when: TimedRotatingFileHandler schedule such as 'midnight' or 'H'
+        per_bot_files: Also write each bot's records to logs/kiwibot-<name>.log
+        echo: Console echo mode, one of ECHO_MODES
+        echo_sample: Print one in this many messages in 'sample' mode
+        echo_interval: Seconds between summaries in 'summary' mode
+    """
+    global _listener
+    if _listener is not None:
+        return
+    console.configure(echo, echo_sample, echo_interval)
+
+    directory = Path(log_dir)
+    directory.mkdir(exist_ok=True)
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
+
+    def make_handler(path: Path) -> logging.Handler:
+        if rotate_when:
+            handler = TimedRotatingFileHandler(path, when=rotate_when, backupCount=backup_count, encoding='utf-8')
+        else:
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        handler.setFormatter(formatter)
+        return handler
+
+    handlers = [make_handler(directory / 'kiwibot.log')]
+    if per_bot_files:
+        handlers.append(_BotFileRouter(directory, make_handler))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records, stop the listener thread and print any pending summary"""
+    global _listener
+    console.flush()
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+def get_bot_logger(name: str) -> logging.Logger:
+    """Return the logger for one bot (kiwibot.<name>)"""
+    return logging.getLogger(f'{BOT_LOGGER}.{name}')
+
+
+class ConsoleEcho:
+    """Console output for per-message echo lines such as [SEND] and [RECV]"""
+
+    def __init__(self):
+        self.mode = 'all'
+        self.sample = 10
+        self.interval = 10.0
+        self._seen = 0
+        self._counts: Counter = Counter()
+        self._last_summary = time.monotonic()
+
+    def configure(self, mode: str = 'all', sample: int = 10, interval: float = 10.0) -> None:
+        if mode not in ECHO_MODES:
+            raise ValueError(f'Unknown echo mode: {mode}')
+        self.mode = mode
+        self.sample = max(1, sample)
+        self.interval = interval
+
+    def __call__(self, kind: str, text: str) -> None:
+        """Echo one message of the given kind (SEND, RECV, DEBUG, ...)"""
+        mode = self.mode
+        if mode == 'all':
+            print(f'[{kind}] {text}')
+        elif mode == 'sample':
+            self._seen += 1
+            if self._seen % self.sample == 0:
+                print(f'[{kind}] {text}')
+        elif mode == 'summary':
+            self._counts[kind] += 1
+            if time.monotonic() - self._last_summary >= self.interval:
+                self.flush()
+
+    def flush(self) -> None:
+        """Print and reset the per-kind counts collected in 'summary' mode"""
+        now = time.monotonic()
+        if self._counts:
+            elapsed = now - self._last_summary
+            counts = ', '.join(f'{kind} {count}' for kind, count in sorted(self._counts.items()))
+            print(f'[ECHO] last {elapsed:.0f}s: {counts}')
+            self._counts.clear()
+        self._last_summary = now
+
+
+console = ConsoleEcho()
@@ -0,0 +1,228 @@
+"""Dream map loader with shared, memory-mapped storage
+
+Furcadia .map files are a text header ("key=value" lines, width and height
+among them) ended by a BODY line, followed by binary layers stored column by
+column (index x * height + y): floors as little-endian uint16, then objects
+as uint16, then walls.
+
+load_map() maps the file read-only and exposes the floor and object layers
+as memoryviews over the mapping, so nothing is copied into Python objects.
+Maps are cached by the SHA-1 of their contents in a WeakValueDictionary:
+every bot in the same dream shares one DreamMap, and a map is released once
+no bot is standing in it. The walkability grid is derived once per map (and
+blocking rules) with bytes-level operations - slicing, translate() and
+big-integer AND - rather than a Python loop over tiles.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import sys
+import weakref
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .pathfinding import WalkGrid
+
+BODY_MARKER = b'BODY\n'
+MAX_HEADER = 64 * 1024
+
+_maps: 'weakref.WeakValueDictionary[str, DreamMap]' = weakref.WeakValueDictionary()
+# path -> (mtime_ns, size, digest); one entry per file, replaced when it changes
+_digests: Dict[str, Tuple[int, int, str]] = {}
+
+
+class MapFormatError(ValueError):
+    """Raised when a map file can't be parsed"""
+
+
+def _lookup_table(blocked: FrozenSet[int]) -> bytes:
+    """translate() table giving 1 for walkable byte values, 0 for blocked ones"""
+    return bytes(0 if value in blocked else 1 for value in range(256))
+
+
+class DreamMap:
+    """Read-only floor and object layers of one dream"""
+    __slots__ = ('path', 'digest', 'width', 'height', 'header', 'floors', 'objects',
+                 '_mmap', '_floor_bytes', '_object_bytes', '_grids', '__weakref__')
+
+    def __init__(self, path: Path, digest: str, header: Dict[str, str], mapped: mmap.mmap, body: int):
+        try:
+            self.width = int(header['width'])
+            self.height = int(header['height'])
+        except (KeyError, ValueError):
+            raise MapFormatError(f'{path}: header has no valid width/height')
+        layer = self.width * self.height * 2
+        if len(mapped) < body + 2 * layer:
+            raise MapFormatError(f'{path}: body is shorter than {self.width}x{self.height} floors and objects')
+
+        self.path = path
+        self.digest = digest
+        self.header = header
+        self._mmap = mapped
+        view = memoryview(mapped)
+        self._floor_bytes = view[body:body + layer]
+        self._object_bytes = view[body + layer:body + 2 * layer]
+        # Layers are little-endian on disk; cast() uses native order
+        self.floors = self._floor_bytes.cast('H') if sys.byteorder == 'little' else None
+        self.objects = self._object_bytes.cast('H') if sys.byteorder == 'little' else None
+        self._grids: Dict[Tuple[FrozenSet[int], FrozenSet[int]], WalkGrid] = {}
+
+    @property
+    def name(self) -> str:
+        return self.header.get('name', self.path.stem)
+
+    def floor(self, x: int, y: int) -> int:
+        i = (x * self.height + y) * 2
+        return self._floor_bytes[i] | self._floor_bytes[i + 1] << 8
+
+    def object(self, x: int, y: int) -> int:
+        i = (x * self.height + y) * 2
+        return self._object_bytes[i] | self._object_bytes[i + 1] << 8
+
+    def _layer_walkable(self, layer: memoryview, blocked: FrozenSet[int]) -> int:
+        """Walkability of one uint16 layer as a big integer, one byte per tile (column order)"""
+        raw = layer.tobytes()
+        low = raw[0::2]
+        high = raw[1::2]
+        tiles = len(low)
+        walkable = int.from_bytes(low.translate(_lookup_table(frozenset(v for v in blocked if v < 256))), 'little')
+        if high.count(0) != tiles:
+            # Ids of 256 and up: the low-byte table doesn't apply, so patch those tiles one by one
+            patched = bytearray(walkable.to_bytes(tiles, 'little'))
+            for i, hi in enumerate(high):
+                if hi:
+                    value = hi << 8 | low[i]
+                    patched[i] = 0 if value in blocked else 1
+            walkable = int.from_bytes(patched, 'little')
+        return walkable
+
+    def walk_grid(self, blocking_floors: Iterable[int] = (), blocking_objects: Iterable[int] = ()) -> WalkGrid:
+        """Return the shared walkability grid for these blocking rules
+
+        The grid is row-major (y * width + x) like every WalkGrid, and
+        read-only: all bots in the dream search the same immutable bytes.
+        """
+        key = (frozenset(blocking_floors), frozenset(blocking_objects))
+        grid = self._grids.get(key)
+        if grid is not None:
+            return grid
+
+        tiles = self.width * self.height
+        walkable = self._layer_walkable(self._floor_bytes, key[0]) & self._layer_walkable(self._object_bytes, key[1])
+        columns = walkable.to_bytes(tiles, 'little')
+        # Column-major to row-major: row y is every height-th byte starting at y
+        rows = b''.join(columns[y::self.height] for y in range(self.height))
+        grid = self._grids[key] = WalkGrid(self.width, self.height, rows)
+        return grid
+
+    def walkable(self, x: int, y: int, grid: Optional[WalkGrid] = None) -> bool:
+        return (grid or self.walk_grid()).walkable(x, y)
+
+    def walkable_many(self, points: Iterable[Tuple[int, int]], grid: Optional[WalkGrid] = None) -> List[bool]:
+        """Look up many tiles at once against the cached grid"""
+        grid = grid or self.walk_grid()
+        cells = grid.cells
+        width, height = grid.width, grid.height
+        return [0 <= x < width and 0 <= y < height and cells[y * width + x] == 1 for x, y in points]
+
+    def close(self) -> None:
+        """Unmap the file (only once no bot uses the map any more)"""
+        self._grids.clear()
+        if self.floors is not None:
+            self.floors.release()
+            self.objects.release()
+        self._floor_bytes.release()
+        self._object_bytes.release()
+        self._mmap.close()
+
+    def __repr__(self) -> str:
+        return f'DreamMap({self.name!r}, {self.width}x{self.height}, {self.digest[:12]})'
+
+
+def load_map(path) -> DreamMap:
+    """Load a .map file, sharing the copy already loaded for identical contents
+
+    Raises:
+        MapFormatError: If the file isn't a map this loader understands
+        OSError: If the file can't be read
+    """
+    path = Path(path)
+    stat = path.stat()
+    version = (stat.st_mtime_ns, stat.st_size)
+    known = _digests.get(str(path))
+    if known is not None and known[:2] == version:
+        dream_map = _maps.get(known[2])
+        if dream_map is not None:
+            return dream_map
+
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    digest = hashlib.sha1(mapped).hexdigest()
+    _digests[str(path)] = (*version, digest)
+    dream_map = _maps.get(digest)
+    if dream_map is not None:
+        # Same contents under another name
+        mapped.close()
+        return dream_map
+
+    body = mapped.find(BODY_MARKER, 0, MAX_HEADER)
+    if body < 0:
+        mapped.close()
+        raise MapFormatError(f'{path}: no BODY line in the header')
+
+    header = {}
+    for line in mapped[:body].decode('iso-8859-1').splitlines():
+        key, sep, value = line.partition('=')
+        if sep:
+            header[key.strip()] = value.strip()
+    try:
+        dream_map = DreamMap(path, digest, header, mapped, body + len(BODY_MARKER))
+    except MapFormatError:
+        mapped.close()
+        raise
+    _maps[digest] = dream_map
+    return dream_map
+
+
+def loaded_maps() -> List[DreamMap]:
+    """Maps currently held by at least one bot"""
+    return list(_maps.values())
+
+
+class MapLibrary:
+    """Finds the map for a dream in a local directory of .map files
+
+    Blocking rules come from an optional blocking.json in the same
+    directory: {"floors": [ids...], "objects": [ids...]}.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.blocking_floors: FrozenSet[int] = frozenset()
+        self.blocking_objects: FrozenSet[int] = frozenset()
+        rules = self.directory / 'blocking.json'
+        if rules.exists():
+            try:
+                with open(rules, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.blocking_floors = frozenset(int(v) for v in data.get('floors', []))
+                self.blocking_objects = frozenset(int(v) for v in data.get('objects', []))
+            except (OSError, ValueError) as e:
+                logging.error('Could not read %s: %s', rules, e)
+
+    def find(self, dream: str) -> Optional[DreamMap]:
+        """Load the map for a dream name, or None if there isn't one"""
+        if not dream:
+            return None
+        path = self.directory / f'{dream}.map'
+        if not path.exists():
+            return None
+        try:
+            return load_map(path)
+        except (OSError, ValueError) as e:
+            logging.error('Could not load map %s: %s', path, e)
+            return None
+
+    def grid(self, dream_map: DreamMap) -> WalkGrid:
+        return dream_map.walk_grid(self.blocking_floors, self.blocking_objects)
@@ -0,0 +1,265 @@
+"""Runtime metrics with a Prometheus text endpoint
+
+Counters, gauges and histograms are families keyed by label values.
+labels() returns a child object that the hot path keeps a reference to, so
+recording a sample is a single attribute update with no string formatting
+or lookups. Numbers that already live elsewhere (queue depths, byte counts,
+reconnects) are read by collectors at scrape time instead of being copied
+on every change.
+
+serve() answers GET /metrics on a local port in the Prometheus text
+exposition format (version 0.0.4), which is also what the admin app reads.
+"""
+import asyncio
+import bisect
+import math
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Seconds; spans a sub-millisecond parse up to a slow command
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_METRICS_PORT = 9108
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+Labels = Dict[str, str]
+Sample = Tuple[str, Labels, float]  # (metric name, labels, value)
+# A collector returns (name, type, help, [(labels, value), ...]) per metric
+Collected = Tuple[str, str, str, Iterable[Tuple[Labels, float]]]
+
+
+class CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class GaugeChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+
+class HistogramChild:
+    """Bucket counts are kept per bucket and only made cumulative when rendered"""
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricFamily:
+    """One metric name with a child per combination of label values"""
+
+    def __init__(self, name: str, kind: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values):
+        """Return the child for these label values, creating it on first use"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f'{self.name} expects labels {self.labelnames}, got {key}')
+            if self.kind == 'counter':
+                child = CounterChild()
+            elif self.kind == 'gauge':
+                child = GaugeChild()
+            else:
+                child = HistogramChild(self.buckets)
+            self._children[key] = child
+        return child
+
+    def remove(self, *values) -> None:
+        self._children.pop(tuple(str(value) for value in values), None)
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        for key, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, key))
+            if self.kind != 'histogram':
+                samples.append((self.name, labels, child.value))
+                continue
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), child.counts):
+                cumulative += count
+                samples.append((f'{self.name}_bucket', dict(labels, le=_format_value(bound)), cumulative))
+            samples.append((f'{self.name}_sum', labels, child.sum))
+            samples.append((f'{self.name}_count', labels, child.count))
+        return samples
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int) or (isinstance(value, float) and value.is_integer()):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_sample(name: str, labels: Labels, value: float) -> str:
+    if labels:
+        rendered = ','.join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+        return f'{name}{{{rendered}}} {_format_value(value)}'
+    return f'{name} {_format_value(value)}'
+
+
+def _process_metrics() -> Iterable[Collected]:
+    yield ('process_cpu_seconds_total', 'counter', 'CPU time used by the process',
+           [({}, time.process_time())])
+
+
+class Metrics:
+    """Registry of metric families and scrape-time collectors"""
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._collectors: List[Callable[[], Iterable[Collected]]] = [_process_metrics]
+
+    def _family(self, name: str, kind: str, help_text: str, labelnames: Sequence[str],
+                buckets: Sequence[float] = DEFAULT_BUCKETS) -> MetricFamily:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = MetricFamily(name, kind, help_text, labelnames, buckets)
+        elif family.kind != kind or family.labelnames != tuple(labelnames):
+            raise ValueError(f'{name} is already registered as a {family.kind} with labels {family.labelnames}')
+        return family
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        """Get or create a counter family"""
+        return self._family(name, 'counter', help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        """Get or create a gauge family"""
+        return self._family(name, 'gauge', help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> MetricFamily:
+        """Get or create a histogram family"""
+        return self._family(name, 'histogram', help_text, labelnames, buckets)
+
+    def add_collector(self, collector: Callable[[], Iterable[Collected]]) -> None:
+        """Register a function called at every scrape for values kept elsewhere"""
+        self._collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[[], Iterable[Collected]]) -> None:
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text format"""
+        # Collectors from several bots report the same names; group them so
+        # each metric gets one HELP/TYPE header
+        headers: Dict[str, Tuple[str, str]] = {}
+        lines: Dict[str, List[str]] = {}
+        for family in self._families.values():
+            headers[family.name] = (family.kind, family.help)
+            lines[family.name] = [_format_sample(*sample) for sample in family.samples()]
+        for collector in list(self._collectors):
+            for name, kind, help_text, samples in collector():
+                headers.setdefault(name, (kind, help_text))
+                lines.setdefault(name, []).extend(_format_sample(name, labels, value) for labels, value in samples)
+
+        output = []
+        for name, (kind, help_text) in headers.items():
+            output.append(f'# HELP {name} {help_text}')
+            output.append(f'# TYPE {name} {kind}')
+            output.extend(lines[name])
+        return '\n'.join(output) + '\n'
+
+
+_SAMPLE_PATTERN = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)')
+_LABEL_PATTERN = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_exposition(text: str) -> List[Sample]:
+    """Parse Prometheus text format back into (name, labels, value) samples"""
+    samples = []
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = _SAMPLE_PATTERN.match(line)
+        if not match:
+            continue
+        name, rendered, value = match.groups()
+        labels = {}
+        if rendered:
+            for key, val in _LABEL_PATTERN.findall(rendered):
+                labels[key] = val.replace(r'\n', '\n').replace(r'\"', '"').replace(r'\\', '\\')
+        try:
+            samples.append((name, labels, float(value)))
+        except ValueError:
+            continue
+    return samples
+
+
+async def serve(registry: 'Metrics', host: str = '127.0.0.1',
+                port: int = DEFAULT_METRICS_PORT) -> asyncio.AbstractServer:
+    """Serve GET /metrics from `registry` on host:port
+
+    Rendering runs on the event loop, but only when something scrapes.
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+            while True:
+                header = await asyncio.wait_for(reader.readline(), 5)
+                if header in (b'\r\n', b'\n', b''):
+                    break
+            parts = request.split()
+            if len(parts) >= 2 and parts[0] == b'GET' and parts[1].split(b'?')[0] in (b'/', b'/metrics'):
+                status, body = b'200 OK', registry.render().encode('utf-8')
+            else:
+                status, body = b'404 Not Found', b'Not found\n'
+            writer.write(b'HTTP/1.1 ' + status + b'\r\n'
+                         + b'Content-Type: ' + CONTENT_TYPE.encode('ascii') + b'\r\n'
+                         + b'Content-Length: ' + str(len(body)).encode('ascii') + b'\r\n'
+                         + b'Connection: close\r\n\r\n' + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+# Shared by every bot in the process; each bot's samples carry a bot label
+metrics = Metrics()
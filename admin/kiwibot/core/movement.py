@@ -0,0 +1,183 @@
+"""Movement planner: queued, compressed and paced walking
+
+Callers hand the planner whole routes ('nw', 'nw', 'se', ...) and return
+immediately; one walker task per bot sends the steps. Pacing is by
+deadline, one step every `step_interval` seconds measured from when the
+previous step was due rather than from when a sleep happened to wake up, so
+long walks do not drift slower than the server allows.
+
+Superseded moves never reach the server: a step straight back the way the
+route was heading cancels the queued step instead of being appended, a
+replacing route discards what was left of the old one, and stop() empties
+the queue between steps. The planner also tracks where the character will
+be, from the last known position plus every step sent.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Iterable, Optional, Tuple
+
+# Furcadia walks diagonally only; the server takes the numpad direction
+DIRECTIONS = {'nw': 'm 7', 'ne': 'm 9', 'sw': 'm 1', 'se': 'm 3'}
+STEP_DELTAS = {'nw': (-1, -1), 'ne': (1, -1), 'sw': (-1, 1), 'se': (1, 1)}
+OPPOSITE = {'nw': 'se', 'se': 'nw', 'ne': 'sw', 'sw': 'ne'}
+
+# The server accepts about four steps a second before it starts queueing them
+DEFAULT_STEP_INTERVAL = 0.25
+MAX_ROUTE = 500  # steps queued at once
+
+
+def apply_step(position: Tuple[int, int], direction: str) -> Tuple[int, int]:
+    """Return the position one step from `position` in `direction`"""
+    dx, dy = STEP_DELTAS[direction]
+    return position[0] + dx, position[1] + dy
+
+
+class MovementPlanner:
+    """Per-character route queue and walker
+
+    Steps that aren't directions (e.g. 'sit', 'lie') are sent verbatim in
+    their place in the route, paced like steps.
+
+    Counters:
+        steps: Route entries sent to the server
+        merged: Queued steps cancelled by an opposite step
+        dropped: Steps discarded by stop(), replacement or MAX_ROUTE
+    """
+
+    def __init__(self, send: Callable[[str], Awaitable[bool]], step_interval: float = DEFAULT_STEP_INTERVAL,
+                 log: Optional[logging.Logger] = None):
+        self.send = send
+        self.step_interval = step_interval
+        self.log = log or logging.getLogger(__name__)
+        self.position: Optional[Tuple[int, int]] = None
+        self._route: Deque[str] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._next_step = 0.0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        self.steps = 0
+        self.merged = 0
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        """Route entries still to be sent"""
+        return len(self._route)
+
+    @property
+    def predicted(self) -> Optional[Tuple[int, int]]:
+        """Where the character ends up once the queued route is walked"""
+        position = self.position
+        if position is None:
+            return None
+        for step in self._route:
+            if step in STEP_DELTAS:
+                position = apply_step(position, step)
+        return position
+
+    def eta(self) -> float:
+        """Seconds until the queued route is finished"""
+        if not self._route:
+            return 0.0
+        loop_time = asyncio.get_running_loop().time()
+        start = max(self._next_step, loop_time)
+        return start - loop_time + (len(self._route) - 1) * self.step_interval
+
+    def set_position(self, x: int, y: int) -> None:
+        """Record where the server says the character is"""
+        self.position = (x, y)
+
+    def walk(self, steps: Iterable[str], replace: bool = False) -> int:
+        """Queue a route without waiting for it to be walked
+
+        Args:
+            steps: Directions (nw, ne, sw, se) or raw actions, in order
+            replace: Discard whatever is left of the current route first
+
+        Returns:
+            int: Route entries now queued
+        """
+        route = self._route
+        if replace:
+            self.dropped += len(route)
+            route.clear()
+        for step in steps:
+            step = step.strip()
+            if not step:
+                continue
+            # Directions match case-insensitively; raw actions (e.g. '"Hello')
+            # go to the server exactly as given
+            direction = step.lower()
+            if direction in DIRECTIONS:
+                step = direction
+            if route and OPPOSITE.get(step) == route[-1]:
+                # Walking straight back: cancel the queued step instead
+                route.pop()
+                self.merged += 2
+                continue
+            if len(route) >= MAX_ROUTE:
+                self.dropped += 1
+                continue
+            route.append(step)
+
+        if route and (self._task is None or self._task.done()):
+            self._idle.clear()
+            self._task = asyncio.create_task(self._walk())
+        return len(route)
+
+    def stop(self) -> int:
+        """Discard the rest of the route; returns how many steps were dropped"""
+        count = len(self._route)
+        self.dropped += count
+        self._route.clear()
+        return count
+
+    async def wait(self) -> None:
+        """Wait until the queued route has been walked (or stopped)"""
+        await self._idle.wait()
+
+    async def _walk(self) -> None:
+        """Send queued steps one interval apart until the route is empty"""
+        loop = asyncio.get_running_loop()
+        route = self._route
+        try:
+            while route:
+                now = loop.time()
+                if self._next_step > now:
+                    await asyncio.sleep(self._next_step - now)
+                    continue  # the route may have changed while we slept
+
+                step = route.popleft()
+                await self.send(DIRECTIONS.get(step, step))
+                self.steps += 1
+                if self.position is not None and step in STEP_DELTAS:
+                    self.position = apply_step(self.position, step)
+
+                # Keep the cadence unless we fell a whole interval behind (idle)
+                base = self._next_step if now - self._next_step < self.step_interval else now
+                self._next_step = base + self.step_interval
+        except Exception as e:
+            self.log.error('Movement failed: %s', e)
+            self.dropped += len(route)
+            route.clear()
+        finally:
+            self._idle.set()
+
+    async def close(self) -> None:
+        """Drop the route and stop the walker"""
+        self.stop()
+        if self._task and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._idle.set()
+
+    def stats(self) -> dict:
+        """Return the route length and counters"""
+        return {
+            'pending': len(self._route),
+            'steps': self.steps,
+            'merged': self.merged,
+            'dropped': self.dropped,
+        }
@@ -0,0 +1,310 @@
+"""A* pathfinding for Furcadia's diagonal-only movement
+
+Avatars only ever step nw/ne/sw/se, so a tile's neighbours are its four
+diagonals, the exact distance on an open map is max(|dx|, |dy|) (used as the
+heuristic), and x + y keeps its parity: a target of the other parity is
+unreachable, and nearest_reachable() picks the closest tile beside it.
+
+Searches are resumable. PathSearch.run(budget) expands at most `budget`
+nodes and returns, and find_path() yields to the event loop between
+slices, so a long search across a large dream never stalls message intake.
+
+Grids come from the loaded dream map (see maps.py); a dream whose map
+isn't loaded shares one fully open grid. Following a moving target reuses the route already queued on the movement planner:
+only the stretch from the end of that route to the target's new tile is
+searched, unless that would make a long detour, in which case the route is
+planned again from scratch.
+"""
+import asyncio
+import heapq
+from array import array
+import logging
+from typing import Callable, List, Optional, Tuple
+
+from .movement import STEP_DELTAS
+from .world import MAP_HEIGHT, MAP_WIDTH
+
+DEFAULT_BUDGET = 1000          # node expansions per event loop slice (a few ms)
+DEFAULT_MAX_EXPANSIONS = 250000  # give up after this many in total
+FOLLOW_INTERVAL = 0.5          # seconds between checks on a followed character
+REPAIR_LIMIT = 12              # longest extension appended to a queued route
+
+
+class WalkGrid:
+    """Walkable tiles of one dream, one byte per tile (1 = walkable)
+
+    Grids are shared between searches and bots, so they are read-only.
+    """
+    __slots__ = ('width', 'height', 'cells')
+
+    def __init__(self, width: int, height: int, cells: Optional[bytes] = None):
+        self.width = width
+        self.height = height
+        self.cells = cells if cells is not None else b'\x01' * (width * height)
+
+    def walkable(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height and self.cells[y * self.width + x] == 1
+
+
+# Stands in for every dream whose map isn't loaded; searches only read it
+OPEN_GRID = WalkGrid(MAP_WIDTH, MAP_HEIGHT)
+
+
+def distance(a: Tuple[int, int], b: Tuple[int, int]) -> int:
+    """Diagonal steps between two tiles of the same parity on an open map"""
+    return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+
+# Step deltas in a fixed order so paths are deterministic
+_DELTAS = tuple(STEP_DELTAS.values())
+_DIRECTION_OF = {delta: direction for direction, delta in STEP_DELTAS.items()}
+UNSEEN = 1 << 30
+
+
+class PathSearch:
+    """A* search that can be run in bounded slices"""
+
+    def __init__(self, grid: WalkGrid, start: Tuple[int, int], goal: Tuple[int, int]):
+        self.grid = grid
+        self.start = start
+        self.goal = goal
+        self.expanded = 0
+        self.done = False
+        self.path: Optional[List[str]] = None
+
+        width = grid.width
+        size = width * grid.height
+        self._width = width
+        self._goal = goal[1] * width + goal[0]
+        # Flat per-tile arrays: no hashing, and no dict resizes mid-slice
+        self._g = array('i', [UNSEEN]) * size
+        self._parent = array('i', [-1]) * size
+        self._closed = bytearray(size)
+        self._open: List[Tuple[int, int, int]] = []
+
+        # An off-grid start (a stale or bogus position) must not index, or
+        # with negative coordinates wrap around, the flat arrays
+        on_grid = 0 <= start[0] < width and 0 <= start[1] < grid.height
+        if not on_grid or (start[0] + start[1]) % 2 != (goal[0] + goal[1]) % 2 or not grid.walkable(*goal):
+            self.done = True  # unreachable, path stays None
+            return
+        start_index = start[1] * width + start[0]
+        self._g[start_index] = 0
+        h = distance(start, goal)
+        self._open.append((h, h, start_index))
+
+    def run(self, budget: int = DEFAULT_BUDGET) -> bool:
+        """Expand up to `budget` nodes; returns True once the search is finished"""
+        if self.done:
+            return True
+        grid = self.grid
+        cells = grid.cells
+        width = self._width
+        height = grid.height
+        gx, gy = self.goal
+        goal = self._goal
+        g_score = self._g
+        parent = self._parent
+        open_heap = self._open
+        closed = self._closed
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        for _ in range(budget):
+            if not open_heap:
+                self.done = True
+                return True
+            _, _, current = heappop(open_heap)
+            if closed[current]:
+                continue
+            if current == goal:
+                self.path = self._reconstruct(current)
+                self.done = True
+                return True
+            closed[current] = 1
+            self.expanded += 1
+
+            cy, cx = divmod(current, width)
+            g = g_score[current] + 1
+            for dx, dy in _DELTAS:
+                nx = cx + dx
+                ny = cy + dy
+                if nx < 0 or ny < 0 or nx >= width or ny >= height:
+                    continue
+                neighbour = ny * width + nx
+                if not cells[neighbour] or closed[neighbour]:
+                    continue
+                if g < g_score[neighbour]:
+                    g_score[neighbour] = g
+                    parent[neighbour] = current
+                    h = abs(nx - gx)
+                    dy_goal = abs(ny - gy)
+                    if dy_goal > h:
+                        h = dy_goal
+                    heappush(open_heap, (g + h, h, neighbour))
+        return False
+
+    def _reconstruct(self, node: int) -> List[str]:
+        steps = []
+        parent = self._parent
+        width = self._width
+        while parent[node] >= 0:
+            previous = parent[node]
+            py, px = divmod(previous, width)
+            ny, nx = divmod(node, width)
+            steps.append(_DIRECTION_OF[(nx - px, ny - py)])
+            node = previous
+        steps.reverse()
+        return steps
+
+
+def nearest_reachable(grid: WalkGrid, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+    """Return `goal`, or the closest walkable tile beside it that `start` can reach by parity"""
+    parity = (start[0] + start[1]) % 2
+    if (goal[0] + goal[1]) % 2 == parity and grid.walkable(*goal):
+        return goal
+    x, y = goal
+    candidates = [(x + dx, y + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1), *STEP_DELTAS.values())]
+    candidates = [tile for tile in candidates if (tile[0] + tile[1]) % 2 == parity and grid.walkable(*tile)]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda tile: distance(start, tile))
+
+
+async def find_path(grid: WalkGrid, start: Tuple[int, int], goal: Tuple[int, int],
+                    budget: int = DEFAULT_BUDGET, max_expansions: int = DEFAULT_MAX_EXPANSIONS,
+                    on_done: Optional[Callable[[PathSearch], None]] = None) -> Optional[List[str]]:
+    """Search for a route, yielding to the event loop every `budget` expansions
+
+    Args:
+        on_done: Called with the search once it finishes or gives up (for counters)
+
+    Returns:
+        list: Directions from start to goal, [] if already there, None if unreachable
+    """
+    search = PathSearch(grid, start, goal)
+    try:
+        while not search.run(budget):
+            if search.expanded >= max_expansions:
+                return None
+            await asyncio.sleep(0)
+        return search.path
+    finally:
+        if on_done is not None:
+            on_done(search)
+
+
+class Navigator:
+    """Turns goto/follow requests into routes on the movement planner"""
+
+    def __init__(self, movement, world, log: Optional[logging.Logger] = None, budget: int = DEFAULT_BUDGET):
+        self.movement = movement
+        self.world = world
+        self.log = log or logging.getLogger(__name__)
+        self.budget = budget
+        self.following: Optional[str] = None
+        self._follow_task: Optional[asyncio.Task] = None
+
+        self.searches = 0
+        self.repairs = 0
+        self.expanded = 0
+
+    def grid(self) -> WalkGrid:
+        dream = self.world.dream
+        return dream.grid or OPEN_GRID
+
+    async def _search(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[str]]:
+        return await find_path(self.grid(), start, goal, self.budget, on_done=self._count)
+
+    def _count(self, search: PathSearch) -> None:
+        self.searches += 1
+        self.expanded += search.expanded
+
+    async def goto(self, x: int, y: int) -> Optional[int]:
+        """Walk to (x, y), or next to it if it can't be stood on
+
+        Returns:
+            int: Steps queued, or None if the bot's position is unknown or no route exists
+        """
+        start = self.movement.position
+        if start is None:
+            return None
+        goal = nearest_reachable(self.grid(), start, (x, y))
+        if goal is None:
+            return None
+        path = await self._search(start, goal)
+        if path is None:
+            return None
+        self.movement.walk(path, replace=True)
+        return len(path)
+
+    def follow(self, name: str) -> bool:
+        """Start following a character; False if they aren't in the dream"""
+        if self.world.get_character(name) is None:
+            return False
+        self.stop()
+        self.following = name
+        self._follow_task = asyncio.create_task(self._follow(name))
+        return True
+
+    def stop(self) -> int:
+        """Stop following and walking; returns the steps dropped"""
+        if self._follow_task and not self._follow_task.done():
+            self._follow_task.cancel()
+        self._follow_task = None
+        self.following = None
+        return self.movement.stop()
+
+    async def _follow(self, name: str) -> None:
+        last_target = None
+        try:
+            while True:
+                target = self.world.get_character(name)
+                if target is None:
+                    self.log.info('Lost %s, no longer following', name)
+                    break
+                here = self.movement.position
+                if here is not None and target.position != last_target:
+                    await self._chase(here, target.position)
+                    last_target = target.position
+                await asyncio.sleep(FOLLOW_INTERVAL)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.log.error('Follow failed: %s', e)
+        finally:
+            if self.following == name:
+                self.following = None
+
+    async def _chase(self, here: Tuple[int, int], target: Tuple[int, int]) -> None:
+        """Re-route towards a followed character, reusing the queued route when possible"""
+        grid = self.grid()
+        movement = self.movement
+        end = movement.predicted
+        if movement.pending and end is not None:
+            # Extend the queued route from where it ends instead of starting
+            # over, as long as that doesn't turn into a detour
+            goal = nearest_reachable(grid, end, target)
+            if goal is not None and distance(end, goal) <= REPAIR_LIMIT \
+                    and movement.pending + distance(end, goal) <= distance(here, goal) + REPAIR_LIMIT:
+                path = await self._search(end, goal)
+                if path is not None and len(path) <= REPAIR_LIMIT:
+                    self.repairs += 1
+                    movement.walk(path[:-1] if goal == target else path)
+                    return
+
+        goal = nearest_reachable(grid, here, target)
+        if goal is None or distance(here, goal) <= 1:
+            return
+        path = await self._search(here, goal)
+        if path:
+            # Stop beside the character rather than on top of them
+            movement.walk(path[:-1] if goal == target else path, replace=True)
+
+    def stats(self) -> dict:
+        return {
+            'following': self.following,
+            'searches': self.searches,
+            'repairs': self.repairs,
+            'expanded': self.expanded,
+        }
@@ -0,0 +1,275 @@
+"""Low-overhead profiling of the bot's hot paths (--profile-hot-path)
+
+Three tools, all off unless the profiler is started:
+
+- Section timing: instrument() wraps a bot's message handlers, the line
+  processing loop, handle_command and every Command.execute on the
+  instance, so when profiling is off nothing is wrapped at all. Each call
+  costs two perf_counter() reads and a list update. Totals are logged
+  every interval, heaviest first.
+- Slow callbacks: a heartbeat scheduled on the loop measures how late it
+  runs, and a watchdog thread logs the stack the loop is stuck in while a
+  stall is still going on. asyncio's own slow-callback warnings need
+  debug mode, which is far too expensive to leave on.
+- Dumps: either a cProfile of the loop thread written as pstats each
+  interval, or a sampled collapsed-stack file ("a;b;c count" lines) that
+  flamegraph.pl and speedscope read. Sampling costs a thread wake-up per
+  sample, cProfile slows Python calls down noticeably; both are meant for a
+  few minutes of investigation.
+"""
+import asyncio
+import cProfile
+import functools
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_SLOW_CALLBACK = 0.1     # seconds the loop may be blocked before it is logged
+DEFAULT_REPORT_INTERVAL = 60.0  # seconds between section reports and dumps
+DEFAULT_SAMPLE_INTERVAL = 0.01  # seconds between stack samples in collapsed mode
+DEFAULT_PROFILE_DIR = 'logs/profile'
+DUMP_FORMATS = ('pstats', 'collapsed')
+HEARTBEAT = 0.05                # seconds between loop heartbeats
+REPORT_TOP = 20                 # sections listed per report
+
+log = logging.getLogger(__name__)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f'{Path(code.co_filename).stem}:{code.co_name}'
+
+
+def collapse_stack(frame) -> str:
+    """Return 'outer;...;inner' for a frame, as flamegraph tools expect"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class HotPathProfiler:
+    """Section timers, a blocked-loop watchdog and periodic profile dumps
+
+    Counters:
+        stalls: Times the loop was blocked longer than slow_threshold
+        samples: Stack samples taken in collapsed mode
+        dumps: Profile files written
+    """
+
+    def __init__(self, slow_threshold: float = DEFAULT_SLOW_CALLBACK,
+                 interval: float = DEFAULT_REPORT_INTERVAL, dump: Optional[str] = None,
+                 directory: str = DEFAULT_PROFILE_DIR, sample_interval: float = DEFAULT_SAMPLE_INTERVAL):
+        if dump is not None and dump not in DUMP_FORMATS:
+            raise ValueError(f'dump must be one of {DUMP_FORMATS}')
+        self.slow_threshold = slow_threshold
+        self.interval = interval
+        self.dump = dump
+        self.directory = Path(directory)
+        self.sample_interval = sample_interval
+
+        self._sections: Dict[str, List[float]] = {}  # name -> [calls, total, max]
+        self._stacks: Counter = Counter()
+        self._profile: Optional[cProfile.Profile] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._heartbeat: Optional[asyncio.TimerHandle] = None
+        self._expected = 0.0
+        self._last_beat = 0.0
+        self._stall_logged = False
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self._reporter: Optional[asyncio.Task] = None
+
+        self.stalls = 0
+        self.samples = 0
+        self.dumps = 0
+
+    # Section timing
+
+    def record(self, section: str, elapsed: float) -> None:
+        entry = self._sections.get(section)
+        if entry is None:
+            self._sections[section] = [1, elapsed, elapsed]
+            return
+        entry[0] += 1
+        entry[1] += elapsed
+        if elapsed > entry[2]:
+            entry[2] = elapsed
+
+    def wrap(self, section: str, func: Callable) -> Callable:
+        """Time every call of a coroutine function or plain function under `section`"""
+        record = self.record
+        perf_counter = time.perf_counter
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def timed_async(*args, **kwargs):
+                began = perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    record(section, perf_counter() - began)
+            return timed_async
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            began = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(section, perf_counter() - began)
+        return timed
+
+    def instrument(self, bot: Any) -> None:
+        """Wrap a bot's hot paths on the instance
+
+        Awaited time is included: a handler that waits on the network is
+        charged for the wait, which is what a slow reply looks like.
+        """
+        name = bot.account['name'] if bot.account else 'default'
+        bot.process_lines = self.wrap(f'{name}:process_lines', bot.process_lines)
+        bot.handle_command = self.wrap(f'{name}:handle_command', bot.handle_command)
+        bot.message_handlers = {
+            message_type: self.wrap(f'{name}:{handler.__name__}', handler)
+            for message_type, handler in bot.message_handlers.items()
+        }
+        bot.raw_handlers = {
+            message_type: self.wrap(f'{name}:raw:{message_type.value}', handler)
+            for message_type, handler in bot.raw_handlers.items()
+        }
+
+        def instrument_command(command):
+            command.execute = self.wrap(f'{name}:execute:{command.name}', command.execute)
+
+        for command in bot.commands.loaded().values():
+            instrument_command(command)
+        bot.commands.on_load = instrument_command
+
+    def report(self, reset: bool = True) -> str:
+        """Format the heaviest sections since the last report"""
+        sections = sorted(self._sections.items(), key=lambda item: item[1][1], reverse=True)
+        if reset:
+            self._sections = {}
+        if not sections:
+            return 'no instrumented calls'
+        lines = [f'{"section":<48} {"calls":>8} {"total ms":>10} {"mean ms":>9} {"max ms":>9}']
+        for section, (calls, total, longest) in sections[:REPORT_TOP]:
+            lines.append(f'{section:<48} {calls:>8} {total * 1e3:>10.1f} {total / calls * 1e3:>9.3f} {longest * 1e3:>9.1f}')
+        return '\n'.join(lines)
+
+    # Blocked-loop watchdog
+
+    def _beat(self) -> None:
+        now = time.monotonic()
+        lag = now - self._expected
+        if lag > self.slow_threshold:
+            self.stalls += 1
+            log.warning('Event loop was blocked for %.0f ms', lag * 1e3)
+        self._stall_logged = False
+        self._last_beat = now
+        self._expected = now + HEARTBEAT
+        self._heartbeat = self._loop.call_later(HEARTBEAT, self._beat)
+
+    def _watch(self) -> None:
+        sampling = self.dump == 'collapsed'
+        period = self.sample_interval if sampling else min(self.slow_threshold / 2, HEARTBEAT)
+        while not self._stop.wait(period):
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            if sampling:
+                self._stacks[collapse_stack(frame)] += 1
+                self.samples += 1
+            blocked = time.monotonic() - self._last_beat - HEARTBEAT
+            if blocked > self.slow_threshold and not self._stall_logged:
+                self._stall_logged = True
+                stack = ''.join(traceback.format_stack(frame))
+                log.warning('Event loop blocked for over %.0f ms in:\n%s', blocked * 1e3, stack)
+            del frame
+
+    # Dumps
+
+    def _write_dump(self) -> Optional[Path]:
+        if self.dump is None:
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        if self.dump == 'pstats':
+            if self._profile is None:
+                return None
+            # Switch to a fresh profiler so each file covers one interval
+            self._profile.disable()
+            path = self.directory / f'kiwibot-{stamp}.pstats'
+            self._profile.dump_stats(str(path))
+            self._profile = cProfile.Profile()
+            if not self._stop.is_set():
+                self._profile.enable()
+        else:
+            stacks, self._stacks = self._stacks, Counter()
+            if not stacks:
+                return None
+            path = self.directory / f'kiwibot-{stamp}.collapsed'
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in stacks.most_common():
+                    f.write(f'{stack} {count}\n')
+        self.dumps += 1
+        return path
+
+    async def _report_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self._flush()
+
+    def _flush(self) -> None:
+        log.info('Hot path sections (last %.0fs):\n%s', self.interval, self.report())
+        path = self._write_dump()
+        if path:
+            log.info('Wrote %s', path)
+
+    # Lifecycle
+
+    async def start(self) -> None:
+        """Start the heartbeat, watchdog, reporter and (for pstats) cProfile on this loop"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._last_beat = time.monotonic()
+        self._expected = self._last_beat + HEARTBEAT
+        self._heartbeat = self._loop.call_later(HEARTBEAT, self._beat)
+        self._watchdog = threading.Thread(target=self._watch, name='kiwibot-profiler', daemon=True)
+        self._watchdog.start()
+        if self.dump == 'pstats':
+            # cProfile hooks the thread that enables it, which is the loop's
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._reporter = asyncio.create_task(self._report_periodically())
+        log.info('Hot path profiling on (slow callback threshold %.0f ms, dump %s)',
+                 self.slow_threshold * 1e3, self.dump or 'off')
+
+    async def stop(self) -> None:
+        """Stop everything and write a last report and dump"""
+        self._stop.set()
+        if self._heartbeat:
+            self._heartbeat.cancel()
+        if self._reporter:
+            self._reporter.cancel()
+            await asyncio.gather(self._reporter, return_exceptions=True)
+        if self._watchdog:
+            await asyncio.to_thread(self._watchdog.join)
+        self._flush()
+        if self._profile:
+            self._profile.disable()
+            self._profile = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'stalls': self.stalls,
+            'samples': self.samples,
+            'dumps': self.dumps,
+        }
@@ -0,0 +1,92 @@
+"""Reconnect pacing and outage bookkeeping
+
+Backoff uses "full jitter": the n-th retry waits a uniformly random time
+between 0 and min(cap, base * 2**n). After a server blip a fleet's retries
+spread over the whole window instead of arriving together, and most bots
+are back within a few seconds.
+"""
+import random
+import time
+from typing import Dict, Optional
+
+DEFAULT_BACKOFF_BASE = 0.5   # seconds, upper bound of the first retry delay
+DEFAULT_BACKOFF_CAP = 60.0   # seconds, largest retry delay
+DEFAULT_CONNECT_TIMEOUT = 10.0
+
+
+class Backoff:
+    """Jittered exponential backoff"""
+
+    def __init__(self, base: float = DEFAULT_BACKOFF_BASE, cap: float = DEFAULT_BACKOFF_CAP,
+                 rng: Optional[random.Random] = None):
+        self.base = base
+        self.cap = cap
+        self.attempt = 0
+        self._random = rng or random.Random()
+
+    def next(self) -> float:
+        """Return the delay before the next attempt and count the attempt"""
+        ceiling = min(self.cap, self.base * (2 ** min(self.attempt, 30)))
+        self.attempt += 1
+        return self._random.uniform(0, ceiling)
+
+    def reset(self) -> None:
+        """Start over after a successful login"""
+        self.attempt = 0
+
+
+class ReconnectStats:
+    """Counts disconnects and measures how long each outage lasted
+
+    An outage runs from the moment the connection drops until the next
+    login completes, so it covers the backoff, the connect and the login.
+    """
+
+    def __init__(self):
+        self.disconnects = 0
+        self.attempts = 0           # connect attempts after a disconnect
+        self.failures = 0           # of which failed
+        self.reconnects = 0         # outages that ended in a login
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_downtime = 0.0
+        self._down_since: Optional[float] = None
+
+    @property
+    def down(self) -> bool:
+        return self._down_since is not None
+
+    def disconnected(self) -> None:
+        self.disconnects += 1
+        if self._down_since is None:
+            self._down_since = time.monotonic()
+
+    def attempt(self, ok: bool) -> None:
+        if self._down_since is None:
+            return  # the first connect isn't a reconnect
+        self.attempts += 1
+        if not ok:
+            self.failures += 1
+
+    def logged_in(self) -> Optional[float]:
+        """Close the current outage; returns its length, or None if there wasn't one"""
+        if self._down_since is None:
+            return None
+        latency = time.monotonic() - self._down_since
+        self._down_since = None
+        self.reconnects += 1
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_downtime += latency
+        return latency
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'disconnects': self.disconnects,
+            'attempts': self.attempts,
+            'failures': self.failures,
+            'reconnects': self.reconnects,
+            'last_latency': self.last_latency,
+            'max_latency': self.max_latency,
+            'total_downtime': self.total_downtime,
+        }
@@ -0,0 +1,188 @@
+"""Command execution off the read loop
+
+The receive loop hands owner instructions to a CommandScheduler and goes
+straight back to reading, so a command that sleeps or waits on the network
+never delays keepalives or the next whisper.
+
+Jobs are queued in one lane per user and each lane runs its jobs in order,
+so "move then say" from the same person still happens in that order. Lanes
+run concurrently up to a per-bot limit, and every bot in the process also
+shares a global limit. Each job can carry a timeout, and a user's running
+and queued jobs can be cancelled at once (what !stop does).
+"""
+import asyncio
+import logging
+import weakref
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+DEFAULT_BOT_CONCURRENCY = 4      # jobs running at once for one bot
+DEFAULT_GLOBAL_CONCURRENCY = 256  # jobs running at once across the process
+DEFAULT_JOB_TIMEOUT = 60.0       # seconds, for jobs submitted without their own
+DEFAULT_MAX_QUEUED = 32          # jobs waiting per user before new ones are refused
+
+_global_concurrency = DEFAULT_GLOBAL_CONCURRENCY
+# One semaphore per event loop: a semaphore binds to the loop that first
+# waits on it, and tools like replay_capture.py call asyncio.run() twice
+_global_limits: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]' = \
+    weakref.WeakKeyDictionary()
+
+
+def _global_limit() -> asyncio.Semaphore:
+    """The process-wide job limit for the running loop"""
+    loop = asyncio.get_running_loop()
+    limit = _global_limits.get(loop)
+    if limit is None:
+        limit = _global_limits[loop] = asyncio.Semaphore(_global_concurrency)
+    return limit
+
+
+def set_global_concurrency(limit: int) -> None:
+    """Replace the process-wide job limit (call before any bot starts)"""
+    global _global_concurrency
+    _global_concurrency = limit
+    _global_limits.clear()
+
+
+Job = Tuple[str, Callable[[], Awaitable[Any]], Optional[float]]
+
+
+class CommandScheduler:
+    """Per-bot job runner with per-user ordering
+
+    Counters:
+        completed: Jobs that finished normally
+        failed: Jobs that raised
+        timed_out: Jobs stopped by their timeout
+        cancelled: Jobs cancelled while running or before they started
+        rejected: Jobs refused because the user's lane was full
+    """
+
+    def __init__(self, log: Optional[logging.Logger] = None, concurrency: int = DEFAULT_BOT_CONCURRENCY,
+                 default_timeout: Optional[float] = DEFAULT_JOB_TIMEOUT, max_queued: int = DEFAULT_MAX_QUEUED):
+        self.log = log or logging.getLogger(__name__)
+        self.default_timeout = default_timeout
+        self.max_queued = max_queued
+        self._limit = asyncio.Semaphore(concurrency)
+        self._lanes: Dict[Hashable, Deque[Job]] = {}
+        self._workers: Dict[Hashable, asyncio.Task] = {}
+        self._executing = 0
+
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    @property
+    def running(self) -> int:
+        """Jobs executing right now (holding a concurrency slot)"""
+        return self._executing
+
+    @property
+    def busy(self) -> bool:
+        """True while any user has a job running, waiting for a slot or queued"""
+        return bool(self._workers)
+
+    @property
+    def queued(self) -> int:
+        """Jobs waiting behind a running one"""
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def submit(self, user: Hashable, label: str, job: Callable[[], Awaitable[Any]],
+               timeout: Optional[float] = None) -> bool:
+        """Queue a job in `user`'s lane without waiting for it
+
+        Args:
+            user: Lane key; jobs with the same key run one at a time, in order
+            label: Name used in logs
+            job: Zero-argument callable returning the coroutine to run
+            timeout: Seconds before the job is cancelled (default_timeout if None, 0 for none)
+
+        Returns:
+            bool: False if the lane was full and the job was dropped
+        """
+        lane = self._lanes.get(user)
+        if lane is None:
+            lane = self._lanes[user] = deque()
+        elif len(lane) >= self.max_queued:
+            self.rejected += 1
+            self.log.warning('Too many queued commands from %s, dropping %s', user, label)
+            return False
+
+        lane.append((label, job, self.default_timeout if timeout is None else timeout))
+        if user not in self._workers:
+            self._workers[user] = asyncio.create_task(self._drain(user, lane))
+        return True
+
+    async def _drain(self, user: Hashable, lane: Deque[Job]) -> None:
+        """Run one user's jobs in order until the lane is empty"""
+        try:
+            while lane:
+                label, job, timeout = lane.popleft()
+                # The bot's own slot first: a bot at its limit mustn't sit on
+                # global slots other bots in the fleet could be using
+                async with self._limit, _global_limit():
+                    self._executing += 1
+                    try:
+                        if timeout:
+                            await asyncio.wait_for(job(), timeout)
+                        else:
+                            await job()
+                        self.completed += 1
+                    except asyncio.TimeoutError:
+                        self.timed_out += 1
+                        self.log.warning('Command %s from %s timed out after %.1fs', label, user, timeout)
+                    except Exception as e:
+                        self.failed += 1
+                        self.log.error('Command %s from %s failed: %s', label, user, e)
+                    finally:
+                        self._executing -= 1
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            # After a cancel the user may already have a fresh lane; leave it alone
+            if self._workers.get(user) is asyncio.current_task():
+                del self._workers[user]
+            if self._lanes.get(user) is lane:
+                del self._lanes[user]
+
+    def cancel(self, user: Optional[Hashable] = None) -> int:
+        """Cancel the running and queued jobs of one user, or of everyone
+
+        Returns:
+            int: Number of jobs cancelled
+        """
+        users = [user] if user is not None else list(self._workers)
+        count = 0
+        for key in users:
+            lane = self._lanes.pop(key, None)
+            if lane:
+                count += len(lane)
+                self.cancelled += len(lane)
+                lane.clear()
+            worker = self._workers.pop(key, None)
+            if worker is not None and not worker.done():
+                worker.cancel()  # counted as cancelled by the worker itself
+                count += 1
+        return count
+
+    async def close(self) -> None:
+        """Cancel everything and wait for the jobs to unwind"""
+        workers = list(self._workers.values())
+        self.cancel()
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the lane counts and counters"""
+        return {
+            'running': self.running,
+            'queued': self.queued,
+            'completed': self.completed,
+            'failed': self.failed,
+            'timed_out': self.timed_out,
+            'cancelled': self.cancelled,
+            'rejected': self.rejected,
+        }
@@ -0,0 +1,153 @@
+"""Outbound send queue with write coalescing and flood-safe pacing
+
+Senders call put() and return immediately; a single flusher task drains
+the queue, joining every line the token bucket allows into one write so a
+burst of commands costs one syscall instead of one per line.
+
+Urgent lines (the login) always go first, and hold() keeps ordinary lines
+queued until release(), so whatever was queued while the connection was
+down waits for the new session to finish logging in. Urgent lines belong to
+the session they were queued for: end_session() drops them, since every
+login sends its own handshake.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from ..utils.ratelimit import TokenBucket
+
+# Defaults kept under the Furcadia server's flood limits
+DEFAULT_SEND_RATE = 4.0    # lines per second, sustained
+DEFAULT_SEND_BURST = 8     # lines allowed back to back
+DEFAULT_MAX_DEPTH = 500    # queued lines before new ones are dropped
+DEFAULT_MAX_BATCH = 32     # lines joined into a single write
+
+
+class SendQueue:
+    """Per-connection outbound queue
+
+    Counters:
+        sent: Lines written to the transport
+        dropped: Lines rejected because the queue was full
+        delayed: Lines that had to wait for the rate limiter
+        batches: Writes issued (sent / batches is the coalescing factor)
+    """
+
+    def __init__(self, rate: float = DEFAULT_SEND_RATE, burst: int = DEFAULT_SEND_BURST,
+                 max_depth: int = DEFAULT_MAX_DEPTH, max_batch: int = DEFAULT_MAX_BATCH,
+                 log: Optional[logging.Logger] = None):
+        self.log = log or logging.getLogger(__name__)
+        self.bucket = TokenBucket(rate, burst)
+        self.max_depth = max_depth
+        self.max_batch = max_batch
+        self.conn = None
+        self._queue: Deque[bytes] = deque()
+        self._urgent: Deque[bytes] = deque()
+        self.held = False
+        self._wakeup = asyncio.Event()
+        self._delayed_pending = 0  # queued lines already counted as delayed
+
+        self.sent = 0
+        self.dropped = 0
+        self.delayed = 0
+        self.batches = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of lines waiting to be sent"""
+        return len(self._queue) + len(self._urgent)
+
+    def put(self, line: bytes, *, urgent: bool = False) -> bool:
+        """Queue an encoded line (including its newline) without blocking
+
+        Args:
+            line: The encoded line
+            urgent: Send ahead of ordinary lines, even while the queue is held
+
+        Returns:
+            bool: False if the queue is full and the line was dropped
+        """
+        if urgent:
+            self._urgent.append(line)
+            self._wakeup.set()
+            return True
+        if len(self._queue) >= self.max_depth:
+            self.dropped += 1
+            self.log.warning('Send queue full (%d), dropping message', self.max_depth)
+            return False
+        self._queue.append(line)
+        self._wakeup.set()
+        return True
+
+    def hold(self) -> None:
+        """Send only urgent lines until release()"""
+        self.held = True
+
+    def release(self) -> None:
+        """Resume sending ordinary lines"""
+        self.held = False
+        self._wakeup.set()
+
+    def end_session(self) -> None:
+        """Drop urgent lines left from a closed connection and hold the rest for the next login"""
+        self._urgent.clear()
+        self.held = True
+
+    def clear(self) -> None:
+        """Discard every queued line"""
+        self._queue.clear()
+        self._urgent.clear()
+        self._delayed_pending = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return the queue depth and counters"""
+        return {
+            'depth': self.depth,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'delayed': self.delayed,
+            'batches': self.batches,
+        }
+
+    async def run(self, conn) -> None:
+        """Flush queued lines to `conn` until cancelled or the connection fails
+
+        Lines that couldn't be written are put back at the front of their
+        queue, so they go out on the next connection.
+        """
+        self.conn = conn
+        bucket = self.bucket
+        try:
+            while True:
+                if self._urgent:
+                    queue = self._urgent
+                elif self._queue and not self.held:
+                    queue = self._queue
+                else:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                available = int(bucket.available())
+                if available < 1:
+                    # Every line still queued has now been held back by the limiter
+                    self.delayed += len(queue) - self._delayed_pending
+                    self._delayed_pending = len(queue)
+                    await asyncio.sleep(bucket.delay(1))
+                    continue
+
+                count = min(available, len(queue), self.max_batch)
+                batch = [queue.popleft() for _ in range(count)]
+                try:
+                    conn.write(b''.join(batch))
+                except ConnectionError:
+                    queue.extendleft(reversed(batch))
+                    raise
+                bucket.consume(count)
+                self._delayed_pending = max(0, self._delayed_pending - count)
+                self.sent += count
+                self.batches += 1
+                await conn.drain()
+        finally:
+            self.conn = None
@@ -0,0 +1,172 @@
+"""Live status channel from running bots to the admin dashboard
+
+Every bot process runs one StatusPublisher, which sends each bot's status
+as a small JSON datagram to a local UDP port once a second. UDP keeps the
+bots independent of the dashboard: nothing blocks or errors if no one is
+listening, and a bot never waits on a slow reader.
+
+The admin app runs a StatusListener thread on that port. It keeps the
+latest status per bot, derives message rates from consecutive reports and
+marks bots that stopped reporting as stale. Browsers get the fleet pushed
+over server-sent events, so watching any number of bots costs one stream
+per open page and no database queries.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_STATUS_PORT = 9109
+STATUS_INTERVAL = 1.0   # seconds between reports from each bot
+STALE_AFTER = 5.0       # seconds without a report before a bot is shown as gone
+MAX_DATAGRAM = 8192
+
+log = logging.getLogger(__name__)
+
+
+class StatusPublisher:
+    """Sends the status of every bot in this process to the status port"""
+
+    def __init__(self, bots: Iterable[Any], host: str = '127.0.0.1', port: int = DEFAULT_STATUS_PORT,
+                 interval: float = STATUS_INTERVAL):
+        self.bots = list(bots)
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.sent = 0
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        # No remote_addr: an unconnected socket doesn't report "port
+        # unreachable" errors while the dashboard isn't running
+        self._transport, _ = await loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, family=socket.AF_INET)
+        self._task = asyncio.create_task(self._publish())
+
+    def publish_once(self) -> None:
+        pid = os.getpid()
+        for bot in self.bots:
+            status = bot.status()
+            status['pid'] = pid
+            data = json.dumps(status, default=str).encode('utf-8')
+            if len(data) > MAX_DATAGRAM:
+                continue
+            self._transport.sendto(data, (self.host, self.port))
+            self.sent += 1
+
+    async def _publish(self) -> None:
+        while True:
+            try:
+                self.publish_once()
+            except Exception as e:
+                log.warning('Could not publish status: %s', e)
+            await asyncio.sleep(self.interval)
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._transport:
+            # One last report so the dashboard sees the bots disconnect
+            try:
+                self.publish_once()
+            except Exception:
+                pass
+            self._transport.close()
+
+
+class StatusListener:
+    """Collects bot status datagrams on a background thread
+
+    Readers call wait() with the last version they saw and get the fleet
+    back as soon as anything newer arrives.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_STATUS_PORT, stale_after: float = STALE_AFTER):
+        self.host = host
+        self.port = port
+        self.stale_after = stale_after
+        self.error: Optional[str] = None
+        self.version = 0
+        self._bots: Dict[str, Dict[str, Any]] = {}
+        self._changed = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._sock: Optional[socket.socket] = None
+
+    def start(self) -> bool:
+        """Bind the port and start receiving (only once); False if the port can't be used"""
+        with self._changed:
+            if self._thread is not None or self.error is not None:
+                return self.error is None
+            try:
+                self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self._sock.bind((self.host, self.port))
+            except OSError as e:
+                self.error = f'Could not listen for bot status on {self.host}:{self.port}: {e}'
+                log.error(self.error)
+                return False
+            self._thread = threading.Thread(target=self._receive, name='kiwibot-status', daemon=True)
+            self._thread.start()
+            return True
+
+    def _receive(self) -> None:
+        while True:
+            try:
+                data, _ = self._sock.recvfrom(MAX_DATAGRAM)
+                status = json.loads(data)
+                name = str(status['name'])
+            except OSError:
+                return
+            except (ValueError, KeyError, TypeError):
+                continue
+            self._update(name, status)
+
+    def _update(self, name: str, status: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._changed:
+            previous = self._bots.get(name)
+            status['received_at'] = now
+            status['lines_in_rate'] = status['lines_out_rate'] = None
+            if previous and status.get('pid') == previous.get('pid'):
+                elapsed = now - previous['received_at']
+                if elapsed > 0:
+                    for field in ('lines_in', 'lines_out'):
+                        if field in status and field in previous:
+                            status[f'{field}_rate'] = max(0, status[field] - previous[field]) / elapsed
+            self._bots[name] = status
+            self.version += 1
+            self._changed.notify_all()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Latest status of every bot seen, with uptimes and a stale flag"""
+        now = time.time()
+        with self._changed:
+            bots = [dict(status) for status in self._bots.values()]
+        for status in bots:
+            status['stale'] = now - status['received_at'] > self.stale_after
+            started = status.get('started_at')
+            status['uptime'] = now - started if started and not status['stale'] else None
+            since = status.get('connected_since')
+            status['session_uptime'] = now - since if since and status.get('connected') and not status['stale'] else None
+        bots.sort(key=lambda status: status['name'])
+        return bots
+
+    def wait(self, version: int, timeout: float) -> Tuple[int, bool]:
+        """Block until the version moves past `version` or the timeout passes
+
+        Returns:
+            tuple: (current version, whether it changed)
+        """
+        with self._changed:
+            changed = self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version, changed
+
+    def close(self) -> None:
+        if self._sock:
+            self._sock.close()
@@ -0,0 +1,244 @@
+"""World state: who is in the dream and where
+
+The server describes avatars with short binary lines whose fields are
+base-220 digits (least significant first, each byte minus 35):
+
+    <  uid(4) x(2) y(2) shape(2) name(length-prefixed) ...   avatar arrives
+    /  uid(4) x(2) y(2) shape(2)                              avatar walks
+    A  uid(4) x(2) y(2) shape(2)                              avatar jumps
+    )  uid(4)                                                 avatar leaves
+    @  x(2) y(2)                                              our camera moved
+
+These are decoded straight from the raw bytes into one __slots__ record per
+character. Each dream keeps a tile index ("who is on (x, y)") and a grid of
+BUCKET_SIZE x BUCKET_SIZE buckets ("who is within N tiles"), both updated
+in O(1) per move, so lookups only touch the tiles or buckets they cover.
+"""
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+BUCKET_SIZE = 8
+MAP_WIDTH = 256   # Furcadia dreams are at most 256 x 256 tiles
+MAP_HEIGHT = 256
+
+
+def base220(data: bytes, start: int, width: int) -> int:
+    """Decode `width` base-220 digits starting at data[start]"""
+    value = 0
+    for i in range(start + width - 1, start - 1, -1):
+        value = value * 220 + (data[i] - 35)
+    return value
+
+
+def shortname(name: str) -> str:
+    """Furcadia's lookup form of a name: lowercase letters and digits only"""
+    return ''.join(ch for ch in name.lower() if ch.isalnum())
+
+
+class Character:
+    """One avatar in the current dream"""
+    __slots__ = ('uid', 'name', 'shortname', 'x', 'y', 'shape')
+
+    def __init__(self, uid: int, name: str, x: int, y: int, shape: int = 0):
+        self.uid = uid
+        self.name = name
+        self.shortname = shortname(name)
+        self.x = x
+        self.y = y
+        self.shape = shape
+
+    @property
+    def position(self) -> Tuple[int, int]:
+        return (self.x, self.y)
+
+    def __repr__(self) -> str:
+        return f'Character({self.uid}, {self.name!r}, x={self.x}, y={self.y})'
+
+
+class DreamState:
+    """Characters in one dream with a tile index and a bucket grid"""
+
+    def __init__(self, name: str = ''):
+        self.name = name
+        self.map = None   # shared DreamMap, when the dream's map file is available
+        self.grid = None  # its walkability grid
+        self.characters: Dict[int, Character] = {}
+        self.by_name: Dict[str, Character] = {}
+        self._tiles: Dict[Tuple[int, int], List[Character]] = {}
+        self._buckets: Dict[Tuple[int, int], Set[Character]] = {}
+
+    def __len__(self) -> int:
+        return len(self.characters)
+
+    def _index(self, character: Character) -> None:
+        tile = (character.x, character.y)
+        occupants = self._tiles.get(tile)
+        if occupants is None:
+            self._tiles[tile] = [character]
+        else:
+            occupants.append(character)
+        bucket = (character.x // BUCKET_SIZE, character.y // BUCKET_SIZE)
+        members = self._buckets.get(bucket)
+        if members is None:
+            self._buckets[bucket] = {character}
+        else:
+            members.add(character)
+
+    def _unindex(self, character: Character) -> None:
+        tile = (character.x, character.y)
+        occupants = self._tiles.get(tile)
+        if occupants is not None:
+            occupants.remove(character)
+            if not occupants:
+                del self._tiles[tile]
+        bucket = (character.x // BUCKET_SIZE, character.y // BUCKET_SIZE)
+        members = self._buckets.get(bucket)
+        if members is not None:
+            members.discard(character)
+            if not members:
+                del self._buckets[bucket]
+
+    def add(self, uid: int, name: str, x: int, y: int, shape: int = 0) -> Character:
+        """Add a character, replacing any previous record with the same uid"""
+        if uid in self.characters:
+            self.remove(uid)
+        character = Character(uid, name, x, y, shape)
+        self.characters[uid] = character
+        if character.shortname:
+            self.by_name[character.shortname] = character
+        self._index(character)
+        return character
+
+    def move(self, uid: int, x: int, y: int, shape: Optional[int] = None) -> Character:
+        """Move a character, creating an unnamed record for unknown uids"""
+        character = self.characters.get(uid)
+        if character is None:
+            return self.add(uid, '', x, y, shape or 0)
+        if character.x != x or character.y != y:
+            old_bucket = (character.x // BUCKET_SIZE, character.y // BUCKET_SIZE)
+            new_bucket = (x // BUCKET_SIZE, y // BUCKET_SIZE)
+            if old_bucket == new_bucket:
+                # Most steps stay inside a bucket; only the tile index changes
+                occupants = self._tiles[(character.x, character.y)]
+                occupants.remove(character)
+                if not occupants:
+                    del self._tiles[(character.x, character.y)]
+                character.x, character.y = x, y
+                tile = self._tiles.get((x, y))
+                if tile is None:
+                    self._tiles[(x, y)] = [character]
+                else:
+                    tile.append(character)
+            else:
+                self._unindex(character)
+                character.x, character.y = x, y
+                self._index(character)
+        if shape is not None:
+            character.shape = shape
+        return character
+
+    def remove(self, uid: int) -> Optional[Character]:
+        """Remove a character; returns the record that was removed"""
+        character = self.characters.pop(uid, None)
+        if character is None:
+            return None
+        self._unindex(character)
+        if self.by_name.get(character.shortname) is character:
+            del self.by_name[character.shortname]
+        return character
+
+    def get(self, name_or_uid) -> Optional[Character]:
+        """Look a character up by uid or by (short)name"""
+        if isinstance(name_or_uid, int):
+            return self.characters.get(name_or_uid)
+        return self.by_name.get(shortname(name_or_uid))
+
+    def at(self, x: int, y: int) -> List[Character]:
+        """Characters standing on tile (x, y)"""
+        return list(self._tiles.get((x, y), ()))
+
+    def near(self, x: int, y: int, radius: int) -> Iterator[Character]:
+        """Characters within `radius` steps of (x, y)
+
+        Distance is in diagonal steps (Chebyshev distance), which is how far
+        apart two avatars are when every move is diagonal.
+        """
+        buckets = self._buckets
+        for bx in range((x - radius) // BUCKET_SIZE, (x + radius) // BUCKET_SIZE + 1):
+            for by in range((y - radius) // BUCKET_SIZE, (y + radius) // BUCKET_SIZE + 1):
+                members = buckets.get((bx, by))
+                if not members:
+                    continue
+                for character in members:
+                    if abs(character.x - x) <= radius and abs(character.y - y) <= radius:
+                        yield character
+
+    def clear(self) -> None:
+        self.characters.clear()
+        self.by_name.clear()
+        self._tiles.clear()
+        self._buckets.clear()
+
+
+class WorldState:
+    """The bot's view of its current dream, fed from raw server lines"""
+
+    def __init__(self):
+        self.dream = DreamState()
+        self.camera: Optional[Tuple[int, int]] = None
+        self.ignored = 0  # lines too short to decode
+
+    def enter_dream(self, name: str = '') -> None:
+        """Start over in a new dream"""
+        self.dream = DreamState(name)
+        self.camera = None
+
+    def on_spawn(self, raw: bytes) -> Optional[Character]:
+        """Handle '<': an avatar arrived (or was redrawn)"""
+        if len(raw) < 11:
+            self.ignored += 1
+            return None
+        uid = base220(raw, 1, 4)
+        x = base220(raw, 5, 2)
+        y = base220(raw, 7, 2)
+        shape = base220(raw, 9, 2)
+        name = ''
+        if len(raw) > 11:
+            length = raw[11] - 35
+            name = raw[12:12 + length].decode('iso-8859-1').replace('|', ' ')
+        return self.dream.add(uid, name, x, y, shape)
+
+    def on_move(self, raw: bytes) -> Optional[Character]:
+        """Handle '/' and 'A': an avatar walked or jumped"""
+        if len(raw) < 9:
+            self.ignored += 1
+            return None
+        shape = base220(raw, 9, 2) if len(raw) >= 11 else None
+        return self.dream.move(base220(raw, 1, 4), base220(raw, 5, 2), base220(raw, 7, 2), shape)
+
+    def on_remove(self, raw: bytes) -> Optional[Character]:
+        """Handle ')': an avatar left"""
+        if len(raw) < 5:
+            self.ignored += 1
+            return None
+        return self.dream.remove(base220(raw, 1, 4))
+
+    def on_camera(self, raw: bytes) -> Optional[Tuple[int, int]]:
+        """Handle '@': the view (our own avatar) moved"""
+        if len(raw) < 5:
+            self.ignored += 1
+            return None
+        self.camera = (base220(raw, 1, 2), base220(raw, 3, 2))
+        return self.camera
+
+    def get_character(self, name_or_uid) -> Optional[Character]:
+        return self.dream.get(name_or_uid)
+
+    def near(self, x: int, y: int, radius: int) -> List[Character]:
+        return list(self.dream.near(x, y, radius))
+
+    def at(self, x: int, y: int) -> List[Character]:
+        return self.dream.at(x, y)
+
+    @staticmethod
+    def in_bounds(x: int, y: int) -> bool:
+        return 0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT
@@ -0,0 +1,169 @@
+"""Single-pass classifier for raw Furcadia server lines
+
+classify_raw() picks a kind for each undecoded line from a prefix table
+keyed on its first byte, so the receive loop can drop lines nobody handles
+before decoding them. parse_classified() finishes the job for the lines it
+keeps: only the parser for that kind of line runs its (precompiled)
+pattern, so lines the bot does not care about cost a dict lookup and
+nothing else.
+
+parse_message() does both steps for a line that is already decoded.
+"""
+import re
+from enum import Enum
+from typing import Callable, Dict, NamedTuple, Optional
+
+
+class MessageType(Enum):
+    """Kinds of server lines the bot understands"""
+    UNKNOWN = 'unknown'
+    DRAGONROAR = 'dragonroar'        # Login greeting, server wants credentials
+    LOGIN_COMPLETE = 'login_complete'  # '&&&&&&&&&&&&&' after a successful login
+    DREAM_LOAD = 'dream_load'        # ']q' dream download request
+    WHISPER = 'whisper'
+    EMOTE = 'emote'
+    CHAT = 'chat'
+    TEXT = 'text'                    # Any other '(' line (system text, other font colors)
+    AVATAR_SPAWN = 'avatar_spawn'    # '<' avatar arrives in the dream
+    AVATAR_MOVE = 'avatar_move'      # '/' walk or 'A' jump
+    AVATAR_REMOVE = 'avatar_remove'  # ')' avatar leaves
+    CAMERA = 'camera'                # '@' our view moved
+
+
+class Message(NamedTuple):
+    """A classified server line"""
+    type: MessageType
+    raw: str
+    name: Optional[str] = None
+    text: Optional[str] = None
+
+
+# Precompiled patterns, one per message kind
+WHISPER_PATTERN = re.compile(r'\<name[^\>]+\>([^\<]+)\<\/name\>[^\"]*\"([^\"]+)\"')
+EMOTE_PATTERN = re.compile(r'\(\<font\scolor\=\'emote\'\>\<name\sshortname\=\'[^\']+\'\>([^\<]+)\<\/name\>\s(.*)\<\/font\>')
+CHAT_PATTERN = re.compile(r'\(\<name\sshortname\=\'[^\']+\'\>([^\<]+)\<\/name\>\:\s(.*)')
+
+FONT_PREFIX = "(<font color='"
+NAME_PREFIX = "(<name "
+LOGIN_COMPLETE = '&&&&&&&&&&&&&'
+
+
+def _parse_whisper(line: str) -> Message:
+    match = WHISPER_PATTERN.search(line)
+    if not match:
+        # Our own "You whisper ..." echo puts the quote before the name
+        return Message(MessageType.TEXT, line)
+    return Message(MessageType.WHISPER, line, match.group(1), match.group(2))
+
+
+def _parse_emote(line: str) -> Message:
+    match = EMOTE_PATTERN.match(line)
+    if not match:
+        return Message(MessageType.TEXT, line)
+    return Message(MessageType.EMOTE, line, match.group(1), match.group(2))
+
+
+def _parse_chat(line: str) -> Message:
+    match = CHAT_PATTERN.match(line)
+    if not match:
+        return Message(MessageType.TEXT, line)
+    return Message(MessageType.CHAT, line, match.group(1), match.group(2))
+
+
+# Message type -> parser for lines already classified from their raw bytes
+_TYPE_PARSERS: Dict[MessageType, Callable[[str], Message]] = {
+    MessageType.WHISPER: _parse_whisper,
+    MessageType.EMOTE: _parse_emote,
+    MessageType.CHAT: _parse_chat,
+}
+
+_RAW_FONT_PREFIX = FONT_PREFIX.encode('ascii')
+_RAW_NAME_PREFIX = NAME_PREFIX.encode('ascii')
+_RAW_LOGIN_COMPLETE = LOGIN_COMPLETE.encode('ascii')
+_RAW_FONT_TYPES = {
+    b'whisper': MessageType.WHISPER,
+    b'emote': MessageType.EMOTE,
+}
+
+
+def _classify_raw_paren(raw: bytes) -> MessageType:
+    if raw.startswith(_RAW_FONT_PREFIX):
+        end = raw.find(b"'", len(_RAW_FONT_PREFIX))
+        return _RAW_FONT_TYPES.get(raw[len(_RAW_FONT_PREFIX):end], MessageType.TEXT)
+    if raw.startswith(_RAW_NAME_PREFIX):
+        return MessageType.CHAT
+    return MessageType.TEXT
+
+
+def _classify_raw_bracket(raw: bytes) -> MessageType:
+    return MessageType.DREAM_LOAD if raw.startswith(b']q') else MessageType.UNKNOWN
+
+
+def _classify_raw_ampersand(raw: bytes) -> MessageType:
+    return MessageType.LOGIN_COMPLETE if raw.rstrip() == _RAW_LOGIN_COMPLETE else MessageType.UNKNOWN
+
+
+def _classify_raw_dragonroar(raw: bytes) -> MessageType:
+    return MessageType.DRAGONROAR if raw.rstrip() == b'Dragonroar' else MessageType.UNKNOWN
+
+
+# First byte of the raw line -> classifier
+_RAW_PREFIX_HANDLERS: Dict[int, Callable[[bytes], MessageType]] = {
+    ord('('): _classify_raw_paren,
+    ord(']'): _classify_raw_bracket,
+    ord('&'): _classify_raw_ampersand,
+    ord('D'): _classify_raw_dragonroar,
+    ord('<'): lambda raw: MessageType.AVATAR_SPAWN,
+    ord('/'): lambda raw: MessageType.AVATAR_MOVE,
+    ord('A'): lambda raw: MessageType.AVATAR_MOVE,
+    ord(')'): lambda raw: MessageType.AVATAR_REMOVE,
+    ord('@'): lambda raw: MessageType.CAMERA,
+}
+
+
+def classify_raw(raw: bytes) -> MessageType:
+    """Classify an undecoded server line by its prefix alone
+
+    No pattern runs here; WHISPER/EMOTE/CHAT results are provisional until
+    parse_classified() extracts their fields.
+
+    Args:
+        raw: The raw line bytes without the trailing newline
+
+    Returns:
+        MessageType: The kind of message the line looks like
+    """
+    if not raw:
+        return MessageType.UNKNOWN
+    handler = _RAW_PREFIX_HANDLERS.get(raw[0])
+    if handler is None:
+        return MessageType.UNKNOWN
+    return handler(raw)
+
+
+def parse_classified(message_type: MessageType, line: str) -> Message:
+    """Build the Message for a line already classified with classify_raw()
+
+    Args:
+        message_type: The result of classify_raw() for this line
+        line: The decoded, stripped line
+
+    Returns:
+        Message: The parsed message
+    """
+    parser = _TYPE_PARSERS.get(message_type)
+    if parser is None:
+        return Message(message_type, line)
+    return parser(line)
+
+
+def parse_message(line: str) -> Message:
+    """Classify and parse a single (already stripped) server line
+
+    Args:
+        line: The decoded server line without its trailing newline
+
+    Returns:
+        Message: The classified message; unrecognised lines are MessageType.UNKNOWN
+    """
+    return parse_classified(classify_raw(line.encode('iso-8859-1', 'replace')), line)
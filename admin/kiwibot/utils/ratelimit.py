@@ -0,0 +1,51 @@
+"""Token bucket rate limiting"""
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Classic token bucket on the monotonic clock
+
+    Tokens refill continuously at `rate` per second up to `capacity`, so a
+    sender may burst up to `capacity` operations and then settles at `rate`.
+    """
+    __slots__ = ('rate', 'capacity', 'tokens', 'stamp')
+
+    def __init__(self, rate: float, capacity: float, now: Optional[float] = None):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError('rate and capacity must be positive')
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = time.monotonic() if now is None else now
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.stamp
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.stamp = now
+
+    def available(self, now: Optional[float] = None) -> float:
+        """Return the number of tokens currently available"""
+        self._refill(time.monotonic() if now is None else now)
+        return self.tokens
+
+    def consume(self, amount: float = 1.0, now: Optional[float] = None) -> bool:
+        """Take `amount` tokens if available
+
+        Returns:
+            bool: True if the tokens were taken, False if the bucket is short
+        """
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens < amount:
+            return False
+        self.tokens -= amount
+        return True
+
+    def delay(self, amount: float = 1.0, now: Optional[float] = None) -> float:
+        """Return the seconds until `amount` tokens will be available"""
+        self._refill(time.monotonic() if now is None else now)
+        missing = amount - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.rate
@@ -0,0 +1,193 @@
+"""Async access to the config database for code running on the event loop
+
+db.config is synchronous: a query, and any wait on the write lock held by
+the admin app or account_manager.py, blocks whichever thread calls it. The
+coroutines here run the same functions on a small dedicated thread pool,
+so the loop keeps reading the server while SQLite works. Each pool thread
+keeps its own connection, as db.config does for every thread.
+
+Concurrent requests are batched:
+
+- Reads are single-flight: identical calls made while one is already
+  running wait for that query and share its result (each caller gets its
+  own copy).
+- Writes made in the same loop iteration are run together in one
+  transaction, one worker hop and one write lock for the lot. Every write
+  is still its own savepoint, so one that fails doesn't undo the others.
+
+    from db.async_config import get_account, set_account
+    account = await get_account(name='default')
+"""
+import asyncio
+import copy
+import functools
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from db import config
+
+DB_WORKERS = 2  # SQLite serializes writes anyway; a second thread keeps reads moving during one
+
+
+class AsyncConfig:
+    """Thread pool, read coalescing and write batching for db.config
+
+    Counters:
+        queries: Calls run on the pool (a write batch counts once)
+        coalesced: Reads that shared a query already in flight
+        batches: Write batches committed
+        writes: Writes run in those batches
+    """
+
+    def __init__(self, workers: int = DB_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._writes: List[Tuple[Callable, tuple, dict, asyncio.Future]] = []
+
+        self.queries = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.writes = 0
+
+    def _attach(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Pending state belongs to the loop that created it
+            self._loop = loop
+            self._inflight = {}
+            self._writes = []
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='kiwibot-db')
+        return loop
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run any db.config function on the pool"""
+        loop = self._attach()
+        self.queries += 1
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _read(self, func: Callable, *args, **kwargs) -> Any:
+        loop = self._attach()
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        future = self._inflight.get(key)
+        if future is None:
+            self.queries += 1
+            future = loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+            self._inflight[key] = future
+            future.add_done_callback(functools.partial(self._read_done, key))
+        else:
+            self.coalesced += 1
+        # Shielded: one caller being cancelled mustn't cancel the others' query
+        return copy.deepcopy(await asyncio.shield(future))
+
+    def _read_done(self, key: Tuple, future: asyncio.Future) -> None:
+        # A write may have already dropped it (and a newer read taken its place)
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    async def _write(self, func: Callable, *args, **kwargs) -> Any:
+        loop = self._attach()
+        future = loop.create_future()
+        if not self._writes:
+            loop.call_soon(self._flush_writes)
+        self._writes.append((func, args, kwargs, future))
+        return await future
+
+    def _flush_writes(self) -> None:
+        writes, self._writes = self._writes, []
+        # Reads started from here on must see these writes
+        self._inflight = {}
+        self.queries += 1
+        self.batches += 1
+        self.writes += len(writes)
+        batch = self._loop.run_in_executor(self._executor, self._run_batch, writes)
+        batch.add_done_callback(functools.partial(self._finish_writes, writes))
+
+    @staticmethod
+    def _run_batch(writes) -> List[Tuple[bool, Any]]:
+        results = []
+        try:
+            with config.transaction():
+                for func, args, kwargs, _ in writes:
+                    try:
+                        with config.transaction():  # savepoint: a failure only undoes this write
+                            results.append((True, func(*args, **kwargs)))
+                    except Exception as e:
+                        results.append((False, e))
+        except sqlite3.OperationalError:
+            if results:
+                raise
+            # The write lock stayed busy: run each write on its own, so each
+            # reports the failure the way the synchronous call does
+            for func, args, kwargs, _ in writes:
+                try:
+                    results.append((True, func(*args, **kwargs)))
+                except Exception as e:
+                    results.append((False, e))
+        return results
+
+    @staticmethod
+    def _finish_writes(writes, batch: asyncio.Future) -> None:
+        error = batch.exception() if not batch.cancelled() else asyncio.CancelledError()
+        results = batch.result() if error is None else [(False, error)] * len(writes)
+        for (_, _, _, future), (ok, value) in zip(writes, results):
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    # db.config API
+
+    async def get_account(self, account_id=None, name=None) -> Optional[dict]:
+        """Async get_account()"""
+        return await self._read(config.get_account, account_id=account_id, name=name)
+
+    async def list_accounts(self) -> List[dict]:
+        """Async list_accounts()"""
+        return await self._read(config.list_accounts)
+
+    async def get_connection_config(self, conn_id=None, account_id=None, account_name=None) -> Optional[dict]:
+        """Async get_connection_config()"""
+        return await self._read(config.get_connection_config, conn_id=conn_id, account_id=account_id,
+                                account_name=account_name)
+
+    async def set_account(self, email, character, password, colors, description, owner,
+                          name="default", account_id=None) -> Optional[int]:
+        """Async set_account(); batched with other writes in the same loop iteration"""
+        return await self._write(config.set_account, email, character, password, colors, description, owner,
+                                 name=name, account_id=account_id)
+
+    async def set_connection_config(self, server, port, account_id=None, account_name=None) -> bool:
+        """Async set_connection_config(); batched with other writes in the same loop iteration"""
+        return await self._write(config.set_connection_config, server, port, account_id=account_id,
+                                 account_name=account_name)
+
+    def shutdown(self) -> None:
+        """Stop the pool threads once queued work finishes (it restarts on next use)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'queries': self.queries,
+            'coalesced': self.coalesced,
+            'inflight': len(self._inflight),
+            'batches': self.batches,
+            'writes': self.writes,
+        }
+
+
+# One pool for the process: every bot shares it
+async_config = AsyncConfig()
+
+get_account = async_config.get_account
+list_accounts = async_config.list_accounts
+get_connection_config = async_config.get_connection_config
+set_account = async_config.set_account
+set_connection_config = async_config.set_connection_config
@@ -2,6 +2,8 @@ import sqlite3
 import json
 import os
 import pathlib
+import threading
+import contextlib
 
 # Ensure data directory exists
 db_dir = pathlib.Path(__file__).parent.parent / "data"
@@ -9,16 +11,193 @@ db_dir.mkdir(exist_ok=True)
 
 DB_PATH = db_dir / "config.db"
 
+# Connection manager
+#
+# Each thread keeps one connection for its lifetime instead of connecting
+# per call. Connections run in autocommit mode with WAL journaling, so the
+# bot, the admin app and account_manager.py can read while another process
+# writes; multi-statement writes go through transaction(), which nests via
+# savepoints so the config functions compose into one atomic unit.
+BUSY_TIMEOUT_MS = 5000
+
+_local = threading.local()
+
+def _configure_connection(conn):
+    """Apply the pragmas every config connection uses"""
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")  # durable at checkpoints, safe with WAL
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
 def get_connection():
-    """Return a connection to the database"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # Enable row factory for dict-like access
+    """Return this thread's connection to the database, opening it on first use"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.path != DB_PATH:
+        if conn is not None:
+            conn.close()
+        conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        conn.row_factory = sqlite3.Row  # Enable row factory for dict-like access
+        _configure_connection(conn)
+        _local.conn = conn
+        _local.path = DB_PATH
+        _local.depth = 0
+        _local.on_commit = []
     return conn
 
-def initialize_database():
-    """Create the database schema if it doesn't exist"""
+def close_connection():
+    """Close this thread's connection (it reopens on next use)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+def in_transaction():
+    """Return True if this thread is inside transaction()"""
+    return getattr(_local, 'depth', 0) > 0
+
+@contextlib.contextmanager
+def transaction():
+    """Run the enclosed config calls as a single transaction
+    
+    The outermost block takes the write lock up front (BEGIN IMMEDIATE) and
+    commits on exit; nested blocks become savepoints, so an inner failure
+    rolls back only its own statements. Any exception rolls back the block.
+    """
     conn = get_connection()
+    depth = _local.depth
+    pending = len(_local.on_commit)
+    
+    if depth == 0:
+        conn.execute("BEGIN IMMEDIATE")
+        generation_before = _read_generation(conn)
+    else:
+        conn.execute(f"SAVEPOINT config_{depth}")
+    _local.depth = depth + 1
+    
+    try:
+        yield conn
+    except BaseException:
+        _local.depth = depth
+        del _local.on_commit[pending:]
+        if depth == 0:
+            conn.execute("ROLLBACK")
+        else:
+            conn.execute(f"ROLLBACK TO config_{depth}")
+            conn.execute(f"RELEASE config_{depth}")
+        raise
+    
+    if depth > 0:
+        _local.depth = depth
+        conn.execute(f"RELEASE config_{depth}")
+        return
+    
+    # Still counted as open until COMMIT succeeds: if it fails (SQLITE_BUSY),
+    # roll back so the connection isn't left inside a transaction
+    try:
+        generation_after = _read_generation(conn)
+        conn.execute("COMMIT")
+    except BaseException:
+        del _local.on_commit[pending:]
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        _local.depth = depth
+    updates, _local.on_commit = _local.on_commit, []
+    _apply_cache_updates(generation_before, generation_after, updates)
+
+def _on_commit(update_cache):
+    """Queue a cache update to run when the outermost transaction commits"""
+    _local.on_commit.append(update_cache)
+
+# Read-through cache for account and connection rows
+#
+# Cached reads cost one "PRAGMA data_version" on a long-lived connection
+# instead of a connect/query/close. data_version changes whenever any other
+# connection commits; when it does we compare the trigger-maintained
+# config_generation counter with the generation the cache was built from.
+# transaction() records the generation before and after each commit in this
+# process, so our own writes update the cache in place, while a write from
+# another process (admin app, account_manager.py) clears it.
+_cache_lock = threading.RLock()
+_cache_conn = None
+_cache_data_version = None
+_cache_generation = None
+_account_cache = {}      # account id -> row dict (None for known misses)
+_account_names = {}      # profile name -> account id (None for known misses)
+_account_list = None
+_connection_cache = {}   # lookup key -> row dict or None
+_connection_list = None
+
+def _clear_cache():
+    """Drop every cached row (call with _cache_lock held)"""
+    global _account_list, _connection_list
+    _account_cache.clear()
+    _account_names.clear()
+    _connection_cache.clear()
+    _account_list = None
+    _connection_list = None
+
+def _read_generation(cursor):
+    """Return the current config_generation counter, or None before initialization"""
     try:
+        row = cursor.execute("SELECT generation FROM config_generation WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+def _validate_cache():
+    """Clear the cache if another process changed the database (call with _cache_lock held)"""
+    global _cache_conn, _cache_data_version, _cache_generation
+    if _cache_conn is None:
+        _cache_conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+        _cache_conn.row_factory = sqlite3.Row
+        _configure_connection(_cache_conn)
+    
+    version = _cache_conn.execute("PRAGMA data_version").fetchone()[0]
+    if version == _cache_data_version:
+        return
+    _cache_data_version = version
+    
+    generation = _read_generation(_cache_conn)
+    if generation is None or generation != _cache_generation:
+        _clear_cache()
+        _cache_generation = generation
+
+def _apply_cache_updates(generation_before, generation_after, updates):
+    """Apply a committed transaction's cache updates
+    
+    The updates only run if the cache was current when the transaction
+    began; otherwise the cache is cleared and reloads on the next read.
+    """
+    global _cache_generation
+    with _cache_lock:
+        if generation_before is not None and generation_before == _cache_generation:
+            for update_cache in updates:
+                update_cache()
+            _cache_generation = generation_after
+        else:
+            _clear_cache()
+            _cache_generation = None
+
+def _cacheable(generation):
+    """True if rows read under `generation` may be stored (call with _cache_lock held)
+    
+    Reads inside a transaction may see uncommitted rows, and a write may
+    have landed while we were querying; neither is safe to cache.
+    """
+    return generation is not None and generation == _cache_generation and not in_transaction()
+
+def clear_cache():
+    """Forget every cached account and connection row"""
+    global _cache_generation
+    with _cache_lock:
+        _clear_cache()
+        _cache_generation = None
+
+def initialize_database():
+    """Create the database schema if it doesn't exist"""
+    with transaction() as conn:
         cursor = conn.cursor()
         
         # Create account table with name field
@@ -46,8 +225,6 @@ def initialize_database():
         )
         ''')
         
-        conn.commit()
-        
         # Check if we need to add the name column to existing table
         cursor.execute("PRAGMA table_info(account)")
         columns = [column[1] for column in cursor.fetchall()]
@@ -56,7 +233,6 @@ def initialize_database():
             # Add name column to existing accounts
             cursor.execute("ALTER TABLE account ADD COLUMN name TEXT")
             cursor.execute("UPDATE account SET name = 'default' WHERE name IS NULL")
-            conn.commit()
             
         # Check if we need to add the account_id column to connection table
         cursor.execute("PRAGMA table_info(connection)")
@@ -66,9 +242,28 @@ def initialize_database():
             # Update connection table
             cursor.execute("ALTER TABLE connection ADD COLUMN account_id INTEGER DEFAULT 1")
             cursor.execute("UPDATE connection SET account_id = 1 WHERE account_id IS NULL")
-            conn.commit()
-    finally:
-        conn.close()
+        
+        # Connection rows are looked up by account when bots start
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_connection_account_id ON connection(account_id)")
+        
+        # Change counter used by the read cache; bumped by every account/connection write
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS config_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO config_generation (id, generation) VALUES (1, 0)")
+        for table in ("account", "connection"):
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_generation
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE config_generation SET generation = generation + 1 WHERE id = 1;
+                END
+                ''')
+    clear_cache()
 
 # Account configuration functions
 def get_account(account_id=None, name=None):
@@ -76,160 +271,313 @@ def get_account(account_id=None, name=None):
     if account_id is None and name is None:
         # Default to ID 1 if neither specified
         account_id = 1
+    
+    with _cache_lock:
+        _validate_cache()
+        generation = _cache_generation
+        if in_transaction():
+            pass  # our own uncommitted writes may not be in the cache yet
+        elif account_id is not None:
+            if account_id in _account_cache:
+                row = _account_cache[account_id]
+                return dict(row) if row else None
+        elif name in _account_names:
+            cached_id = _account_names[name]
+            row = _account_cache.get(cached_id) if cached_id is not None else None
+            if cached_id is None or row is not None:
+                return dict(row) if row else None
         
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
+    cursor = get_connection().cursor()
+    if account_id is not None:
+        cursor.execute("SELECT * FROM account WHERE id = ?", (account_id,))
+    else:
+        cursor.execute("SELECT * FROM account WHERE name = ?", (name,))
+        
+    row = cursor.fetchone()
+    account = dict(row) if row else None
+    
+    with _cache_lock:
+        if not _cacheable(generation):
+            return dict(account) if account else None
         if account_id is not None:
-            cursor.execute("SELECT * FROM account WHERE id = ?", (account_id,))
+            _account_cache[account_id] = account
         else:
-            cursor.execute("SELECT * FROM account WHERE name = ?", (name,))
-            
-        row = cursor.fetchone()
-        if row:
-            return dict(row)
-        return None
-    finally:
-        conn.close()
+            _account_names[name] = account['id'] if account else None
+        if account:
+            _account_cache[account['id']] = account
+            _account_names[account['name']] = account['id']
+    return dict(account) if account else None
 
 def list_accounts():
     """List all available accounts"""
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, name, email, character, owner, colors FROM account ORDER BY id")
-        accounts = [dict(row) for row in cursor.fetchall()]
-        return accounts
-    finally:
-        conn.close()
+    global _account_list
+    with _cache_lock:
+        _validate_cache()
+        generation = _cache_generation
+        if _account_list is not None and not in_transaction():
+            return [dict(account) for account in _account_list]
+    
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT id, name, email, character, owner, colors FROM account ORDER BY id")
+    accounts = [dict(row) for row in cursor.fetchall()]
+    
+    with _cache_lock:
+        if _cacheable(generation):
+            _account_list = accounts
+    return [dict(account) for account in accounts]
 
 def set_account(email, character, password, colors, description, owner, name="default", account_id=None):
     """Set account configuration"""
-    conn = get_connection()
     try:
-        cursor = conn.cursor()
+        with transaction() as conn:
+            cursor = conn.cursor()
         
-        if account_id is not None:
-            # Update existing account by ID
-            cursor.execute('''
-            UPDATE account SET 
-                name = ?,
-                email = ?, 
-                character = ?, 
-                password = ?, 
-                colors = ?, 
-                description = ?,
-                owner = ?
-            WHERE id = ?
-            ''', (name, email, character, password, colors, description, owner, account_id))
-        else:
-            # Check if account with this name already exists
-            cursor.execute("SELECT id FROM account WHERE name = ?", (name,))
-            existing = cursor.fetchone()
-            
-            if existing:
-                # Update existing account by name
+            if account_id is not None:
+                # Update existing account by ID
                 cursor.execute('''
                 UPDATE account SET 
+                    name = ?,
                     email = ?, 
                     character = ?, 
                     password = ?, 
                     colors = ?, 
                     description = ?,
                     owner = ?
-                WHERE name = ?
-                ''', (email, character, password, colors, description, owner, name))
+                WHERE id = ?
+                ''', (name, email, character, password, colors, description, owner, account_id))
             else:
-                # Create new account
-                cursor.execute('''
-                INSERT INTO account (
-                    name, email, character, password, colors, description, owner
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (name, email, character, password, colors, description, owner))
+                # Check if account with this name already exists
+                cursor.execute("SELECT id FROM account WHERE name = ?", (name,))
+                existing = cursor.fetchone()
+            
+                if existing:
+                    # Update existing account by name
+                    cursor.execute('''
+                    UPDATE account SET 
+                        email = ?, 
+                        character = ?, 
+                        password = ?, 
+                        colors = ?, 
+                        description = ?,
+                        owner = ?
+                    WHERE name = ?
+                    ''', (email, character, password, colors, description, owner, name))
+                else:
+                    # Create new account
+                    cursor.execute('''
+                    INSERT INTO account (
+                        name, email, character, password, colors, description, owner
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (name, email, character, password, colors, description, owner))
         
-        conn.commit()
+            # Get the account ID for the connection
+            if account_id is None:
+                cursor.execute("SELECT id FROM account WHERE name = ?", (name,))
+                account_id = cursor.fetchone()[0]
         
-        # Get the account ID for the connection
-        if account_id is None:
-            cursor.execute("SELECT id FROM account WHERE name = ?", (name,))
-            account_id = cursor.fetchone()[0]
-            
-        return account_id
+            cursor.execute("SELECT * FROM account WHERE id = ?", (account_id,))
+            row = cursor.fetchone()
+            account = dict(row) if row else None
+        
+            def update_cache():
+                global _account_list, _connection_list
+                # Forget the old profile name if this write renamed the account
+                for cached_name, cached_id in list(_account_names.items()):
+                    if cached_id == account_id:
+                        del _account_names[cached_name]
+                _account_cache[account_id] = account
+                if account:
+                    _account_names[account['name']] = account_id
+                _account_list = None
+                _connection_list = None
+        
+            _on_commit(update_cache)
+            return account_id
     except Exception as e:
         print(f"Error setting account: {e}")
         return None
-    finally:
-        conn.close()
 
 def delete_account(account_id=None, name=None):
     """Delete an account by ID or name"""
     if account_id is None and name is None:
         return False
         
-    conn = get_connection()
     try:
-        cursor = conn.cursor()
+        with transaction() as conn:
+            cursor = conn.cursor()
         
-        # First get the account ID if name was provided
-        if account_id is None:
-            cursor.execute("SELECT id FROM account WHERE name = ?", (name,))
-            row = cursor.fetchone()
-            if not row:
-                return False
-            account_id = row[0]
+            # First get the account ID if name was provided
+            if account_id is None:
+                cursor.execute("SELECT id FROM account WHERE name = ?", (name,))
+                row = cursor.fetchone()
+                if not row:
+                    return False
+                account_id = row[0]
         
-        # Delete related connection configs
-        cursor.execute("DELETE FROM connection WHERE account_id = ?", (account_id,))
+            # Delete related connection configs
+            cursor.execute("DELETE FROM connection WHERE account_id = ?", (account_id,))
         
-        # Delete the account
-        if account_id is not None:
-            cursor.execute("DELETE FROM account WHERE id = ?", (account_id,))
-        else:
-            cursor.execute("DELETE FROM account WHERE name = ?", (name,))
+            # Delete the account
+            if account_id is not None:
+                cursor.execute("DELETE FROM account WHERE id = ?", (account_id,))
+            else:
+                cursor.execute("DELETE FROM account WHERE name = ?", (name,))
+        
+            def update_cache():
+                global _account_list, _connection_list
+                _account_cache[account_id] = None
+                for cached_name, cached_id in list(_account_names.items()):
+                    if cached_id == account_id:
+                        _account_names[cached_name] = None
+                _account_list = None
+                _connection_list = None
+                _connection_cache.clear()
             
-        conn.commit()
-        return True
+            _on_commit(update_cache)
+            return True
     except Exception as e:
         print(f"Error deleting account: {e}")
         return False
-    finally:
-        conn.close()
 
 # Connection configuration functions
 def get_connection_config(conn_id=None, account_id=None, account_name=None):
-    """Get connection configuration"""
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
+    """Get connection configuration by connection ID, account ID or account name
+    
+    With no arguments the first configured connection is returned.
+    """
+    if conn_id is not None:
+        key = ('id', conn_id)
+    elif account_id is not None:
+        key = ('account', account_id)
+    elif account_name is not None:
+        key = ('name', account_name)
+    else:
+        key = ('first',)
+    
+    with _cache_lock:
+        _validate_cache()
+        generation = _cache_generation
+        if key in _connection_cache and not in_transaction():
+            row = _connection_cache[key]
+            return dict(row) if row else None
+    
+    cursor = get_connection().cursor()
+    if conn_id is not None:
+        cursor.execute("SELECT * FROM connection WHERE id = ?", (conn_id,))
+    elif account_id is not None:
+        cursor.execute("SELECT * FROM connection WHERE account_id = ? ORDER BY id LIMIT 1", (account_id,))
+    elif account_name is not None:
+        cursor.execute("""
+            SELECT c.* FROM connection c
+            JOIN account a ON c.account_id = a.id
+            WHERE a.name = ?
+            ORDER BY c.id LIMIT 1
+        """, (account_name,))
+    else:
+        cursor.execute("SELECT * FROM connection ORDER BY id LIMIT 1")
         
-        if conn_id is not None:
-            cursor.execute("SELECT * FROM connection WHERE id = ?", (conn_id,))
-        else:
-            # Always get the first connection regardless of account
-            cursor.execute("SELECT * FROM connection LIMIT 1")
-            
-        row = cursor.fetchone()
-        if row:
-            return dict(row)
-        return None
-    finally:
-        conn.close()
+    row = cursor.fetchone()
+    config = dict(row) if row else None
+    
+    with _cache_lock:
+        if _cacheable(generation):
+            _connection_cache[key] = config
+    return dict(config) if config else None
+
+# Bulk loading for fleet startup
+ACCOUNT_COLUMNS = ('id', 'name', 'email', 'character', 'password', 'colors', 'description', 'owner')
+_BULK_CHUNK = 500  # stay well under SQLite's bound-parameter limit
+
+def get_accounts_with_connections(account_ids=None, names=None):
+    """Load accounts together with their connection settings in one query
+    
+    Args:
+        account_ids: Account IDs to load
+        names: Profile names to load (ignored when account_ids is given)
+        
+    With neither argument every account is loaded. Returns a list of
+    {'account': {...}, 'connection': {...} or None} records ordered by
+    account ID; requested accounts that don't exist are simply absent.
+    """
+    if account_ids is not None:
+        column, keys = 'a.id', list(account_ids)
+    elif names is not None:
+        column, keys = 'a.name', list(names)
+    else:
+        column, keys = None, None
+    
+    select = f"""
+        SELECT {', '.join('a.' + name for name in ACCOUNT_COLUMNS)},
+               c.id AS connection_id, c.account_id AS connection_account_id, c.server, c.port
+        FROM account a
+        LEFT JOIN connection c ON c.id = (
+            SELECT MIN(id) FROM connection WHERE account_id = a.id
+        )
+    """
+    
+    with _cache_lock:
+        _validate_cache()
+        generation = _cache_generation
+    
+    cursor = get_connection().cursor()
+    rows = []
+    if keys is None:
+        rows = cursor.execute(select + " ORDER BY a.id").fetchall()
+    else:
+        for start in range(0, len(keys), _BULK_CHUNK):
+            chunk = keys[start:start + _BULK_CHUNK]
+            placeholders = ', '.join('?' * len(chunk))
+            rows.extend(cursor.execute(f"{select} WHERE {column} IN ({placeholders})", chunk).fetchall())
+        rows.sort(key=lambda row: row['id'])
+    
+    records = []
+    for row in rows:
+        account = {name: row[name] for name in ACCOUNT_COLUMNS}
+        connection = None
+        if row['connection_id'] is not None:
+            connection = {
+                'id': row['connection_id'],
+                'account_id': row['connection_account_id'],
+                'server': row['server'],
+                'port': row['port']
+            }
+        records.append({'account': account, 'connection': connection})
+    
+    # Warm the per-row caches so later lookups for these bots stay in memory
+    with _cache_lock:
+        if _cacheable(generation):
+            for record in records:
+                account = record['account']
+                _account_cache[account['id']] = account
+                _account_names[account['name']] = account['id']
+                _connection_cache[('account', account['id'])] = record['connection']
+    
+    return [{'account': dict(record['account']),
+             'connection': dict(record['connection']) if record['connection'] else None}
+            for record in records]
 
 def list_connection_configs():
     """List all connection configurations with account names"""
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT c.id, c.account_id, c.server, c.port, a.name as account_name
-            FROM connection c
-            JOIN account a ON c.account_id = a.id
-            ORDER BY a.name
-        """)
-        connections = [dict(row) for row in cursor.fetchall()]
-        return connections
-    finally:
-        conn.close()
+    global _connection_list
+    with _cache_lock:
+        _validate_cache()
+        generation = _cache_generation
+        if _connection_list is not None and not in_transaction():
+            return [dict(connection) for connection in _connection_list]
+    
+    cursor = get_connection().cursor()
+    cursor.execute("""
+        SELECT c.id, c.account_id, c.server, c.port, a.name as account_name
+        FROM connection c
+        JOIN account a ON c.account_id = a.id
+        ORDER BY a.name
+    """)
+    connections = [dict(row) for row in cursor.fetchall()]
+    
+    with _cache_lock:
+        if _cacheable(generation):
+            _connection_list = connections
+    return [dict(connection) for connection in connections]
 
 def set_connection_config(server, port, account_id=None, account_name=None):
     """Set connection configuration for an account"""
@@ -243,108 +591,67 @@ def set_connection_config(server, port, account_id=None, account_name=None):
         # Default to account ID 1
         account_id = 1
     
-    conn = get_connection()
     try:
-        cursor = conn.cursor()
-        # Check if connection exists for this account
-        cursor.execute("SELECT id FROM connection WHERE account_id = ?", (account_id,))
-        existing = cursor.fetchone()
+        with transaction() as conn:
+            cursor = conn.cursor()
+            # Check if connection exists for this account
+            cursor.execute("SELECT id FROM connection WHERE account_id = ?", (account_id,))
+            existing = cursor.fetchone()
         
-        if existing:
-            # Update existing connection
-            cursor.execute('''
-            UPDATE connection SET 
-                server = ?, 
-                port = ?
-            WHERE account_id = ?
-            ''', (server, port, account_id))
-        else:
-            # Create new connection
-            cursor.execute('''
-            INSERT INTO connection (
-                account_id, server, port
-            ) VALUES (?, ?, ?)
-            ''', (account_id, server, port))
+            if existing:
+                # Update existing connection
+                cursor.execute('''
+                UPDATE connection SET 
+                    server = ?, 
+                    port = ?
+                WHERE account_id = ?
+                ''', (server, port, account_id))
+            else:
+                # Create new connection
+                cursor.execute('''
+                INSERT INTO connection (
+                    account_id, server, port
+                ) VALUES (?, ?, ?)
+                ''', (account_id, server, port))
+        
+            def update_cache():
+                global _connection_list
+                _connection_cache.clear()
+                _connection_list = None
         
-        conn.commit()
-        return True
+            _on_commit(update_cache)
+            return True
     except Exception as e:
         print(f"Error setting connection: {e}")
         return False
-    finally:
-        conn.close()
 
 # Migration from old key-value store to relational tables
 def migrate_from_old_format():
     """Migrate from the old key-value format to the new relational format"""
-    conn = get_connection()
     try:
-        # Check if old table exists
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='config'")
-        if not cursor.fetchone():
-            print("Old config table not found, nothing to migrate")
-            return False
-            
-        # Get data from old table
-        cursor.execute("SELECT key, value FROM config")
-        old_config = {}
-        for key, value in cursor.fetchall():
-            try:
-                old_config[key] = json.loads(value)
-            except:
-                old_config[key] = value
-                
-        # Migrate account data
-        account_id = None
-        if 'account' in old_config and isinstance(old_config['account'], list) and len(old_config['account']) > 0:
-            account = old_config['account'][0]
-            account_id = set_account(
-                name="default",
-                email=account.get('email', ''),
-                character=account.get('character', ''),
-                password=account.get('password', ''),
-                colors=account.get('colors', ''),
-                description=account.get('desc', ''),
-                owner=account.get('owner', '')
-            )
+        with transaction() as conn:
+            # Check if old table exists
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='config'")
+            if not cursor.fetchone():
+                print("Old config table not found, nothing to migrate")
+                return False
             
-        # Migrate connection data
-        if 'connection' in old_config and isinstance(old_config['connection'], list) and len(old_config['connection']) > 0:
-            connection = old_config['connection'][0]
-            set_connection_config(
-                server=connection.get('server', ''),
-                port=connection.get('port', 0),
-                account_id=account_id
-            )
+            # Get data from old table
+            cursor.execute("SELECT key, value FROM config")
+            old_config = {}
+            for key, value in cursor.fetchall():
+                try:
+                    old_config[key] = json.loads(value)
+                except:
+                    old_config[key] = value
                 
-        # Rename old table for backup
-        cursor.execute("ALTER TABLE config RENAME TO config_old")
-        conn.commit()
-        return True
-    except Exception as e:
-        print(f"Error migrating old format: {e}")
-        return False
-    finally:
-        conn.close()
-
-# Import from JSON file to relational structure
-def import_from_json(json_path, profile_name="default"):
-    """Import configuration from a JSON file"""
-    try:
-        with open(json_path, 'r') as f:
-            config_data = json.load(f)
-        
-        conn = get_connection()
-        try:
-            conn.execute("BEGIN TRANSACTION")
-            
-            # Import account data
+            # Migrate account data
             account_id = None
-            if 'account' in config_data and isinstance(config_data['account'], list) and len(config_data['account']) > 0:
-                account = config_data['account'][0]
+            if 'account' in old_config and isinstance(old_config['account'], list) and len(old_config['account']) > 0:
+                account = old_config['account'][0]
                 account_id = set_account(
-                    name=profile_name,
+                    name="default",
                     email=account.get('email', ''),
                     character=account.get('character', ''),
                     password=account.get('password', ''),
@@ -352,24 +659,62 @@ def import_from_json(json_path, profile_name="default"):
                     description=account.get('desc', ''),
                     owner=account.get('owner', '')
                 )
-                
-            # Import connection data
-            if 'connection' in config_data and isinstance(config_data['connection'], list) and len(config_data['connection']) > 0:
-                connection = config_data['connection'][0]
+            
+            # Migrate connection data
+            if 'connection' in old_config and isinstance(old_config['connection'], list) and len(old_config['connection']) > 0:
+                connection = old_config['connection'][0]
                 set_connection_config(
                     server=connection.get('server', ''),
                     port=connection.get('port', 0),
                     account_id=account_id
                 )
+                
+            # Rename old table for backup
+            cursor.execute("ALTER TABLE config RENAME TO config_old")
+            return True
+    except Exception as e:
+        print(f"Error migrating old format: {e}")
+        return False
+
+# Import from JSON file to relational structure
+def import_from_json(json_path, profile_name="default"):
+    """Import configuration from a JSON file"""
+    try:
+        with open(json_path, 'r') as f:
+            config_data = json.load(f)
+        
+        try:
+            # One transaction: the nested set_* calls commit or roll back together
+            with transaction():
+                # Import account data
+                account_id = None
+                if 'account' in config_data and isinstance(config_data['account'], list) and len(config_data['account']) > 0:
+                    account = config_data['account'][0]
+                    account_id = set_account(
+                        name=profile_name,
+                        email=account.get('email', ''),
+                        character=account.get('character', ''),
+                        password=account.get('password', ''),
+                        colors=account.get('colors', ''),
+                        description=account.get('desc', ''),
+                        owner=account.get('owner', '')
+                    )
+                    if account_id is None:
+                        raise ValueError("account could not be saved")
                     
-            conn.commit()
+                # Import connection data
+                if 'connection' in config_data and isinstance(config_data['connection'], list) and len(config_data['connection']) > 0:
+                    connection = config_data['connection'][0]
+                    if not set_connection_config(
+                        server=connection.get('server', ''),
+                        port=connection.get('port', 0),
+                        account_id=account_id
+                    ):
+                        raise ValueError("connection could not be saved")
             return True
         except Exception as e:
-            conn.rollback()
             print(f"Failed to import config: {e}")
             return False
-        finally:
-            conn.close()
     except Exception as e:
         print(f"Error reading config file: {e}")
-        return False 
\ No newline at end of file
+        return False
\ No newline at end of file
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
-import time
+from typing import Any
+from admin.kiwibot.core.cooldowns import cooldowns
 
 class Command(ABC):
     """Base class for all bot commands."""
@@ -11,8 +11,11 @@ class Command(ABC):
         self.aliases: list[str] = []
         self.description: str = ""
         self.usage: str = ""
-        self.cooldown: float = 0.0  # seconds
-        self.last_used: Dict[str, float] = {}  # account_id -> timestamp
+        self.cooldown: float = 0.0  # seconds per use, per user
+        self.burst: int = 1  # uses a user may make back to back
+        self.global_cooldown: float = 0.0  # seconds per use across all users
+        self.global_burst: int = 1
+        self.timeout: float = 30.0  # seconds before execute() is cancelled, 0 for none
     
     @abstractmethod
     async def execute(self, account_id: str, args: list[str]) -> None:
@@ -24,6 +27,18 @@ class Command(ABC):
         """
         pass
     
+    def check_cooldown(self, account_id: str) -> float:
+        """Use the command once if its cooldowns allow it.
+        
+        Args:
+            account_id: The ID of the account trying to execute the command
+            
+        Returns:
+            float: 0.0 if the command may run now, otherwise seconds to wait
+        """
+        return cooldowns.check(self.name, account_id, self.cooldown, self.burst,
+                               self.global_cooldown, self.global_burst)
+    
     def can_execute(self, account_id: str) -> bool:
         """Check if the command can be executed (cooldown check).
         
@@ -33,17 +48,19 @@ class Command(ABC):
         Returns:
             bool: True if the command can be executed, False otherwise
         """
-        if self.cooldown <= 0:
-            return True
-            
-        current_time = time.time()
-        last_used = self.last_used.get(account_id, 0)
+        return self.check_cooldown(account_id) <= 0
+    
+    def cooldown_remaining(self, account_id: str) -> float:
+        """Get the seconds until the account may use the command again.
         
-        if current_time - last_used < self.cooldown:
-            return False
+        Args:
+            account_id: The ID of the account
             
-        self.last_used[account_id] = current_time
-        return True
+        Returns:
+            float: Seconds to wait, 0.0 if the command is ready
+        """
+        return cooldowns.remaining(self.name, account_id, self.cooldown, self.burst,
+                                   self.global_cooldown, self.global_burst)
     
     def get_help(self) -> str:
         """Get help text for the command.
@@ -60,4 +77,6 @@ class Command(ABC):
             help_text += f"\nUsage: {self.usage}"
         if self.cooldown > 0:
             help_text += f"\nCooldown: {self.cooldown}s"
+            if self.burst > 1:
+                help_text += f" (burst of {self.burst})"
         return help_text 
\ No newline at end of file
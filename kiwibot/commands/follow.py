@@ -0,0 +1,33 @@
+from typing import List, Any
+from .base import Command
+
+class FollowCommand(Command):
+    """Keeps walking after another character."""
+
+    def __init__(self, bot: Any):
+        super().__init__(bot)
+        self.name = "follow"
+        self.aliases = ["fol"]
+        self.description = "Follow a character around the dream"
+        self.usage = "!follow <name> | !follow stop"
+        self.cooldown = 1.0
+
+    async def execute(self, account_id: str, args: List[str]) -> None:
+        if not args:
+            following = self.bot.navigator.following
+            await self.bot.reply(account_id, f"Following {following}" if following else f"Usage: {self.usage}")
+            return
+
+        name = " ".join(args)
+        if name.lower() == "stop":
+            self.bot.navigator.stop()
+            await self.bot.reply(account_id, "Stopped following")
+            return
+
+        if self.bot.movement.position is None:
+            await self.bot.reply(account_id, "I don't know where I am yet")
+            return
+        if not self.bot.navigator.follow(name):
+            await self.bot.reply(account_id, f"{name} isn't here")
+            return
+        await self.bot.reply(account_id, f"Following {name}")
@@ -0,0 +1,35 @@
+from typing import List, Any
+from .base import Command
+
+class GotoCommand(Command):
+    """Walks to a tile using the pathfinder."""
+
+    def __init__(self, bot: Any):
+        super().__init__(bot)
+        self.name = "goto"
+        self.aliases = ["walkto"]
+        self.description = "Walk to a position, going around obstacles"
+        self.usage = "!goto <x> <y>"
+        self.cooldown = 1.0
+
+    async def execute(self, account_id: str, args: List[str]) -> None:
+        if len(args) != 2:
+            await self.bot.reply(account_id, f"Usage: {self.usage}")
+            return
+        try:
+            x, y = int(args[0]), int(args[1])
+        except ValueError:
+            await self.bot.reply(account_id, "Coordinates must be numbers")
+            return
+        if not self.bot.is_valid_position(x, y):
+            await self.bot.reply(account_id, "That position is outside the dream")
+            return
+
+        if self.bot.movement.position is None:
+            await self.bot.reply(account_id, "I don't know where I am yet")
+            return
+        steps = await self.bot.navigator.goto(x, y)
+        if steps is None:
+            await self.bot.reply(account_id, f"No route to {x},{y}")
+        else:
+            await self.bot.reply(account_id, f"Walking to {x},{y} ({steps} step(s))")
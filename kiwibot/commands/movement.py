@@ -1,61 +1,59 @@
 from typing import List, Any
 from .base import Command
+from admin.kiwibot.core.movement import DIRECTIONS, MAX_ROUTE
 
 class MovementCommand(Command):
     """Handles movement-related commands."""
-    
+
     def __init__(self, bot: Any):
         super().__init__(bot)
         self.name = "move"
         self.aliases = ["walk", "run", "go"]
         self.description = "Move your character in a direction"
-        self.usage = "!move <direction> [steps]"
+        self.usage = "!move <direction> [steps] [<direction> [steps] ...] | !move to <x> <y> | !move stop"
         self.cooldown = 0.5  # 500ms cooldown
-        
+
     async def execute(self, account_id: str, args: List[str]) -> None:
         if not args:
-            await self.bot.send_message(account_id, "Please specify a direction (nw, sw, ne, se)")
-            return
-            
-        direction = args[0].lower()
-        steps = 1
-        if len(args) > 1:
-            try:
-                steps = int(args[1])
-            except ValueError:
-                await self.bot.send_message(account_id, "Invalid number of steps")
-                return
-                
-        if direction not in ["nw", "sw", "ne", "se"]:
-            await self.bot.send_message(account_id, "Invalid direction. Use nw, sw, ne, or se")
+            await self.bot.reply(account_id, "Please specify a direction (nw, sw, ne, se)")
             return
-            
-        # Get character position
-        char = self.bot.get_character(account_id)
-        if not char:
-            await self.bot.send_message(account_id, "Character not found")
+
+        if args[0].lower() == "stop":
+            steps = self.bot.navigator.stop()
+            await self.bot.reply(account_id, f"Stopped, dropped {steps} step(s)")
             return
-            
-        # Calculate new position
-        x, y = char.position
-        if direction == "nw":
-            x -= steps
-            y -= steps
-        elif direction == "sw":
-            x -= steps
-            y += steps
-        elif direction == "ne":
-            x += steps
-            y -= steps
-        elif direction == "se":
-            x += steps
-            y += steps
-            
-        # Check if new position is valid
-        if not self.bot.is_valid_position(x, y):
-            await self.bot.send_message(account_id, "Cannot move there")
+
+        if args[0].lower() == "to":
+            # Same as !goto: route around obstacles with the pathfinder
+            goto = self.bot.commands.get("goto")
+            if goto is None:
+                await self.bot.reply(account_id, "Routing is unavailable right now, try again shortly")
+                return
+            await goto.execute(account_id, args[1:])
             return
-            
-        # Update position
-        char.position = (x, y)
-        await self.bot.send_message(account_id, f"Moved {direction} {steps} step(s)") 
\ No newline at end of file
+
+        # Build the whole route first so a bad argument queues nothing
+        route = []
+        i = 0
+        while i < len(args):
+            direction = args[i].lower()
+            if direction not in DIRECTIONS:
+                await self.bot.reply(account_id, "Invalid direction. Use nw, sw, ne, or se")
+                return
+            steps = 1
+            if i + 1 < len(args) and args[i + 1].lower() not in DIRECTIONS:
+                try:
+                    steps = int(args[i + 1])
+                except ValueError:
+                    await self.bot.reply(account_id, "Invalid number of steps")
+                    return
+                i += 1
+            if steps < 1 or len(route) + steps > MAX_ROUTE:
+                await self.bot.reply(account_id, f"Steps must be between 1 and {MAX_ROUTE}")
+                return
+            route.extend([direction] * steps)
+            i += 1
+
+        # The planner walks in the background, merging steps that cancel out
+        queued = self.bot.movement.walk(route)
+        await self.bot.reply(account_id, f"Moving {len(route)} step(s), {queued} queued")
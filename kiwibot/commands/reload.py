@@ -0,0 +1,24 @@
+from typing import List, Any
+from .base import Command
+
+class ReloadCommand(Command):
+    """Reloads edited command modules without reconnecting."""
+
+    def __init__(self, bot: Any):
+        super().__init__(bot)
+        self.name = "reload"
+        self.aliases = ["rl"]
+        self.description = "Reload command modules that changed on disk"
+        self.usage = "!reload"
+        self.cooldown = 2.0
+
+    async def execute(self, account_id: str, args: List[str]) -> None:
+        result = self.bot.reload_commands()
+        if result['failed']:
+            failed = ", ".join(f"{module.rsplit('.', 1)[-1]} ({error})" for module, error in result['failed'].items())
+            await self.bot.reply(account_id, f"Reload failed, still running the old code: {failed}")
+        elif result['reloaded']:
+            reloaded = ", ".join(module.rsplit('.', 1)[-1] for module in result['reloaded'])
+            await self.bot.reply(account_id, f"Reloaded {reloaded}")
+        else:
+            await self.bot.reply(account_id, "No command changes to reload")
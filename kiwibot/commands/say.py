@@ -14,7 +14,7 @@ class SayCommand(Command):
         
     async def execute(self, account_id: str, args: List[str]) -> None:
         if not args:
-            await self.bot.send_message(account_id, "Please provide a message to say")
+            await self.bot.reply(account_id, "Please provide a message to say")
             return
             
         message = " ".join(args)
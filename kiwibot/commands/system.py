@@ -15,13 +15,13 @@ class SystemCommand(Command):
         
     async def execute(self, account_id: str, args: List[str]) -> None:
         if not args:
-            await self.bot.send_message(account_id, "Please specify a system command")
+            await self.bot.reply(account_id, "Please specify a system command")
             return
             
         command = args[0].lower()
         
         if command == "quit":
-            await self.bot.send_message(account_id, "\"Disconnecting...")
+            await self.bot.send_message("\"Disconnecting...")
             await asyncio.sleep(5)
             self.bot.running = False
         else:
@@ -1,208 +1,512 @@
 import asyncio
-import logging
-import os
-import datetime
-import json
-import re
 import argparse
-from pathlib import Path
-from typing import Optional, Dict
+import math
+import time
+from typing import Optional
 from kiwibot.__version__ import __version__, __title__, __description__
-from db.config import initialize_database, get_account, get_connection_config, migrate_from_old_format, list_accounts
-from kiwibot.commands.base import Command
-from kiwibot.commands.movement import MovementCommand
-from kiwibot.commands.say import SayCommand
-from kiwibot.commands.system import SystemCommand
+from db.config import (
+    initialize_database, get_account, get_connection_config, migrate_from_old_format,
+    list_accounts, get_accounts_with_connections
+)
+from db.async_config import async_config
+from admin.kiwibot.core.connection import FurcadiaConnection, open_connection
+from admin.kiwibot.core.capture import TrafficCapture, capture_path_for
+from admin.kiwibot.core.commands import CommandTable, default_registry
+from admin.kiwibot.core.scheduler import CommandScheduler
+from admin.kiwibot.core.movement import MovementPlanner, DEFAULT_STEP_INTERVAL
+from admin.kiwibot.core.world import WorldState, Character
+from admin.kiwibot.core.pathfinding import Navigator
+from admin.kiwibot.core.maps import MapLibrary
+from admin.kiwibot.core.reconnect import Backoff, ReconnectStats, DEFAULT_CONNECT_TIMEOUT, DEFAULT_BACKOFF_CAP
+from admin.kiwibot.core.events import (
+    EventBus, Whisper, Chat, Emote, Arrival, Departure, LoginComplete, Disconnect, load_plugins
+)
+from admin.kiwibot.core.status import StatusPublisher, DEFAULT_STATUS_PORT
+from admin.kiwibot.core.control import ControlServer
+from admin.kiwibot.core.metrics import metrics, serve as serve_metrics, DEFAULT_METRICS_PORT
+from admin.kiwibot.core.profiling import (
+    HotPathProfiler, DEFAULT_SLOW_CALLBACK, DEFAULT_REPORT_INTERVAL, DEFAULT_PROFILE_DIR, DUMP_FORMATS
+)
+from admin.kiwibot.core.logging import setup_logging, shutdown_logging, get_bot_logger, console, ECHO_MODES
+from admin.kiwibot.core.send_queue import SendQueue, DEFAULT_SEND_RATE, DEFAULT_SEND_BURST
+from admin.kiwibot.utils.message_parser import Message, MessageType, classify_raw, parse_classified
 
 class KiwiBot:
     """
     KiwiBot client for Furcadia
     Handles connection, message parsing, and command processing
     """
-    def __init__(self, account_id=None, account_name=None, debug: bool = False):
-        self.account = get_account(account_id=account_id, name=account_name)
-        self.connection = get_connection_config(account_id=account_id, account_name=account_name)
+    def __init__(self, account_id=None, account_name=None, debug: bool = False,
+                 account: Optional[dict] = None, connection: Optional[dict] = None,
+                 send_rate: float = DEFAULT_SEND_RATE, send_burst: int = DEFAULT_SEND_BURST,
+                 capture_path: Optional[str] = None, step_interval: float = DEFAULT_STEP_INTERVAL,
+                 maps: Optional[MapLibrary] = None, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 reconnect: bool = True, backoff_cap: float = DEFAULT_BACKOFF_CAP):
+        # Fleet startup passes preloaded rows so each bot skips the DB round trips
+        self.account = account if account is not None else get_account(account_id=account_id, name=account_name)
+        self.connection = connection if connection is not None else get_connection_config(account_id=account_id, account_name=account_name)
         
-        self.reader: Optional[asyncio.StreamReader] = None
-        self.writer: Optional[asyncio.StreamWriter] = None
+        self.conn: Optional[FurcadiaConnection] = None
         self.connected = False
-        self.running = True
+        self._running = True
         self.debug = debug  # Store debug flag
+        self._keepalive_task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self.capture = TrafficCapture(capture_path) if capture_path else None
+        
+        # Reconnect supervision: run() keeps reconnecting until the bot is stopped
+        self.connect_timeout = connect_timeout
+        self.reconnect = reconnect
+        self.backoff = Backoff(cap=backoff_cap)
+        self.reconnects = ReconnectStats()
+        self._bytes_in = 0   # from earlier connections; the current one keeps its own
+        self._bytes_out = 0
+        
+        # Reported on the status channel
+        self.started_at = time.time()
+        self.connected_since: Optional[float] = None
+        self.lines_in = 0
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[float] = None
         
         # Bot information
         self.app_name = __title__
         self.app_vers = __version__
         
-        # Command handling
-        self.commands: Dict[str, Command] = {}
-        self._register_commands()
+        # Command handling: commands are looked up in the shared registry and
+        # instantiated for this bot the first time they are used
+        self.commands = CommandTable(self)
+        
+        # Message type -> handler, used by the receive loop
+        self.message_handlers = {
+            MessageType.DRAGONROAR: self.handle_login,
+            MessageType.LOGIN_COMPLETE: self.handle_dream_load,
+            MessageType.DREAM_LOAD: self.handle_dream_load,
+            MessageType.WHISPER: self.handle_whisper,
+            MessageType.EMOTE: self.handle_emote,
+            MessageType.CHAT: self.handle_chat,
+        }
+        
+        # Avatar lines are decoded from raw bytes into the world model,
+        # skipping the text decode and Message construction entirely
+        self.world = WorldState()
+        self.maps = maps  # shared by the fleet, so bots in one dream share its map
+        self.raw_handlers = {
+            MessageType.AVATAR_SPAWN: self.handle_spawn,
+            MessageType.AVATAR_MOVE: self.world.on_move,
+            MessageType.AVATAR_REMOVE: self.handle_remove,
+            MessageType.CAMERA: self.handle_camera,
+        }
         
         # Load credentials from config
-        if self.account:
-            self.email = self.account.get('email', '')
-            self.character = self.account.get('character', '')
-            self.password = self.account.get('password', '')
-            self.colors = self.account.get('colors', '')
-            self.desc = f"{self.account.get('description', '')} [{self.app_name} v{self.app_vers}]"
-            self.owner = self.account.get('owner', '')
-        else:
-            self.email = ''
-            self.character = ''
-            self.password = ''
-            self.colors = ''
-            self.desc = f"[{self.app_name} v{self.app_vers}]"
-            self.owner = ''
+        self._load_credentials()
         
         # Configure logging
         self._setup_logger()
-            
-    def _setup_logger(self):
-        """Configure logging with timestamp-based filename"""
-        log_dir = Path('logs')
-        log_dir.mkdir(exist_ok=True)
         
-        timestamp = int(datetime.datetime.now().timestamp())
-        log_file = log_dir / f'kiwibot_{timestamp}.log'
+        self.outbound = SendQueue(rate=send_rate, burst=send_burst, log=self.log)
+        
+        # Commands run as tasks so they never hold up the read loop
+        self.scheduler = CommandScheduler(self.log)
+        self.movement = MovementPlanner(self.send_message, step_interval=step_interval, log=self.log)
+        self.navigator = Navigator(self.movement, self.world, log=self.log)
+        self._setup_metrics()
         
-        logging.basicConfig(
-            filename=str(log_file),
-            encoding='utf-8',
-            level=logging.DEBUG,
-            format='%(asctime)s [%(levelname)s] %(message)s',
-            datefmt='%m-%d-%Y %H:%M:%S%z'
+        # Plugins subscribe to typed events; chat and emote lines are only
+        # parsed while something (such as the console echo) listens for them
+        self.events = EventBus(self.log)
+        self.events.on_change(self._update_dispatch)
+        self._update_dispatch()
+        if console.mode != 'off':
+            self.events.subscribe(Chat, self.echo_chat)
+            self.events.subscribe(Emote, self.echo_emote)
+        self.plugins = load_plugins(self)
+            
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    @running.setter
+    def running(self, value: bool) -> None:
+        self._running = value
+        if not value and self.conn and not self.conn.closed:
+            # Commands stop the bot from their own tasks; closing the
+            # connection wakes the read loop so it notices
+            self.conn.close()
+
+    @classmethod
+    def from_record(cls, record: dict, **kwargs) -> 'KiwiBot':
+        """Create a bot from a get_accounts_with_connections() record without querying the DB"""
+        return cls(
+            account_id=record['account']['id'],
+            account=record['account'],
+            connection=record['connection'] or {},
+            **kwargs
+        )
+
+    def _setup_logger(self):
+        """Attach this bot's logger to the shared non-blocking pipeline"""
+        # No-op when main() already configured logging for the process
+        setup_logging()
+        self.log = get_bot_logger(self.account['name'] if self.account else 'default')
+        self.log.info('Bot starting up (%s)...', self.character or 'unknown')
+
+    def _note_error(self, text: str) -> None:
+        """Remember the latest error for the status channel"""
+        self.last_error = text
+        self.last_error_at = time.time()
+
+    def _update_dispatch(self):
+        """Recompute the message types nobody needs parsed"""
+        self._idle_types = frozenset(
+            message_type
+            for message_type, event_type in ((MessageType.CHAT, Chat), (MessageType.EMOTE, Emote))
+            if not self.events.wants(event_type)
         )
-        logging.info('Bot starting up...')
+
+    def _setup_metrics(self):
+        """Create this bot's metric children and register its scrape-time collector"""
+        self.metrics_name = self.account['name'] if self.account else 'default'
+        self._inbound_lines = metrics.counter(
+            'kiwibot_inbound_lines_total', 'Server lines received, by message type', ('bot', 'type'))
+        self._inbound_by_type = {}  # MessageType -> counter child
+        self._parse_seconds = metrics.histogram(
+            'kiwibot_parse_seconds', 'Time to decode and parse one handled line', ('bot',)).labels(self.metrics_name)
+        self._busy_seconds = metrics.counter(
+            'kiwibot_busy_seconds_total', 'Time spent processing server lines, by dream', ('bot', 'dream'))
+        self._command_seconds = metrics.histogram(
+            'kiwibot_command_seconds', 'handle_command latency, by command', ('bot', 'command'))
+        self._cooldown_rejections = metrics.counter(
+            'kiwibot_cooldown_rejections_total', 'Commands refused because of a cooldown', ('bot', 'command'))
+        self._reconnect_seconds = metrics.histogram(
+            'kiwibot_reconnect_seconds', 'Time from a disconnect to the next completed login', ('bot',),
+            buckets=(0.5, 1, 2, 5, 10, 30, 60, 120, 300)).labels(self.metrics_name)
+        metrics.add_collector(self._collect_metrics)
+
+    def _collect_metrics(self):
+        """Values that live on other objects, read at scrape time"""
+        labels = {'bot': self.metrics_name}
+        bytes_in, bytes_out = self._bytes_in, self._bytes_out
+        if self.connected and self.conn:
+            bytes_in += self.conn.bytes_in
+            bytes_out += self.conn.bytes_out
+        outbound = self.outbound.stats()
+        reconnect = self.reconnects.stats()
+        scheduler = self.scheduler.stats()
+        return [
+            ('kiwibot_connected', 'gauge', 'Whether the bot is connected', [(labels, self.connected)]),
+            ('kiwibot_bytes_in_total', 'counter', 'Bytes received from the server', [(labels, bytes_in)]),
+            ('kiwibot_bytes_out_total', 'counter', 'Bytes written to the server', [(labels, bytes_out)]),
+            ('kiwibot_send_queue_depth', 'gauge', 'Outbound lines waiting to be sent', [(labels, outbound['depth'])]),
+            ('kiwibot_sent_lines_total', 'counter', 'Outbound lines written', [(labels, outbound['sent'])]),
+            ('kiwibot_send_dropped_total', 'counter', 'Outbound lines dropped because the queue was full',
+             [(labels, outbound['dropped'])]),
+            ('kiwibot_send_delayed_total', 'counter', 'Outbound lines held back by the rate limiter',
+             [(labels, outbound['delayed'])]),
+            ('kiwibot_disconnects_total', 'counter', 'Connections lost', [(labels, reconnect['disconnects'])]),
+            ('kiwibot_reconnects_total', 'counter', 'Outages that ended in a new login', [(labels, reconnect['reconnects'])]),
+            ('kiwibot_reconnect_failures_total', 'counter', 'Reconnect attempts that failed',
+             [(labels, reconnect['failures'])]),
+            ('kiwibot_commands_running', 'gauge', 'Commands currently executing', [(labels, scheduler['running'])]),
+            ('kiwibot_commands_queued', 'gauge', 'Commands waiting behind another from the same user',
+             [(labels, scheduler['queued'])]),
+            ('kiwibot_dream_characters', 'gauge', 'Characters in the current dream',
+             [(dict(labels, dream=self.world.dream.name), len(self.world.dream))]),
+        ]
 
     async def connect(self):
-        """Establish connection to Furcadia server"""
-        try:
-            if not self.connection:
-                logging.error('Connection configuration not found')
-                raise ValueError('Connection configuration missing')
-                
-            server = self.connection.get('server', '')
-            port = self.connection.get('port', 0)
+        """Establish connection to Furcadia server
+        
+        Raises:
+            ValueError: If the connection isn't configured (retrying won't help)
+            ConnectionError: If the server can't be reached in time
+        """
+        if not self.connection:
+            self.log.error('Connection configuration not found')
+            raise ValueError('Connection configuration missing')
             
-            if not server or not port:
-                logging.error('Server or port not configured')
-                raise ValueError('Server configuration missing')
-                
-            # Connect using asyncio's high-level API with timeout
-            try:
-                self.reader, self.writer = await asyncio.wait_for(
-                    asyncio.open_connection(server, port),
-                    timeout=10.0  # 10 second timeout
-                )
-                self.connected = True
-                logging.info(f'Connected to {server}:{port}')
-            except asyncio.TimeoutError:
-                logging.error(f'Connection timed out after 10 seconds')
-                raise ValueError('Connection timed out - server may be down or unreachable')
-            except ConnectionRefusedError:
-                logging.error('Connection refused - server may be down or port blocked')
-                raise ValueError('Connection refused - check if server is running and port is open')
-            except Exception as e:
-                logging.error(f'Connection failed: {e}')
-                raise
-                
-        except Exception as e:
-            logging.error(f'Connection failed: {e}')
+        server = self.connection.get('server', '')
+        port = self.connection.get('port', 0)
+        if not server or not port:
+            self.log.error('Server or port not configured')
+            raise ValueError('Server configuration missing')
+            
+        try:
+            self.conn = await open_connection(server, port, timeout=self.connect_timeout)
+        except asyncio.TimeoutError:
+            self.log.error('Connection timed out after %s seconds', self.connect_timeout)
+            self._note_error('Connection timed out')
+            raise ConnectionError('Connection timed out - server may be down or unreachable')
+        except ConnectionRefusedError:
+            self.log.error('Connection refused - server may be down or port blocked')
+            self._note_error('Connection refused')
+            raise
+        except OSError as e:
+            self.log.error('Connection failed: %s', e)
+            self._note_error(f'Connection failed: {e}')
             raise
+        self.connected = True
+        self.connected_since = time.time()
+        self.log.info('Connected to %s:%s', server, port)
 
-    async def send_message(self, msg: str):
-        """Send a message to the server"""
-        if not self.connected:
-            return
-            
-        # Messages that shouldn't be logged
-        print_exclusions = {
+    def _load_credentials(self):
+        """Copy credentials and appearance from the account row"""
+        account = self.account or {}
+        self.email = account.get('email', '')
+        self.character = account.get('character', '')
+        self.password = account.get('password', '')
+        self.colors = account.get('colors', '')
+        if self.account:
+            self.desc = f"{account.get('description', '')} [{self.app_name} v{self.app_vers}]"
+        else:
+            self.desc = f"[{self.app_name} v{self.app_vers}]"
+        self.owner = account.get('owner', '')
+        self._update_quiet_messages()
+
+    async def reload_config(self) -> dict:
+        """Re-read this bot's account and connection from the database
+        
+        The owner takes effect immediately, and colors and description are
+        sent to the server when connected. Login details and the server
+        address can't change under a live session: they are used from the
+        next reconnect on and reported as relogin_required.
+        """
+        if not self.account:
+            raise ValueError('bot has no account profile to reload')
+        account_id = self.account['id']
+        account, connection = await asyncio.gather(
+            async_config.get_account(account_id=account_id),
+            async_config.get_connection_config(account_id=account_id)
+        )
+        if account is None:
+            raise ValueError(f"account {account_id} no longer exists")
+        
+        old = {'email': self.email, 'character': self.character, 'password': self.password,
+               'colors': self.colors, 'desc': self.desc, 'owner': self.owner}
+        old_connection = self.connection or {}
+        self.account = account
+        self.connection = connection or {}
+        self._load_credentials()
+        changed = [field for field, value in old.items() if getattr(self, field) != value]
+        changed += [field for field in ('server', 'port') if self.connection.get(field) != old_connection.get(field)]
+        
+        if self.connected:
+            if 'colors' in changed:
+                await self.send_message(f'color {self.colors}', urgent=True)
+            if 'desc' in changed:
+                await self.send_message(f'desc {self.desc}', urgent=True)
+        relogin = [field for field in ('email', 'character', 'password', 'server', 'port') if field in changed]
+        self.log.info('Reloaded config: changed %s', ', '.join(changed) or 'nothing')
+        if relogin:
+            self.log.info('%s change takes effect on the next login', ', '.join(relogin))
+        return {'changed': changed, 'relogin_required': relogin}
+
+    def reload_commands(self) -> dict:
+        """Hot-swap edited command modules for every bot in this process
+        
+        The registry is shared, so one call updates the whole fleet; see
+        CommandRegistry.reload().
+        """
+        result = self.commands.registry.reload()
+        if result['reloaded']:
+            self.log.info('Reloaded commands: %s', ', '.join(result['reloaded']))
+        for module, error in result['failed'].items():
+            self._note_error(f'Reload of {module} failed: {error}')
+        return result
+
+    def _update_quiet_messages(self):
+        """Rebuild the set of messages that shouldn't be logged
+        
+        Call again whenever the credentials, colors or description change.
+        """
+        self._quiet_messages = frozenset({
             '>', '<', 'm 1', 'm 3', 'm 7', 'm 9',
             'lie', 'sit', 'stand', 'vascodagama',
             f'account {self.email} {self.character} {self.password}',
             f'color {self.colors}',
             f'desc {self.desc}'
-        }
+        })
+
+    async def send_message(self, msg: str, *, urgent: bool = False) -> bool:
+        """Queue a message for the server
         
-        if msg not in print_exclusions:
-            print(f'[SEND] {msg}')
-            logging.info(f'Sent: {msg}')
-            
-        self.writer.write(f'{msg}\n'.encode('iso-8859-1'))
-        await self.writer.drain()
-
-    def _register_commands(self):
-        """Register all available commands"""
-        # Register movement command
-        move_cmd = MovementCommand(self)
-        self.commands[move_cmd.name] = move_cmd
-        for alias in move_cmd.aliases:
-            self.commands[alias] = move_cmd
+        Never blocks: the send queue coalesces and paces the actual writes.
+        While reconnecting, messages wait in the queue for the next session.
+        Urgent messages (the login) go ahead of everything already queued.
+        Returns False if the message was dropped.
+        """
+        if not self.running:
+            return False
             
-        # Register say command
-        say_cmd = SayCommand(self)
-        self.commands[say_cmd.name] = say_cmd
-        for alias in say_cmd.aliases:
-            self.commands[alias] = say_cmd
+        if msg not in self._quiet_messages:
+            console('SEND', msg)
+            self.log.info('Sent: %s', msg)
             
-        # Register system command
-        sys_cmd = SystemCommand(self)
-        self.commands[sys_cmd.name] = sys_cmd
-        for alias in sys_cmd.aliases:
-            self.commands[alias] = sys_cmd
-    
+        return self.outbound.put(f'{msg}\n'.encode('iso-8859-1'), urgent=urgent)
+
+    async def reply(self, account_id, text: str) -> bool:
+        """Whisper a command response back to the owner"""
+        return await self.send_message(f"wh {self.owner.replace(' ', '|')} {text}")
+
     async def handle_command(self, account_id: str, command: str, args: list[str]) -> None:
         """Handle a command from the owner"""
         cmd = self.commands.get(command.lower())
         if not cmd:
-            await self.send_message(account_id, f"Unknown command: {command}")
+            await self.reply(account_id, f"Unknown command: {command}")
             return
             
-        if not cmd.can_execute(account_id):
-            await self.send_message(account_id, f"Command on cooldown. Please wait {cmd.cooldown}s")
+        wait = cmd.check_cooldown(account_id)
+        if wait > 0:
+            self._cooldown_rejections.labels(self.metrics_name, cmd.name).inc()
+            # Round up so a few milliseconds left never reads as "0.0s"
+            await self.reply(account_id, f"Command on cooldown. Please wait {max(math.ceil(wait * 10) / 10, 0.1):.1f}s")
             return
             
+        began = time.perf_counter()
         try:
-            await cmd.execute(account_id, args)
+            if cmd.timeout:
+                await asyncio.wait_for(cmd.execute(account_id, args), cmd.timeout)
+            else:
+                await cmd.execute(account_id, args)
+        except asyncio.TimeoutError:
+            self.log.warning('Command %s timed out after %ss', command, cmd.timeout)
+            await self.reply(account_id, f"Command timed out after {cmd.timeout}s")
         except Exception as e:
-            logging.error(f"Error executing command {command}: {e}")
-            await self.send_message(account_id, f"Error executing command: {e}")
+            self.log.error('Error executing command %s: %s', command, e)
+            self._note_error(f'Command {command}: {e}')
+            await self.reply(account_id, f"Error executing command: {e}")
+        finally:
+            self._command_seconds.labels(self.metrics_name, cmd.name).observe(time.perf_counter() - began)
 
-    async def handle_whisper(self, msg: str):
+    async def handle_whisper(self, event: Message):
         """Process whisper messages and handle commands from owner"""
-        whisperer = re.search(r'\<name[^\>]+\>([^\<]+)\<\/name\>', msg).group(1)
-        message = re.search(r'\"([^\"]+)\"', msg).group(1)
+        whisperer = event.name
+        message = event.text
         
-        print(f'[RECV] {whisperer} (whisper): {message}')
+        console('RECV', f'{whisperer} (whisper): {message}')
+        self.events.emit(Whisper(self, whisperer, message))
         
         if whisperer != self.owner:
             return
             
-        # Handle commands
+        # Commands and legacy instructions are queued per whisperer, so they
+        # keep their order but never block reading
+        account_id = self.account['id']
         if message.startswith('!'):
             parts = message[1:].split()
+            if not parts:
+                return
             command = parts[0]
-            args = parts[1:] if len(parts) > 1 else []
-            await self.handle_command(self.account['id'], command, args)
+            args = parts[1:]
+            if command.lower() == 'stop':
+                count = self.scheduler.cancel(whisperer)
+                steps = self.navigator.stop()
+                await self.reply(account_id, f"Stopped {count} command(s) and {steps} step(s)")
+                return
+            # handle_command applies the command's own timeout
+            self.scheduler.submit(whisperer, command, lambda: self.handle_command(account_id, command, args), timeout=0)
         # Handle legacy commands
         elif message.startswith('cmd:'):
-            cmd = message[4:]
-            if cmd == 'quit':
-                await self.send_message('\"Disconnecting...')
-                await asyncio.sleep(5)
-                self.running = False
-            else:
-                await self.send_message(cmd)
+            self.scheduler.submit(whisperer, 'cmd:', lambda: self.handle_legacy_cmd(message[4:]))
         elif message.startswith('move:'):
-            moves = message[5:].split(',')
-            move_aliases = {'nw': 'm 7', 'ne': 'm 9', 'sw': 'm 1', 'se': 'm 3'}
-            
-            for move in moves:
-                move = move.strip()
-                cmd = move_aliases.get(move, move)
-                await self.send_message(cmd)
-                await asyncio.sleep(0.75)
+            self.scheduler.submit(whisperer, 'move:', lambda: self.handle_legacy_move(message[5:].split(',')))
         elif message.startswith('say:'):
-            await self.send_message(f'\"{message[4:]}')
+            self.scheduler.submit(whisperer, 'say:', lambda: self.send_message(f'\"{message[4:]}'))
+
+    async def handle_legacy_cmd(self, cmd: str):
+        """Run a raw server command from a cmd: whisper"""
+        if cmd == 'quit':
+            await self.send_message('\"Disconnecting...')
+            await asyncio.sleep(5)
+            self.running = False
+        else:
+            await self.send_message(cmd)
+
+    async def handle_legacy_move(self, moves: list[str]):
+        """Queue the steps from a move: whisper on the movement planner"""
+        self.movement.walk(moves)
+
+    async def handle_login(self, message: Message):
+        """Answer the Dragonroar greeting with our credentials
+        
+        Sent on every connection, so a reconnect restores the colors and
+        description as well. Lines queued before the login wait for it.
+        """
+        await self.send_message(f'account {self.email} {self.character} {self.password}', urgent=True)
+        await self.send_message(f'color {self.colors}', urgent=True)
+        await self.send_message(f'desc {self.desc}', urgent=True)
+
+    async def handle_dream_load(self, message: Message):
+        """Tell the server the dream has loaded"""
+        if message.type is MessageType.LOGIN_COMPLETE:
+            self.backoff.reset()
+            latency = self.reconnects.logged_in()
+            if latency is not None:
+                self._reconnect_seconds.observe(latency)
+                self.log.info('Reconnected after %.1fs', latency)
+            # Release what was queued while we were away
+            self.outbound.release()
+            self.events.emit(LoginComplete(self))
+        elif message.type is MessageType.DREAM_LOAD:
+            # ']q <dream> <checksum>': everyone we knew about is gone
+            self.world.enter_dream(message.raw[3:].split(' ', 1)[0])
+            dream = self.world.dream
+            if self.maps:
+                dream.map = self.maps.find(dream.name)
+                if dream.map:
+                    dream.grid = self.maps.grid(dream.map)
+                    self.log.info('Loaded map %s for %s', dream.map, dream.name)
+        await self.send_message('vascodagama', urgent=True)
+
+    def handle_camera(self, raw: bytes):
+        """Our view follows our avatar, so it is our real position"""
+        position = self.world.on_camera(raw)
+        if position:
+            self.movement.set_position(*position)
+
+    def get_character(self, name_or_uid) -> Optional[Character]:
+        """Look up a character in the current dream by name or uid"""
+        return self.world.get_character(name_or_uid)
+
+    def is_valid_position(self, x: int, y: int) -> bool:
+        """Check that (x, y) is inside the dream
+
+        Blocked tiles still count: the navigator walks next to them instead.
+        """
+        return self.world.in_bounds(x, y)
+
+    async def handle_emote(self, message: Message):
+        """Publish an emote to subscribers"""
+        if message.type is MessageType.EMOTE:
+            self.events.emit(Emote(self, message.name, message.text))
+
+    async def handle_chat(self, message: Message):
+        """Publish normal chat to subscribers"""
+        if message.type is MessageType.CHAT:
+            self.events.emit(Chat(self, message.name, message.text))
+
+    def echo_emote(self, event: Emote):
+        """Echo emotes to the console"""
+        console('RECV', f'{event.name} {event.text}')
+
+    def echo_chat(self, event: Chat):
+        """Echo normal chat to the console"""
+        console('RECV', f'{event.name}: {event.text}')
+
+    def handle_spawn(self, raw: bytes):
+        """Track an avatar and announce it if it is new to the dream"""
+        dream = self.world.dream
+        before = len(dream)
+        character = self.world.on_spawn(raw)
+        # A spawn for a uid we already know is a redraw, not an arrival
+        if character is not None and len(dream) > before and self.events.wants(Arrival):
+            self.events.emit(Arrival(self, character))
+
+    def handle_remove(self, raw: bytes):
+        """Forget an avatar and announce its departure"""
+        character = self.world.on_remove(raw)
+        if character is not None and self.events.wants(Departure):
+            self.events.emit(Departure(self, character))
 
     async def stay_alive(self):
         """Keep connection alive by sending periodic messages"""
@@ -212,54 +516,157 @@ class KiwiBot:
             await self.send_message('<')
             await asyncio.sleep(300)  # 5 minutes
 
-    async def run(self):
-        """Main bot loop"""
-        try:
-            await self.connect()
-            # Start keepalive task
-            asyncio.create_task(self.stay_alive())
+    async def process_lines(self, lines: list[bytes]):
+        """Classify and dispatch a batch of raw server lines"""
+        if self.capture:
+            self.capture.write_lines(lines)
+        self.lines_in += len(lines)
+        
+        handlers = self.message_handlers
+        raw_handlers = self.raw_handlers
+        idle = self._idle_types
+        inbound = self._inbound_by_type
+        parse_seconds = self._parse_seconds
+        perf_counter = time.perf_counter
+        # Time is charged to the dream we were in when the batch arrived
+        busy = self._busy_seconds.labels(self.metrics_name, self.world.dream.name)
+        started = perf_counter()
+        for raw in lines:
+            # Print raw messages if in debug mode
+            if self.debug:
+                console('DEBUG', raw.decode('iso-8859-1').strip())
             
+            # Classify on the raw bytes; only lines with a handler get decoded
+            message_type = classify_raw(raw)
+            counter = inbound.get(message_type)
+            if counter is None:
+                counter = inbound[message_type] = self._inbound_lines.labels(self.metrics_name, message_type.value)
+            counter.inc()
+            raw_handler = raw_handlers.get(message_type)
+            if raw_handler is not None:
+                raw_handler(raw)
+                continue
+            handler = handlers.get(message_type)
+            if handler is None or message_type in idle:
+                continue
+            
+            began = perf_counter()
+            message = parse_classified(message_type, raw.decode('iso-8859-1').strip())
+            parse_seconds.observe(perf_counter() - began)
+            await handler(message)
+            if not self.running:
+                break
+        busy.inc(perf_counter() - started)
+
+    async def run_session(self):
+        """Read from the current connection until it closes or fails
+        
+        The flusher and keepalive belong to the connection and stop with it;
+        the outbound queue doesn't, so unsent lines carry over to the next one.
+        """
+        self.outbound.hold()
+        self._flush_task = asyncio.create_task(self.outbound.run(self.conn))
+        self._keepalive_task = asyncio.create_task(self.stay_alive())
+        reason = 'stopped'
+        try:
             while self.running:
-                data = await self.reader.readline()
-                msg = data.decode('iso-8859-1').strip()
-                
-                # Print raw messages if in debug mode
-                if self.debug:
-                    print(f'[DEBUG] {msg}')
-                
-                # Handle server messages
-                if msg == 'Dragonroar':
-                    await self.send_message(f'account {self.email} {self.character} {self.password}')
-                    await self.send_message(f'color {self.colors}')
-                    await self.send_message(f'desc {self.desc}')
-                    continue
-                    
-                if msg == '&&&&&&&&&&&&&' or msg.startswith(']q'):
-                    await self.send_message('vascodagama')
-                    continue
+                lines = await self.conn.read_lines()
+                if not lines:
+                    if self.running:
+                        self.log.info('Server closed the connection')
+                        reason = 'closed by server'
+                    break
                 
-                # Handle chat messages
-                if msg.startswith('('):
-                    if '<font color=\'whisper\'>' in msg:
-                        await self.handle_whisper(msg)
-                    elif '<font color=\'emote\'>' in msg:
-                        # Handle emotes
-                        emote = re.search(r'\(\<font\scolor\=\'emote\'\>\<name\sshortname\=\'[^\']+\'\>([^\<]+)\<\/name\>\s(.*)\<\/font\>', msg)
-                        print(f'[RECV] {emote.group(1)} {emote.group(2)}')
-                    else:
-                        # Handle normal chat
-                        chat = re.search(r'\(\<name\sshortname\=\'[^\']+\'\>([^\<]+)\<\/name\>\:\s(.*)', msg)
-                        if chat:
-                            print(f'[RECV] {chat.group(1)}: {chat.group(2)}')
+                await self.process_lines(lines)
                 
         except Exception as e:
-            logging.error(f'Error in main loop: {e}')
+            self.log.error('Error in main loop: %s', e)
+            self._note_error(f'Main loop: {e}')
+            reason = str(e) or type(e).__name__
+        finally:
+            for task in (self._keepalive_task, self._flush_task):
+                task.cancel()
+            await asyncio.gather(self._keepalive_task, self._flush_task, return_exceptions=True)
+            self._keepalive_task = self._flush_task = None
+            # A login or appearance update meant for this connection must not
+            # reach the next one ahead of its own handshake
+            self.outbound.end_session()
+            self.conn.close()
+            self.connected_since = None
+            self._bytes_in += self.conn.bytes_in
+            self._bytes_out += self.conn.bytes_out
+            self.connected = False
+            # Routes and positions from the old session no longer hold
+            self.navigator.stop()
+            self.world.enter_dream()
+            self.events.emit(Disconnect(self, reason))
+
+    async def run(self):
+        """Main bot loop: stay connected until stopped, reconnecting with backoff"""
+        try:
+            while self.running:
+                try:
+                    await self.connect()
+                    self.reconnects.attempt(ok=True)
+                except ValueError:
+                    break  # misconfigured, retrying won't help
+                except OSError:
+                    self.reconnects.attempt(ok=False)
+                    if not self.reconnect:
+                        break
+                else:
+                    await self.run_session()
+                    if not self.running or not self.reconnect:
+                        break
+                    self.reconnects.disconnected()
+                
+                # Full jitter keeps a fleet from reconnecting in lockstep
+                delay = self.backoff.next()
+                self.log.info('Reconnecting in %.1fs (attempt %d)', delay, self.backoff.attempt)
+                await asyncio.sleep(delay)
         finally:
-            if self.writer:
-                self.writer.close()
-                await self.writer.wait_closed()
+            self.running = False
+            await self.scheduler.close()
+            await self.events.close()
+            self.navigator.stop()
+            await self.movement.close()
+            if self.conn:
+                self.conn.close()
+            if self.capture:
+                self.capture.close()
             self.connected = False
 
+    def status(self) -> dict:
+        """Snapshot for the live status channel (kept small: it is sent every second)"""
+        return {
+            'name': self.metrics_name,
+            'character': self.character,
+            'running': self.running,
+            'connected': self.connected,
+            'dream': self.world.dream.name,
+            'characters': len(self.world.dream),
+            'started_at': self.started_at,
+            'connected_since': self.connected_since,
+            'lines_in': self.lines_in,
+            'lines_out': self.outbound.sent,
+            'queue': self.outbound.depth,
+            'commands': self.scheduler.running,
+            'reconnects': self.reconnects.reconnects,
+            'last_error': self.last_error,
+            'last_error_at': self.last_error_at,
+        }
+
+    def stats(self) -> dict:
+        """Return connection and reconnect counters"""
+        return {
+            'connected': self.connected,
+            'outbound': self.outbound.stats(),
+            'reconnect': self.reconnects.stats(),
+            'events': self.events.stats(),
+            'bytes_in': self._bytes_in + (self.conn.bytes_in if self.connected and self.conn else 0),
+            'bytes_out': self._bytes_out + (self.conn.bytes_out if self.connected and self.conn else 0),
+        }
+
 def display_accounts():
     """Display a list of available account profiles"""
     accounts = list_accounts()
@@ -275,6 +682,89 @@ def display_accounts():
     print("\nUse --profile <name> or --account-id <id> to select an account.")
     return True
 
+def resolve_accounts(args) -> Optional[list[dict]]:
+    """Load the account profiles selected on the command line
+    
+    Returns {'account': ..., 'connection': ...} records fetched together in
+    a single query, or None if the selection can't be satisfied.
+    """
+    if args.all:
+        records = get_accounts_with_connections()
+        if not records:
+            print("Error: No accounts configured in the database.")
+            return None
+        return records
+    
+    if args.account_id:
+        records = get_accounts_with_connections(account_ids=[args.account_id])
+        if not records:
+            print(f"Error: Account with ID {args.account_id} not found.")
+            display_accounts()
+            return None
+        return records
+    
+    if args.profile:
+        names = list(dict.fromkeys(part.strip() for part in args.profile.split(',') if part.strip()))
+        if not names:
+            return None
+        records = get_accounts_with_connections(names=names)
+        found = {record['account']['name'] for record in records}
+        missing = [name for name in names if name not in found]
+        if missing:
+            for name in missing:
+                print(f"Error: Account profile '{name}' not found.")
+            display_accounts()
+            return None
+        return records
+    
+    # No account specified, check if we have any accounts
+    records = get_accounts_with_connections()
+    if not records:
+        print("Error: No accounts configured in the database.")
+        print("Please create at least one account configuration.")
+        return None
+    
+    if len(records) > 1:
+        print("Multiple account profiles found. Please select one, or use --all:")
+        display_accounts()
+        return None
+        
+    # Use the only account
+    return records
+
+async def run_fleet(bots: list[KiwiBot], stagger: float = 0.5):
+    """Run several bots as tasks on the current event loop
+    
+    Each bot owns its own connection; a crash in one bot is logged and
+    does not take the rest of the fleet down.
+    """
+    async def run_isolated(bot: KiwiBot, delay: float):
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            await bot.run()
+        except Exception as e:
+            bot.log.exception('Bot crashed: %s', e)
+            print(f"[FLEET] {bot.account['name']} stopped: {e}")
+    
+    tasks = [
+        asyncio.create_task(run_isolated(bot, i * stagger), name=f"kiwibot-{bot.account['name']}")
+        for i, bot in enumerate(bots)
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def watch_commands(bot: KiwiBot, interval: float):
+    """Hot-reload command modules whenever their files change"""
+    while True:
+        await asyncio.sleep(interval)
+        if default_registry.changed_modules():
+            bot.reload_commands()
+
 async def main():
     """Entry point for the bot"""
     parser = argparse.ArgumentParser(
@@ -287,13 +777,154 @@ async def main():
     )
     parser.add_argument(
         '-p', '--profile',
-        help='Select account profile by name'
+        help='Select account profile by name (comma-separated for fleet mode, e.g. a,b,c)'
     )
     parser.add_argument(
         '-i', '--account-id',
         type=int,
         help='Select account profile by ID'
     )
+    parser.add_argument(
+        '-a', '--all',
+        action='store_true',
+        help='Run every configured account profile in one process (fleet mode)'
+    )
+    parser.add_argument(
+        '--stagger',
+        type=float,
+        default=0.5,
+        help='Seconds between bot logins in fleet mode (default: 0.5)'
+    )
+    parser.add_argument(
+        '--send-rate',
+        type=float,
+        default=DEFAULT_SEND_RATE,
+        help=f'Sustained outbound lines per second (default: {DEFAULT_SEND_RATE})'
+    )
+    parser.add_argument(
+        '--send-burst',
+        type=int,
+        default=DEFAULT_SEND_BURST,
+        help=f'Outbound lines allowed back to back (default: {DEFAULT_SEND_BURST})'
+    )
+    parser.add_argument(
+        '--step-interval',
+        type=float,
+        default=DEFAULT_STEP_INTERVAL,
+        help=f'Seconds between movement steps (default: {DEFAULT_STEP_INTERVAL})'
+    )
+    parser.add_argument(
+        '--maps',
+        metavar='DIR',
+        help='Directory of <dream>.map files (and optional blocking.json) used for walkability'
+    )
+    parser.add_argument(
+        '--connect-timeout',
+        type=float,
+        default=DEFAULT_CONNECT_TIMEOUT,
+        help=f'Seconds to wait for the server to accept a connection (default: {DEFAULT_CONNECT_TIMEOUT})'
+    )
+    parser.add_argument(
+        '--reconnect-max-delay',
+        type=float,
+        default=DEFAULT_BACKOFF_CAP,
+        help=f'Longest wait between reconnect attempts in seconds (default: {DEFAULT_BACKOFF_CAP})'
+    )
+    parser.add_argument(
+        '--no-reconnect',
+        action='store_true',
+        help='Exit when the connection drops instead of reconnecting'
+    )
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        metavar='PORT',
+        help=f'Serve Prometheus metrics for every bot on 127.0.0.1:PORT/metrics (e.g. {DEFAULT_METRICS_PORT})'
+    )
+    parser.add_argument(
+        '--profile-hot-path',
+        action='store_true',
+        help='Time handlers and commands, log event loop stalls and report every --profile-interval'
+    )
+    parser.add_argument(
+        '--slow-callback-ms',
+        type=float,
+        default=DEFAULT_SLOW_CALLBACK * 1000,
+        help=f'With --profile-hot-path, log when the event loop is blocked this long (default: {DEFAULT_SLOW_CALLBACK * 1000:.0f})'
+    )
+    parser.add_argument(
+        '--profile-interval',
+        type=float,
+        default=DEFAULT_REPORT_INTERVAL,
+        help=f'Seconds between profiling reports and dumps (default: {DEFAULT_REPORT_INTERVAL:.0f})'
+    )
+    parser.add_argument(
+        '--profile-dump',
+        choices=DUMP_FORMATS,
+        help='With --profile-hot-path, also write cProfile pstats or sampled collapsed stacks (flamegraph) each interval'
+    )
+    parser.add_argument(
+        '--profile-dir',
+        default=DEFAULT_PROFILE_DIR,
+        help=f'Directory for profile dumps (default: {DEFAULT_PROFILE_DIR})'
+    )
+    parser.add_argument(
+        '--status-port',
+        type=int,
+        default=DEFAULT_STATUS_PORT,
+        help=f'UDP port on 127.0.0.1 for the admin fleet dashboard, 0 to disable (default: {DEFAULT_STATUS_PORT})'
+    )
+    parser.add_argument(
+        '--watch-commands',
+        type=float,
+        default=0,
+        metavar='SECONDS',
+        help='Check command modules for edits every SECONDS and hot-reload them (default: off)'
+    )
+    parser.add_argument(
+        '--no-control',
+        action='store_true',
+        help='Don\'t open control sockets in data/control/ (used by account_manager.py and the admin app)'
+    )
+    parser.add_argument(
+        '--capture',
+        metavar='FILE',
+        help='Record raw inbound lines with timestamps to FILE for scripts/replay_capture.py '
+             '(use {name} for the profile name in fleet mode)'
+    )
+    parser.add_argument(
+        '--echo',
+        choices=ECHO_MODES,
+        default='all',
+        help='Console echo of sent/received messages: all, sample (1 in --echo-sample), summary or off'
+    )
+    parser.add_argument(
+        '--echo-sample',
+        type=int,
+        default=10,
+        help='Print one in this many messages with --echo sample (default: 10)'
+    )
+    parser.add_argument(
+        '--log-max-bytes',
+        type=int,
+        default=10 * 1024 * 1024,
+        help='Rotate logs/kiwibot.log after this many bytes (default: 10 MiB)'
+    )
+    parser.add_argument(
+        '--log-backups',
+        type=int,
+        default=5,
+        help='Number of rotated log files to keep (default: 5)'
+    )
+    parser.add_argument(
+        '--log-rotate-when',
+        help="Rotate logs on a schedule instead of by size, e.g. 'midnight' or 'H'"
+    )
+    parser.add_argument(
+        '--log-per-bot',
+        action='store_true',
+        help='Also write each bot to its own logs/kiwibot-<profile>.log'
+    )
     parser.add_argument(
         '-l', '--list',
         action='store_true',
@@ -302,6 +933,16 @@ async def main():
     
     args = parser.parse_args()
     
+    # Configure the shared logging pipeline once for every bot in the process
+    setup_logging(
+        max_bytes=args.log_max_bytes,
+        backup_count=args.log_backups,
+        rotate_when=args.log_rotate_when,
+        per_bot_files=args.log_per_bot,
+        echo=args.echo,
+        echo_sample=args.echo_sample
+    )
+    
     # Initialize database
     initialize_database()
     
@@ -313,54 +954,95 @@ async def main():
         display_accounts()
         return
     
-    # Determine which account to use
-    account_id = args.account_id
-    account_name = args.profile
+    records = resolve_accounts(args)
+    if not records:
+        return
     
-    # Check if we have configuration
-    if account_id:
-        account_config = get_account(account_id=account_id)
-        if not account_config:
-            print(f"Error: Account with ID {account_id} not found.")
-            display_accounts()
-            return
-    elif account_name:
-        account_config = get_account(name=account_name)
-        if not account_config:
-            print(f"Error: Account profile '{account_name}' not found.")
-            display_accounts()
-            return
-    else:
-        # No account specified, check if we have any accounts
-        accounts = list_accounts()
-        if not accounts:
-            print("Error: No accounts configured in the database.")
-            print("Please create at least one account configuration.")
-            return
-        
-        if len(accounts) > 1:
-            print("Multiple account profiles found. Please select one:")
-            display_accounts()
+    # Accounts and connections arrive preloaded, so the bots never touch the DB on startup
+    maps = MapLibrary(args.maps) if args.maps else None
+    bots = []
+    for record in records:
+        if not record['connection']:
+            print(f"Error: No connection configuration found for account '{record['account']['name']}'.")
             return
-            
-        # Use the only account
-        account_config = get_account(account_id=accounts[0]['id'])
-    
-    # Get the connection config for this account
-    connection_config = get_connection_config(account_id=account_config['id'])
-    if not connection_config:
-        print(f"Error: No connection configuration found for account '{account_config['name']}'.")
-        return
+        capture_path = None
+        if args.capture:
+            capture_path = str(capture_path_for(args.capture, record['account']['name'], len(records) > 1))
+        bots.append(KiwiBot.from_record(
+            record,
+            debug=args.debug,
+            send_rate=args.send_rate,
+            send_burst=args.send_burst,
+            capture_path=capture_path,
+            step_interval=args.step_interval,
+            maps=maps,
+            connect_timeout=args.connect_timeout,
+            reconnect=not args.no_reconnect,
+            backoff_cap=args.reconnect_max_delay
+        ))
     
-    # Start the bot with the selected account
-    print(f"Starting bot with account: {account_config['name']} ({account_config['character']})")
     if args.debug:
         print("Debug mode enabled")
-    bot = KiwiBot(account_id=account_config['id'], debug=args.debug)
-    await bot.run()
+    
+    profiler = None
+    if args.profile_hot_path:
+        profiler = HotPathProfiler(
+            slow_threshold=args.slow_callback_ms / 1000,
+            interval=args.profile_interval,
+            dump=args.profile_dump,
+            directory=args.profile_dir
+        )
+        for bot in bots:
+            profiler.instrument(bot)
+        await profiler.start()
+    
+    status_publisher = None
+    if args.status_port:
+        status_publisher = StatusPublisher(bots, port=args.status_port)
+        await status_publisher.start()
+    
+    control_servers = []
+    if not args.no_control:
+        for bot in bots:
+            server = ControlServer(bot)
+            if await server.start():
+                control_servers.append(server)
+    
+    watcher = None
+    if args.watch_commands > 0:
+        watcher = asyncio.create_task(watch_commands(bots[0], args.watch_commands))
+    
+    metrics_server = None
+    if args.metrics_port:
+        metrics_server = await serve_metrics(metrics, port=args.metrics_port)
+        print(f"Serving metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+    
+    try:
+        if len(bots) == 1:
+            bot = bots[0]
+            print(f"Starting bot with account: {bot.account['name']} ({bot.character})")
+            await bot.run()
+        else:
+            print(f"Starting fleet of {len(bots)} bots: {', '.join(bot.account['name'] for bot in bots)}")
+            await run_fleet(bots, stagger=args.stagger)
+    finally:
+        if watcher:
+            watcher.cancel()
+            await asyncio.gather(watcher, return_exceptions=True)
+        for server in control_servers:
+            await server.close()
+        if status_publisher:
+            await status_publisher.close()
+        if metrics_server:
+            metrics_server.close()
+        if profiler:
+            await profiler.stop()
+        async_config.shutdown()
 
 if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("\nBot shutting down...")
\ No newline at end of file
+        print("\nBot shutting down...")
+    finally:
+        shutdown_logging()
\ No newline at end of file
@@ -3,6 +3,7 @@ import sys
 import os
 import pathlib
 import argparse
+import json
 
 # Add project root to path to import db.config
 sys.path.append(str(pathlib.Path(__file__).parent.parent))
@@ -10,6 +11,7 @@ from db.config import (
     initialize_database, get_account, get_connection_config, 
     set_account, set_connection_config, list_accounts, delete_account
 )
+from admin.kiwibot.core import control
 
 def display_accounts():
     """Display all configured accounts"""
@@ -167,6 +169,57 @@ def edit_account(name=None, account_id=None):
         return False
     
     print(f"\nAccount '{account['name']}' successfully updated!")
+    notify_running_bot(account['name'])
+    return True
+
+def notify_running_bot(name):
+    """Ask a running bot to reload its settings, if one is running"""
+    response = control.request(name, {'cmd': 'reload-config'})
+    if response is None:
+        return
+    if not response.get('ok'):
+        print(f"Running bot could not reload its settings: {response.get('error')}")
+        return
+    print(f"Running bot reloaded: {', '.join(response['changed']) or 'nothing'} changed")
+    if response['relogin_required']:
+        print(f"  {', '.join(response['relogin_required'])} take effect the next time it logs in")
+
+def control_bot(command, name=None, account_id=None, text=None):
+    """Send a control command to a running bot"""
+    # Bots are reachable under their profile name
+    if account_id:
+        account = get_account(account_id=account_id)
+        if not account:
+            print(f"Account with ID {account_id} not found.")
+            return False
+        name = account['name']
+    
+    payload = {'cmd': command}
+    if text is not None:
+        payload['text'] = text
+    response = control.request(name, payload)
+    if response is None:
+        print(f"Bot '{name}' is not running (no control socket in {control.CONTROL_DIR}).")
+        return False
+    if not response.pop('ok'):
+        print(f"Error: {response.get('error')}")
+        return False
+    
+    if command == 'status':
+        for key, value in response['status'].items():
+            print(f"{key + ':':<17}{value}")
+    elif command == 'reload-config':
+        print(f"Changed: {', '.join(response['changed']) or 'nothing'}")
+        if response['relogin_required']:
+            print(f"Takes effect on next login: {', '.join(response['relogin_required'])}")
+    elif command == 'reload-commands':
+        print(f"Reloaded: {', '.join(response['reloaded']) or 'nothing changed'}")
+    elif command == 'quit':
+        print(f"Bot '{name}' is shutting down.")
+    elif response.get('queued'):
+        print("Queued.")
+    else:
+        print(json.dumps(response))
     return True
 
 def remove_account(name=None, account_id=None):
@@ -241,6 +294,24 @@ def show_account_details(name=None, account_id=None):
     
     return True
 
+def reload_commands_everywhere():
+    """Hot-reload edited command modules in every running bot"""
+    # Bots in one process share their commands: the first bot reached in a
+    # process reloads it, the rest find nothing left to do
+    reached = 0
+    for account in list_accounts():
+        response = control.request(account['name'], {'cmd': 'reload-commands'})
+        if response is None:
+            continue
+        reached += 1
+        if not response.get('ok'):
+            print(f"{account['name']}: {response.get('error')}")
+        elif response['reloaded']:
+            print(f"{account['name']}: reloaded {', '.join(response['reloaded'])}")
+    if not reached:
+        print("No bots are running.")
+    return reached > 0
+
 def main():
     parser = argparse.ArgumentParser(description=f"Account Manager for KiwiBot")
     subparsers = parser.add_subparsers(dest='command', help='Command to execute')
@@ -270,6 +341,26 @@ def main():
     show_group.add_argument('-n', '--name', help='Account profile name')
     show_group.add_argument('-i', '--id', type=int, help='Account ID')
     
+    # Commands for running bots, over their control socket
+    for command, help_text in (('send', 'Send a raw command to a running bot'),
+                               ('say', 'Make a running bot say something'),
+                               ('reload', 'Make a running bot reload its settings'),
+                               ('status', 'Show the status of a running bot'),
+                               ('quit', 'Stop a running bot')):
+        control_parser = subparsers.add_parser(command, help=help_text)
+        control_group = control_parser.add_mutually_exclusive_group(required=True)
+        control_group.add_argument('-n', '--name', help='Account profile name')
+        control_group.add_argument('-i', '--id', type=int, help='Account ID')
+        if command in ('send', 'say'):
+            control_parser.add_argument('text', help='Text to send')
+    
+    reload_commands_parser = subparsers.add_parser('reload-commands',
+                                                   help='Hot-reload edited command modules in running bots')
+    reload_commands_group = reload_commands_parser.add_mutually_exclusive_group(required=True)
+    reload_commands_group.add_argument('-n', '--name', help='Account profile name')
+    reload_commands_group.add_argument('-i', '--id', type=int, help='Account ID')
+    reload_commands_group.add_argument('-a', '--all', action='store_true', help='Every running bot')
+    
     args = parser.parse_args()
     
     # Initialize database
@@ -293,6 +384,18 @@ def main():
     elif args.command == 'show':
         show_account_details(name=args.name, account_id=args.id)
     
+    elif args.command in ('send', 'say', 'status', 'quit'):
+        control_bot(args.command, name=args.name, account_id=args.id, text=getattr(args, 'text', None))
+    
+    elif args.command == 'reload':
+        control_bot('reload-config', name=args.name, account_id=args.id)
+    
+    elif args.command == 'reload-commands':
+        if args.all:
+            reload_commands_everywhere()
+        else:
+            control_bot('reload-commands', name=args.name, account_id=args.id)
+    
     else:
         parser.print_help()
 
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Benchmark the A* pathfinder on large synthetic maps
+
+Builds seeded random dreams (scattered obstacles plus half-map walls with
+a door in each, so routes have to detour) and reports per-search latency, node
+expansions and the longest single slice at the configured expansion
+budget, which is the longest the event loop would be held. A second pass
+compares re-planning from scratch with extending the queued route while
+following a target that keeps moving.
+
+    python scripts/bench_pathfinding.py --sizes 256 512 1024 --queries 200
+"""
+import sys
+import argparse
+import pathlib
+import random
+import time
+
+# Add project root to path to import admin.kiwibot
+sys.path.append(str(pathlib.Path(__file__).parent.parent))
+from admin.kiwibot.core.movement import apply_step
+from admin.kiwibot.core.pathfinding import PathSearch, WalkGrid, nearest_reachable, DEFAULT_BUDGET
+
+def build_map(size, density, walls, rng):
+    """Return a size x size grid with random obstacles and walls with doors"""
+    grid = WalkGrid(size, size)
+    cells = grid.cells
+    door = max(2, size // 64)  # half-width of the gap in each wall
+    for index in rng.sample(range(size * size), int(size * size * density)):
+        cells[index] = 0
+    for _ in range(walls):
+        # Half-map walls with a door, so routes detour without sealing regions off
+        length = size // 2
+        fixed = rng.randrange(size)
+        begin = rng.randrange(size - length)
+        door_at = rng.randrange(begin, begin + length)
+        horizontal = rng.random() < 0.5
+        for along in range(begin, begin + length):
+            if abs(along - door_at) > door:
+                x, y = (along, fixed) if horizontal else (fixed, along)
+                cells[y * size + x] = 0
+    return grid
+
+def random_tile(grid, rng, parity=None):
+    """Pick a walkable tile, optionally with a given x + y parity"""
+    while True:
+        x, y = rng.randrange(grid.width), rng.randrange(grid.height)
+        if grid.walkable(x, y) and (parity is None or (x + y) % 2 == parity):
+            return x, y
+
+def percentile(values, pct):
+    """Return the pct-th percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+def run_search(grid, start, goal, budget):
+    """Run one search in budget-sized slices; returns (path, expansions, total s, longest slice s)"""
+    search = PathSearch(grid, start, goal)
+    longest = 0.0
+    total = 0.0
+    while True:
+        began = time.perf_counter()
+        done = search.run(budget)
+        elapsed = time.perf_counter() - began
+        total += elapsed
+        longest = max(longest, elapsed)
+        if done:
+            return search.path, search.expanded, total, longest
+
+def bench_queries(grid, queries, budget, rng):
+    times, slices, expansions, lengths = [], [], [], []
+    unreachable = 0
+    for _ in range(queries):
+        start = random_tile(grid, rng)
+        goal = random_tile(grid, rng, parity=(start[0] + start[1]) % 2)
+        path, expanded, total, longest = run_search(grid, start, goal, budget)
+        times.append(total)
+        slices.append(longest)
+        expansions.append(expanded)
+        if path is None:
+            unreachable += 1
+        else:
+            lengths.append(len(path))
+    times.sort()
+    slices.sort()
+    print(f"  searches {queries}, unreachable {unreachable}, mean path {sum(lengths) / max(1, len(lengths)):.0f} steps")
+    print(f"  time ms       p50 {percentile(times, 50) * 1e3:8.2f}  p99 {percentile(times, 99) * 1e3:8.2f}  max {times[-1] * 1e3:8.2f}")
+    print(f"  slice ms      p50 {percentile(slices, 50) * 1e3:8.2f}  p99 {percentile(slices, 99) * 1e3:8.2f}  max {slices[-1] * 1e3:8.2f}")
+    print(f"  expansions    mean {sum(expansions) / queries:,.0f}  "
+          f"({sum(expansions) / max(sum(times), 1e-9):,.0f}/s)")
+
+def bench_follow(grid, moves, budget, rng):
+    """Chase a random walker, re-planning vs extending the route each move"""
+    start = random_tile(grid, rng)
+    target = random_tile(grid, rng, parity=(start[0] + start[1]) % 2)
+    path, *_ = run_search(grid, start, target, budget)
+    if path is None:
+        print("  follow: no initial route, skipped")
+        return
+    replan_expanded = repair_expanded = 0
+    replan_time = repair_time = 0.0
+    here = start
+    for _ in range(moves):
+        # Target wanders one step; we have walked one step of the old route
+        options = [d for d in ('nw', 'ne', 'sw', 'se') if grid.walkable(*apply_step(target, d))]
+        if options:
+            target = apply_step(target, rng.choice(options))
+        if path:
+            here = apply_step(here, path.pop(0))
+
+        goal = nearest_reachable(grid, here, target)
+        if goal is None:
+            continue
+        _, expanded, total, _ = run_search(grid, here, goal, budget)
+        replan_expanded += expanded
+        replan_time += total
+
+        end = here
+        for step in path:
+            end = apply_step(end, step)
+        extension, expanded, total, _ = run_search(grid, end, nearest_reachable(grid, end, target) or end, budget)
+        repair_expanded += expanded
+        repair_time += total
+        path.extend(extension or [])
+    print(f"  follow {moves} moves: re-plan {replan_expanded:,} expansions {replan_time * 1e3:.1f} ms | "
+          f"extend {repair_expanded:,} expansions {repair_time * 1e3:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark KiwiBot's A* pathfinder on synthetic maps")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[256, 512, 1024], help='Map edge lengths in tiles')
+    parser.add_argument('--queries', type=int, default=100, help='Random searches per map (default: 100)')
+    parser.add_argument('--density', type=float, default=0.2, help='Fraction of tiles blocked at random (default: 0.2)')
+    parser.add_argument('--walls', type=int, default=8, help='Walls (half the map long, one door each) per map (default: 8)')
+    parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET,
+                        help=f'Node expansions per event loop slice (default: {DEFAULT_BUDGET})')
+    parser.add_argument('--follow-moves', type=int, default=50, help='Target moves in the follow benchmark')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed')
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        rng = random.Random(args.seed)
+        began = time.perf_counter()
+        grid = build_map(size, args.density, args.walls, rng)
+        print(f"\n{size}x{size} map ({args.density:.0%} blocked, {args.walls} walls), "
+              f"built in {(time.perf_counter() - began) * 1e3:.0f} ms")
+        bench_queries(grid, args.queries, args.budget, rng)
+        bench_follow(grid, args.follow_moves, args.budget, rng)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
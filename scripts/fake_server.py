@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Furcadia game server
+
+Speaks the subset of the protocol KiwiBot uses: the Dragonroar greeting,
+the account/color/desc login, the '&&&&&&&&&&&&&' and ']q' dream handshake
+(answered with 'vascodagama'), and injected whisper, emote, chat and
+avatar lines (the crowd arrives when a bot enters the dream, then walks
+around) at scriptable rates. Everything each bot sends is
+recorded per character.
+
+Run it on its own and point a connection config at it:
+
+    python scripts/fake_server.py --port 6500 --chat-rate 50
+
+or let it spawn a fleet of in-process bots and report what one host sustains:
+
+    python scripts/fake_server.py --spawn-bots 200 --chat-rate 20 --duration 60
+"""
+import sys
+import asyncio
+import argparse
+import pathlib
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Add project root to path to import main
+sys.path.append(str(pathlib.Path(__file__).parent.parent))
+
+LOGIN_COMPLETE = b'&&&&&&&&&&&&&\n'
+TICK = 0.05  # seconds between injection batches
+
+def base220(value: int, width: int) -> bytes:
+    """Encode an integer as Furcadia base-220 digits (least significant first)"""
+    digits = bytearray()
+    for _ in range(width):
+        digits.append(35 + value % 220)
+        value //= 220
+    return bytes(digits)
+
+class Session:
+    """One connected client"""
+    def __init__(self, server: 'FakeFurcServer', reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.character: Optional[str] = None
+        self.logged_in = False
+        self.in_dream = False
+        self.connected_at = time.monotonic()
+        self.received: List[Tuple[float, str]] = []  # (seconds since connect, line)
+        self.lines_out = 0
+        self._credit: Dict[str, float] = {}
+
+    def send(self, data: bytes) -> None:
+        self.lines_out += data.count(b'\n')
+        self.writer.write(data)
+
+    async def handle(self) -> None:
+        """Run the login handshake and record client lines until disconnect"""
+        self.send(b'Dragonroar\n')
+        injector = None
+        try:
+            while True:
+                data = await self.reader.readline()
+                if not data:
+                    break
+                line = data.decode('iso-8859-1').rstrip('\r\n')
+                self.received.append((time.monotonic() - self.connected_at, line))
+                self.server.lines_in += 1
+
+                if line.startswith('account ') and not self.logged_in:
+                    parts = line.split(' ')
+                    self.character = parts[2] if len(parts) > 2 else 'Unknown'
+                    self.logged_in = True
+                    self.send(LOGIN_COMPLETE)
+                elif line == 'vascodagama' and not self.in_dream:
+                    self.in_dream = True
+                    self.send(f']q {self.server.dream}\n'.encode('iso-8859-1'))
+                    injector = asyncio.create_task(self.inject())
+                elif line == 'quit':
+                    break
+                await self.writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            if injector:
+                injector.cancel()
+            self.writer.close()
+            self.server.finished(self)
+
+    def _due(self, kind: str, rate: float) -> int:
+        """Return how many `kind` lines are due this tick, carrying fractions"""
+        credit = self._credit.get(kind, 0.0) + rate * TICK
+        count = int(credit)
+        self._credit[kind] = credit - count
+        return count
+
+    async def inject(self) -> None:
+        """Write scripted traffic to this client at the configured rates"""
+        server = self.server
+        self.send(b''.join(
+            b'<' + base220(uid, 4) + base220(random.randrange(2, 200, 2), 2) + base220(random.randrange(2, 200), 2)
+            + base220(0, 2) + bytes([35 + len(name)]) + name.encode('iso-8859-1') + b'\n'
+            for uid, name in enumerate(server.crowd, 1)
+        ))
+        while True:
+            batch = []
+            for _ in range(self._due('chat', server.chat_rate)):
+                name = random.choice(server.crowd)
+                batch.append(f"(<name shortname='{name.lower()}'>{name}</name>: {random.choice(server.chatter)}")
+            for _ in range(self._due('emote', server.emote_rate)):
+                name = random.choice(server.crowd)
+                batch.append(f"(<font color='emote'><name shortname='{name.lower()}'>{name}</name> waves.</font>")
+            for _ in range(self._due('whisper', server.whisper_rate)):
+                name = server.whisper_from
+                batch.append(f"(<font color='whisper'>[ <name shortname='{name.lower()}' src='whisper-from'>{name}</name> "
+                             f"whispers, \"{server.whisper_text}\" to you. ]</font>")
+            data = '\n'.join(batch).encode('iso-8859-1') + b'\n' if batch else b''
+
+            moves = self._due('move', server.move_rate)
+            if moves:
+                data += b''.join(
+                    b'/' + base220(random.randrange(1, len(server.crowd) + 1), 4) + base220(random.randrange(2, 200, 2), 2)
+                    + base220(random.randrange(2, 200), 2) + base220(0, 2) + b'\n'
+                    for _ in range(moves)
+                )
+
+            if data:
+                self.send(data)
+                await self.writer.drain()
+            await asyncio.sleep(TICK)
+
+class FakeFurcServer:
+    """Scriptable asyncio server that records what every bot sent"""
+    def __init__(self, host: str = '127.0.0.1', port: int = 6500, dream: str = 'fakedream',
+                 chat_rate: float = 0.0, emote_rate: float = 0.0, whisper_rate: float = 0.0,
+                 move_rate: float = 0.0, whisper_from: str = 'Owner', whisper_text: str = '!say hello'):
+        self.host = host
+        self.port = port
+        self.dream = dream
+        self.chat_rate = chat_rate
+        self.emote_rate = emote_rate
+        self.whisper_rate = whisper_rate
+        self.move_rate = move_rate
+        self.whisper_from = whisper_from
+        self.whisper_text = whisper_text
+        self.crowd = [f'Visitor{i}' for i in range(50)]
+        self.chatter = ['hello!', 'how is everyone?', 'nice dream', 'brb', 'lol']
+        self.sessions: List[Session] = []
+        self.history: List[Session] = []
+        self.lines_in = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._accept, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        for session in list(self.sessions):
+            session.writer.close()
+
+    async def _accept(self, reader, writer) -> None:
+        session = Session(self, reader, writer)
+        self.sessions.append(session)
+        await session.handle()
+
+    def finished(self, session: Session) -> None:
+        if session in self.sessions:
+            self.sessions.remove(session)
+            self.history.append(session)
+
+    @property
+    def lines_out(self) -> int:
+        return sum(session.lines_out for session in self.sessions + self.history)
+
+    def sent_by(self, character: str) -> List[str]:
+        """Return every line a character sent, across reconnects"""
+        return [line for session in self.history + self.sessions
+                if session.character == character for _, line in session.received]
+
+    def save_recordings(self, directory: pathlib.Path) -> None:
+        """Write one file per character with the lines it sent"""
+        directory.mkdir(parents=True, exist_ok=True)
+        for session in self.history + self.sessions:
+            name = session.character or f'anonymous-{id(session)}'
+            with open(directory / f'{name}.log', 'a', encoding='iso-8859-1') as f:
+                for offset, line in session.received:
+                    f.write(f'{offset:.6f}\t{line}\n')
+
+def spawn_bots(count: int, port: int, owner: str):
+    """Create in-process KiwiBots logged in against the fake server"""
+    from main import KiwiBot
+
+    bots = []
+    for i in range(count):
+        account = {
+            'id': i + 1, 'name': f'load{i}', 'email': f'load{i}@localhost', 'character': f'LoadBot{i}',
+            'password': 'secret', 'colors': 'nynn', 'description': 'load test bot', 'owner': owner
+        }
+        bots.append(KiwiBot(account=account, connection={'server': '127.0.0.1', 'port': port}))
+    return bots
+
+async def run(args) -> None:
+    server = FakeFurcServer(
+        host=args.host, port=args.port, dream=args.dream,
+        chat_rate=args.chat_rate, emote_rate=args.emote_rate,
+        whisper_rate=args.whisper_rate, move_rate=args.move_rate,
+        whisper_from=args.whisper_from, whisper_text=args.whisper_text
+    )
+    await server.start()
+    print(f"Fake Furcadia server listening on {server.host}:{server.port}")
+
+    fleet = None
+    if args.spawn_bots:
+        from main import run_fleet
+        from admin.kiwibot.core.logging import setup_logging
+        setup_logging(echo=args.echo)
+        bots = spawn_bots(args.spawn_bots, server.port, args.whisper_from)
+        fleet = asyncio.create_task(run_fleet(bots, stagger=args.stagger))
+        print(f"Spawned {len(bots)} bots")
+
+    start = time.monotonic()
+    last_in, last_out, last_time = 0, 0, start
+    try:
+        while args.duration <= 0 or time.monotonic() - start < args.duration:
+            await asyncio.sleep(args.report)
+            now = time.monotonic()
+            lines_in, lines_out = server.lines_in, server.lines_out
+            logged_in = sum(1 for session in server.sessions if session.in_dream)
+            print(f"[{now - start:7.1f}s] sessions {len(server.sessions)} (in dream {logged_in}) | "
+                  f"server->bots {(lines_out - last_out) / (now - last_time):,.0f} lines/s | "
+                  f"bots->server {(lines_in - last_in) / (now - last_time):,.0f} lines/s")
+            last_in, last_out, last_time = lines_in, lines_out, now
+    finally:
+        if fleet:
+            fleet.cancel()
+            await asyncio.gather(fleet, return_exceptions=True)
+        await server.close()
+        if args.record:
+            server.save_recordings(pathlib.Path(args.record))
+            print(f"Recorded client traffic to {args.record}")
+        if fleet:
+            from admin.kiwibot.core.logging import shutdown_logging
+            shutdown_logging()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Furcadia server for load-testing KiwiBot")
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=6500, help='Port to listen on, 0 for any (default: 6500)')
+    parser.add_argument('--dream', default='fakedream', help='Dream name sent with ]q')
+    parser.add_argument('--chat-rate', type=float, default=0.0, help='Chat lines per second per bot')
+    parser.add_argument('--emote-rate', type=float, default=0.0, help='Emote lines per second per bot')
+    parser.add_argument('--whisper-rate', type=float, default=0.0, help='Whispers per second per bot')
+    parser.add_argument('--move-rate', type=float, default=0.0, help='Avatar movement lines per second per bot')
+    parser.add_argument('--whisper-from', default='Owner', help='Character the injected whispers come from')
+    parser.add_argument('--whisper-text', default='!say hello', help='Text of the injected whispers')
+    parser.add_argument('--spawn-bots', type=int, default=0, help='Run this many KiwiBots in-process against the server')
+    parser.add_argument('--stagger', type=float, default=0.0, help='Seconds between spawned bot logins')
+    parser.add_argument('--duration', type=float, default=0.0, help='Stop after this many seconds (default: run forever)')
+    parser.add_argument('--report', type=float, default=5.0, help='Seconds between throughput reports')
+    parser.add_argument('--echo', choices=('all', 'sample', 'summary', 'off'), default='summary',
+                        help='Console echo mode for spawned bots (default: summary)')
+    parser.add_argument('--record', metavar='DIR', help='Write the lines each bot sent to DIR/<character>.log on exit')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("\nFake server shutting down...")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
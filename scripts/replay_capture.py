@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Replay a traffic capture through KiwiBot's receive pipeline
+
+Feeds the raw lines recorded with `main.py --capture` through the same
+classification, whisper handling and command dispatch the live bot runs,
+against a null connection, and reports throughput, per-handler latency
+percentiles and (optionally) allocations. No server is involved, so the
+numbers are repeatable between runs.
+
+    python scripts/replay_capture.py captures/busy-dream.cap --loops 5
+"""
+import sys
+import asyncio
+import argparse
+import pathlib
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from itertools import groupby
+
+# Add project root to path to import main and admin.kiwibot
+sys.path.append(str(pathlib.Path(__file__).parent.parent))
+from main import KiwiBot
+from admin.kiwibot.core.capture import read_capture
+from admin.kiwibot.core.logging import setup_logging, shutdown_logging
+from admin.kiwibot.utils.message_parser import MessageType, classify_raw, parse_classified
+
+class NullConnection:
+    """Stands in for FurcadiaConnection and discards everything written"""
+    def __init__(self):
+        self.bytes_out = 0
+        self.writes = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> None:
+        self.bytes_out += len(data)
+        self.writes += 1
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+def load_batches(path):
+    """Load a capture as batches of lines that arrived together"""
+    return [[line for _, line in rows] for _, rows in groupby(read_capture(path), key=lambda row: row[0])]
+
+def guess_owner(batches):
+    """Pick the most frequent whisperer so owner commands get exercised"""
+    whisperers = Counter()
+    for batch in batches:
+        for raw in batch:
+            if classify_raw(raw) is MessageType.WHISPER:
+                message = parse_classified(MessageType.WHISPER, raw.decode('iso-8859-1').strip())
+                if message.name:
+                    whisperers[message.name] += 1
+    return whisperers.most_common(1)[0][0] if whisperers else ''
+
+def percentile(values, pct):
+    """Return the pct-th percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+class Timings:
+    """Collects per-handler latencies in seconds"""
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = Counter()
+
+    def wrap(self, label, handler):
+        samples = self.samples[label]
+        errors = self.errors
+
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await handler(*args, **kwargs)
+            except Exception:
+                errors[label] += 1
+            finally:
+                samples.append(time.perf_counter() - start)
+        return timed
+
+    def report(self):
+        print(f"\n{'handler':<22}{'count':>8}{'errors':>8}{'p50 us':>10}{'p90 us':>10}{'p99 us':>10}{'max us':>10}")
+        for label in sorted(self.samples):
+            values = sorted(self.samples[label])
+            if not values:
+                continue
+            print(f"{label:<22}{len(values):>8}{self.errors[label]:>8}"
+                  f"{percentile(values, 50) * 1e6:>10.1f}{percentile(values, 90) * 1e6:>10.1f}"
+                  f"{percentile(values, 99) * 1e6:>10.1f}{values[-1] * 1e6:>10.1f}")
+
+def build_bot(owner):
+    """Create a KiwiBot wired to a null connection"""
+    account = {
+        'id': 0, 'name': 'replay', 'email': 'replay@localhost', 'character': 'ReplayBot',
+        'password': '', 'colors': '', 'description': 'replay', 'owner': owner
+    }
+    bot = KiwiBot(account=account, connection={}, send_rate=1e9, send_burst=10 ** 6)
+    bot.outbound.max_depth = 10 ** 9
+    bot.scheduler.max_queued = 10 ** 9
+    bot.conn = NullConnection()
+    bot.connected = True
+    return bot
+
+def instrument(bot, timings):
+    """Wrap the bot's handlers so each call is timed"""
+    for message_type, handler in list(bot.message_handlers.items()):
+        bot.message_handlers[message_type] = timings.wrap(message_type.value, handler)
+    # handle_whisper looks up handle_command on the instance
+    bot.handle_command = timings.wrap('command', bot.handle_command)
+
+def time_parsing(batches, timings):
+    """Time classification plus field extraction for every line"""
+    samples = timings.samples['parse']
+    perf_counter = time.perf_counter
+    for batch in batches:
+        for raw in batch:
+            start = perf_counter()
+            message_type = classify_raw(raw)
+            if message_type in (MessageType.WHISPER, MessageType.EMOTE, MessageType.CHAT):
+                parse_classified(message_type, raw.decode('iso-8859-1').strip())
+            samples.append(perf_counter() - start)
+
+async def replay(bot, batches, loops):
+    """Push every batch through bot.process_lines and return elapsed seconds"""
+    flusher = asyncio.create_task(bot.outbound.run(bot.conn))
+    start = time.perf_counter()
+    try:
+        for _ in range(loops):
+            for batch in batches:
+                bot.running = True  # a replayed quit must not end the run
+                await bot.process_lines(batch)
+                await asyncio.sleep(0)  # let the flusher and command tasks run like the live loop would
+        while bot.scheduler.busy:
+            await asyncio.sleep(0)
+    finally:
+        elapsed = time.perf_counter() - start
+        flusher.cancel()
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a KiwiBot traffic capture as a benchmark")
+    parser.add_argument('capture', help='Capture file written by main.py --capture')
+    parser.add_argument('-n', '--loops', type=int, default=1, help='Times to replay the capture (default: 1)')
+    parser.add_argument('-o', '--owner', help='Owner character name (default: most frequent whisperer)')
+    parser.add_argument('--real-sleeps', action='store_true', help='Keep handler sleeps instead of skipping them')
+    parser.add_argument('--allocations', action='store_true', help='Trace allocations during an extra replay pass')
+    parser.add_argument('--echo', choices=('all', 'sample', 'summary', 'off'), default='off',
+                        help='Console echo of replayed messages (default: off)')
+    args = parser.parse_args()
+    setup_logging(echo=args.echo)
+
+    batches = load_batches(args.capture)
+    total = sum(len(batch) for batch in batches)
+    if not total:
+        print("Capture is empty.")
+        return 1
+
+    if not args.real_sleeps:
+        # Handlers pace movement with sleeps; skip them so the CPU cost is measured
+        real_sleep = asyncio.sleep
+        async def skip_sleep(delay, result=None):
+            return await real_sleep(0, result)
+        asyncio.sleep = skip_sleep
+
+    owner = args.owner if args.owner is not None else guess_owner(batches)
+    print(f"Replaying {total} lines in {len(batches)} batches x{args.loops} (owner: {owner or 'none'})")
+
+    timings = Timings()
+    time_parsing(batches, timings)
+
+    bot = build_bot(owner)
+    instrument(bot, timings)
+    elapsed = asyncio.run(replay(bot, batches, args.loops))
+
+    lines = total * args.loops
+    print(f"\nProcessed {lines} lines in {elapsed:.3f}s: {lines / elapsed:,.0f} messages/sec")
+    print(f"Sent {bot.outbound.sent} lines in {bot.outbound.batches} writes, {bot.conn.bytes_out} bytes")
+    timings.report()
+
+    if args.allocations:
+        bot = build_bot(owner)
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        asyncio.run(replay(bot, batches, 1))
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = after.compare_to(before, 'lineno')
+        allocated = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+        print(f"\nAllocations over one pass: {allocated} blocks retained, peak traced {peak / 1024:.1f} KiB")
+        print(f"Per line: {allocated / total:.2f} retained blocks")
+        for stat in stats[:10]:
+            print(f"  {stat}")
+
+    shutdown_logging()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())